@@ -0,0 +1,102 @@
+"""
+Бенчмарк поиска клиентов по ИНН на синтетической базе.
+
+Сравнивает прежний способ (булева маска по DataFrame на каждый запрос)
+с индексом ClientIndex: время построения индекса, сохранения и загрузки
+снимка, а также задержку одиночного и пакетного поиска. Чтение Excel не замеряется
+по умолчанию (запись 1 млн строк в xlsx занимает минуты), его можно
+включить флагом --excel.
+
+Запуск из корня репозитория:
+    python -m benchmarks.benchmark_client_lookup --rows 1000000 --lookups 2000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.services.client_data_service import ClientDataService, ClientIndex
+
+INDUSTRIES = ["Пищевая промышленность", "Машиностроение", "Сельское хозяйство", "Медицина", "Логистика"]
+
+
+def make_client_base(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    inns = rng.choice(10 ** 10 - 10 ** 9, size=rows, replace=False) + 10 ** 9
+    return pd.DataFrame({
+        "ИНН": inns.astype(str),
+        "Клиент": [f"ООО Клиент {i}" for i in range(rows)],
+        "Отрасль_ОКК": rng.choice(INDUSTRIES, size=rows),
+    })
+
+
+def _per_lookup_us(fn, inns) -> float:
+    started = time.perf_counter()
+    for inn in inns:
+        fn(inn)
+    return (time.perf_counter() - started) / len(inns) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--scan-lookups", type=int, default=20, help="число запросов для прежнего способа")
+    parser.add_argument("--excel", action="store_true", help="также замерить чтение xlsx (медленно)")
+    args = parser.parse_args()
+
+    df = make_client_base(args.rows)
+    rng = np.random.default_rng(1)
+    hits = rng.choice(df["ИНН"].to_numpy(), size=args.lookups)
+    misses = np.array([str(v) for v in rng.integers(10 ** 11, 10 ** 12, size=args.lookups)])
+    print(f"База: {len(df)} строк, запросов: {args.lookups} найденных + {args.lookups} ненайденных")
+
+    scan_us = _per_lookup_us(lambda inn: df[df["ИНН"] == inn], hits[: args.scan_lookups])
+    print(f"{'маска по DataFrame, поиск':<40} {scan_us:>12.1f} мкс")
+
+    started = time.perf_counter()
+    index = ClientIndex.from_dataframe(df)
+    print(f"{'построение индекса':<40} {time.perf_counter() - started:>12.2f} с")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "client_database.npz")
+        started = time.perf_counter()
+        index.save(snapshot_path, 0, 0)
+        print(f"{'сохранение снимка':<40} {time.perf_counter() - started:>12.2f} с")
+        print(f"{'размер снимка':<40} {os.path.getsize(snapshot_path) / 2 ** 20:>12.1f} МБ")
+
+        started = time.perf_counter()
+        index = ClientIndex.load(snapshot_path, 0, 0)
+        print(f"{'загрузка снимка':<40} {time.perf_counter() - started:>12.2f} с")
+
+        if args.excel:
+            xlsx_path = os.path.join(tmp, "client_database.xlsx")
+            df.to_excel(xlsx_path, index=False)
+            service = ClientDataService(xlsx_path, snapshot_path, reload_check_seconds=5)
+            started = time.perf_counter()
+            service.warm_up()
+            print(f"{'чтение xlsx и построение снимка':<40} {time.perf_counter() - started:>12.2f} с")
+
+    print(f"{'индекс, поиск (найден)':<40} {_per_lookup_us(index.lookup, hits):>12.1f} мкс")
+    print(f"{'индекс, поиск (не найден)':<40} {_per_lookup_us(index.lookup, misses):>12.1f} мкс")
+
+    batch = np.concatenate([hits, misses])
+    started = time.perf_counter()
+    positions = index.lookup_many(batch.tolist())
+    batch_us = (time.perf_counter() - started) / len(batch) * 1e6
+    print(f"{'индекс, пакетный поиск':<40} {batch_us:>12.1f} мкс на ИНН")
+    assert (positions[: len(hits)] >= 0).all() and (positions[len(hits):] < 0).all()
+
+    sample = rng.integers(0, len(df), size=min(args.lookups, 200))
+    for i in sample:
+        expected = (df["Клиент"].iat[i], df["Отрасль_ОКК"].iat[i])
+        assert index.lookup(df["ИНН"].iat[i]) == expected, f"Расхождение для строки {i}"
+    print(f"Совпадение с исходными данными проверено на {len(sample)} строках.")
+
+
+if __name__ == "__main__":
+    main()
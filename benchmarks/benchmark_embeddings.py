@@ -0,0 +1,146 @@
+"""
+Бенчмарк бэкендов эмбеддингов на фиксированном корпусе чанков.
+
+Сообщает скорость (чанков/с) для каждого варианта модели и дрейф качества
+относительно текущей модели ("none"): средний косинус между векторами одного
+и того же чанка и совпадение top-k выдачи по набору поисковых запросов.
+
+Запуск из корня репозитория:
+    # один раз сохранить фиксированный корпус из векторного индекса
+    python -m benchmarks.benchmark_embeddings --export-corpus benchmarks/corpus.jsonl --limit 500
+    # сравнить варианты
+    python -m benchmarks.benchmark_embeddings --corpus benchmarks/corpus.jsonl \\
+        --variants none,int8,onnx --batch-sizes 16,32,64 --threads 1,4
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from src.config import settings
+from src.services.embedding_backend import create_embedding_backend, embedding_variant_dir_name
+
+DEFAULT_QUERIES = [
+    "выставки пищевая промышленность Китай октябрь 2025",
+    "конференции сельское хозяйство Индия 2025",
+    "деловые миссии машиностроение Турция весна 2025",
+    "выставки строительство ОАЭ ноябрь 2025",
+    "мероприятия по ВЭД медицина Казахстан 2025",
+    "food industry exhibition conference China 2025",
+    "календарь выставок Вьетнам 2025",
+    "семинары вебинары логистика Узбекистан 2025",
+]
+
+
+def export_corpus(path: str, limit: int) -> None:
+    db_path = os.path.join(
+        settings.VECTOR_INDEX_DIR, embedding_variant_dir_name(), "chunks.sqlite3"
+    )
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT text, source FROM chunks WHERE deleted = 0 ORDER BY row LIMIT ?", (limit,)
+    ).fetchall()
+    conn.close()
+    with open(path, "w", encoding="utf-8") as f:
+        for text, source in rows:
+            f.write(json.dumps({"text": text, "source": source}, ensure_ascii=False) + "\n")
+    print(f"Сохранено {len(rows)} чанков в {path}")
+
+
+def load_corpus(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["text"] for line in f if line.strip()]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def _top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> List[set]:
+    scores = query_vectors @ doc_vectors.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def run_variant(
+    corpus: List[str], queries: List[str], quantization: str, batch_size: int, threads: int
+) -> Dict:
+    backend = create_embedding_backend(
+        quantization=quantization, batch_size=batch_size, num_threads=threads
+    )
+    started = time.perf_counter()
+    backend.load()
+    load_seconds = time.perf_counter() - started
+    backend.embed_documents(corpus[: min(len(corpus), batch_size)])  # прогрев
+
+    started = time.perf_counter()
+    doc_vectors = np.asarray(backend.embed_documents(corpus), dtype=np.float32)
+    elapsed = time.perf_counter() - started
+    query_vectors = np.asarray(backend.embed_documents(queries), dtype=np.float32)
+    return {
+        "variant": backend.variant_name,
+        "batch_size": batch_size,
+        "threads": threads,
+        "load_s": round(load_seconds, 2),
+        "chunks_per_s": round(len(corpus) / elapsed, 1),
+        "docs": _normalize(doc_vectors),
+        "queries": _normalize(query_vectors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="JSONL с полем text (фиксированный корпус)")
+    parser.add_argument("--export-corpus", help="сохранить корпус из векторного индекса в JSONL")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--queries", help="файл с запросами, по одному в строке")
+    parser.add_argument("--variants", default="none,int8")
+    parser.add_argument("--batch-sizes", default=str(settings.EMBEDDING_BATCH_SIZE))
+    parser.add_argument("--threads", default=str(settings.EMBEDDING_NUM_THREADS))
+    parser.add_argument("--k", type=int, default=settings.VECTOR_SEARCH_K)
+    args = parser.parse_args()
+
+    if args.export_corpus:
+        export_corpus(args.export_corpus, args.limit)
+        return
+    if not args.corpus:
+        parser.error("нужен --corpus или --export-corpus")
+
+    corpus = load_corpus(args.corpus)[: args.limit]
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    k = min(args.k, len(corpus))
+    print(f"Корпус: {len(corpus)} чанков, запросов: {len(queries)}, k={k}")
+
+    reference = None
+    header = f"{'вариант':<70} {'батч':>5} {'потоки':>6} {'загрузка,с':>10} {'чанков/с':>9} {'косинус':>8} {'top-k':>6}"
+    print(header)
+    print("-" * len(header))
+    for quantization in args.variants.split(","):
+        for batch_size in map(int, args.batch_sizes.split(",")):
+            for threads in map(int, args.threads.split(",")):
+                result = run_variant(corpus, queries, quantization, batch_size, threads)
+                if reference is None:
+                    # Эталон — первый вариант (по умолчанию текущая модель без оптимизаций)
+                    reference = result
+                    reference_top = _top_k(result["docs"], result["queries"], k)
+                cosine = float(np.mean(np.sum(result["docs"] * reference["docs"], axis=1)))
+                top = _top_k(result["docs"], result["queries"], k)
+                overlap = float(
+                    np.mean([len(a & b) / k for a, b in zip(top, reference_top)])
+                )
+                print(
+                    f"{result['variant']:<70} {batch_size:>5} {threads:>6} "
+                    f"{result['load_s']:>10} {result['chunks_per_s']:>9} "
+                    f"{cosine:>8.4f} {overlap:>6.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Бенчмарк экстракторов текста из HTML на сохраненных страницах.
+
+Для каждого экстрактора сообщает время разбора (медиана и p95 на страницу,
+страниц/с) и совпадение извлеченного текста с прежним путем BeautifulSoup:
+долю слов эталона, найденных новым экстрактором (полнота), и долю слов
+нового текста, присутствующих в эталоне (точность). Отдельно — сколько
+таблиц и списков выделено в блоки.
+
+Запуск из корня репозитория:
+    # один раз сохранить страницы (статическая загрузка, без браузера)
+    python -m benchmarks.benchmark_html_extract --save-urls urls.txt --html-dir benchmarks/html
+    # или сгенерировать синтетические страницы календаря выставок
+    python -m benchmarks.benchmark_html_extract --make-synthetic 20 --html-dir benchmarks/html
+    # сравнить экстракторы
+    python -m benchmarks.benchmark_html_extract --html-dir benchmarks/html --repeat 5
+"""
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import os
+import random
+import re
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List
+
+from src.services.html_extractor import EXTRACTORS, SoupExtractor, create_html_extractor
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+async def save_pages(urls_path: str, html_dir: str) -> None:
+    from src.services.http_client import close_http_client
+    from src.services.static_fetcher import fetch_static_html
+
+    os.makedirs(html_dir, exist_ok=True)
+    with open(urls_path, "r", encoding="utf-8") as f:
+        urls = [line.strip() for line in f if line.strip()]
+    try:
+        for url in urls:
+            result = await fetch_static_html(url)
+            if not result:
+                print(f"Не удалось загрузить {url}")
+                continue
+            name = hashlib.blake2b(url.encode("utf-8"), digest_size=8).hexdigest()
+            with open(os.path.join(html_dir, f"{name}.html"), "w", encoding="utf-8") as f:
+                f.write(result[0])
+            print(f"Сохранено: {url} ({len(result[0]) // 1024} КБ)")
+    finally:
+        await close_http_client()
+
+
+_CITIES = ["Шанхай, Китай", "Ташкент, Узбекистан", "Дубай, ОАЭ", "Стамбул, Турция", "Алматы, Казахстан"]
+_TOPICS = ["пищевой промышленности", "логистике", "сельскому хозяйству", "упаковке", "медицине"]
+
+
+def make_calendar_page(seed: int, table_rows: int = 400, list_items: int = 200) -> str:
+    """
+    Синтетическая страница календаря выставок в разметке агрегатора: шапка,
+    меню, скрипты, стили, формы и подвал вокруг основного блока с вводным
+    текстом, таблицей мероприятий и списком конференций.
+    """
+    rng = random.Random(seed)
+    rows = "\n".join(
+        f"<tr><td>{rng.randint(1, 28)}.{rng.randint(1, 12):02d}.2025</td>"
+        f"<td><a href='/event/{seed}-{i}'>Выставка {i} {rng.choice(_TOPICS)}</a></td>"
+        f"<td>{rng.choice(_CITIES)}</td></tr>"
+        for i in range(table_rows)
+    )
+    items = "\n".join(
+        f"<li>Конференция {i} по {rng.choice(_TOPICS)}, {rng.choice(_CITIES)}</li>"
+        for i in range(list_items)
+    )
+    menu = "".join(f"<li><a href='/section/{i}'>Раздел {i}</a></li>" for i in range(30))
+    intro = " ".join(
+        f"Календарь {rng.choice(_TOPICS)} обновляется ежедневно, участие можно забронировать онлайн."
+        for _ in range(10)
+    )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Календарь выставок {seed}</title>
+<style>body {{ font-family: sans-serif; }} .menu li {{ display: inline; }}</style>
+<script>window.dataLayer = []; function track(e) {{ dataLayer.push(e); }}</script>
+</head><body>
+<header><div class="logo">Агрегатор выставок</div><nav><ul class="menu">{menu}</ul></nav></header>
+<noindex><div class="banner">Реклама: забронируйте стенд со скидкой</div></noindex>
+<div id="content">
+<h1>Выставки 2025 года</h1>
+<p>{intro}</p>
+<!-- таблица мероприятий -->
+<table class="events"><tr><th>Дата</th><th>Мероприятие</th><th>Место</th></tr>
+{rows}
+</table>
+<h2>Конференции</h2>
+<ul class="conferences">{items}</ul>
+<form action="/subscribe"><input name="email"><button>Подписаться</button></form>
+</div>
+<aside><ul>{menu}</ul></aside>
+<footer><p>© Агрегатор выставок</p><script>track("view");</script></footer>
+</body></html>
+"""
+
+
+def make_synthetic_pages(count: int, html_dir: str) -> None:
+    os.makedirs(html_dir, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(html_dir, f"synthetic_{i:03d}.html"), "w", encoding="utf-8") as f:
+            f.write(make_calendar_page(seed=i))
+    print(f"Сгенерировано страниц: {count} в {html_dir}")
+
+
+def load_pages(html_dir: str) -> Dict[str, str]:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(html_dir, "*.html"))):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def _words(text: str) -> Counter:
+    return Counter(_WORD_RE.findall(text.lower()))
+
+
+def _overlap(reference: Counter, candidate: Counter) -> float:
+    total = sum(reference.values())
+    return sum((reference & candidate).values()) / total if total else 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--html-dir", default="benchmarks/html")
+    parser.add_argument("--save-urls", help="файл со ссылками, по одной в строке: сохранить их HTML и выйти")
+    parser.add_argument("--make-synthetic", type=int, help="сгенерировать столько синтетических страниц и выйти")
+    parser.add_argument("--extractors", default=",".join(EXTRACTORS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.save_urls:
+        asyncio.run(save_pages(args.save_urls, args.html_dir))
+        return
+    if args.make_synthetic:
+        make_synthetic_pages(args.make_synthetic, args.html_dir)
+        return
+
+    pages = load_pages(args.html_dir)
+    if not pages:
+        print(f"В {args.html_dir} нет сохраненных страниц (*.html).")
+        return
+    total_kb = sum(len(html) for html in pages.values()) // 1024
+    print(f"Страниц: {len(pages)}, всего {total_kb} КБ HTML")
+
+    reference = {name: _words(SoupExtractor().extract(html)[0]) for name, html in pages.items()}
+
+    for name in args.extractors.split(","):
+        extractor = create_html_extractor(name)
+        timings: List[float] = []
+        recalls, precisions = [], []
+        blocks_total = 0
+        for page_name, html in pages.items():
+            page_timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                text, blocks = extractor.extract(html)
+                page_timings.append(time.perf_counter() - started)
+            timings.append(min(page_timings))
+            words = _words("\n".join([text, *blocks]))
+            recalls.append(_overlap(reference[page_name], words))
+            precisions.append(_overlap(words, reference[page_name]))
+            blocks_total += len(blocks)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(
+            f"{name:>5}: медиана {statistics.median(timings) * 1000:.1f} мс, "
+            f"p95 {p95 * 1000:.1f} мс, {len(timings) / sum(timings):.1f} стр/с; "
+            f"полнота {statistics.mean(recalls):.3f} (мин {min(recalls):.3f}), "
+            f"точность {statistics.mean(precisions):.3f}; блоков: {blocks_total}"
+        )
+
+
+if __name__ == "__main__":
+    main()
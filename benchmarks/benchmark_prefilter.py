@@ -0,0 +1,107 @@
+"""
+Бенчмарк предфильтра дат и стран на записанном корпусе чанков.
+
+Сообщает, сколько чанков отбрасывается и понижается, насколько сокращаются
+токены промпта (до и после упаковки в бюджет) и сколько стоит сам фильтр.
+С флагом --llm дополнительно запускает извлечение GigaChat на чанках
+без фильтра и с фильтром и сравнивает время (кэш извлечения в этом вызове
+не участвует: его проверяет сервис поиска).
+
+Корпус — JSONL с полями text, source и необязательным score, например
+выгрузка из benchmark_embeddings (--export-corpus). Запуск из корня репозитория:
+    python -m benchmarks.benchmark_prefilter --corpus benchmarks/corpus.jsonl \\
+        --country Китай --period "октябрь 2025" --industry "Пищевая промышленность"
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+from src.config import settings
+from src.nlu.token_budget import pack_by_budget
+from src.services.chunk_prefilter import prefilter_chunks
+
+
+def load_corpus(path: str, limit: int) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        docs = [json.loads(line) for line in f if line.strip()][:limit]
+    for i, doc in enumerate(docs):
+        # Без score сохраняем исходный порядок (как в выдаче векторного поиска)
+        doc.setdefault("score", 1.0 - i / max(len(docs), 1))
+    return docs
+
+
+def _packed_tokens(docs: List[Dict[str, Any]]) -> int:
+    return sum(d["tokens"] for d in pack_by_budget(docs, settings.GIGACHAT_PROMPT_TOKEN_BUDGET))
+
+
+async def _timed_extraction(docs: List[Dict[str, Any]], search_params: Dict[str, Any]) -> float:
+    from src.nlu.gigachat_client import gigachat_service
+
+    started = time.perf_counter()
+    result, _ = await gigachat_service.extract_and_categorize_events(docs, search_params)
+    elapsed = time.perf_counter() - started
+    print(
+        f"  найдено: perfect {len(result['perfect_matches'])}, "
+        f"near {len(result['near_date_matches'])}, other {len(result['other_mismatches'])}"
+    )
+    return elapsed
+
+
+async def _compare_extraction(
+    docs: List[Dict[str, Any]], filtered: List[Dict[str, Any]], search_params: Dict[str, Any]
+) -> Tuple[float, float]:
+    # Оба прогона в одном цикле событий: семафоры, лимитер и клиент GigaChat
+    # создаются на уровне модуля и привязываются к первому циклу
+    print("Извлечение без фильтра:")
+    base_s = await _timed_extraction(docs, search_params)
+    print("Извлечение с фильтром:")
+    filtered_s = await _timed_extraction(filtered, search_params)
+    return base_s, filtered_s
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", required=True)
+    parser.add_argument("--limit", type=int, default=settings.VECTOR_SEARCH_K)
+    parser.add_argument("--country", required=True)
+    parser.add_argument("--period", required=True)
+    parser.add_argument("--industry", default="")
+    parser.add_argument("--event-type", default="выставки")
+    parser.add_argument("--llm", action="store_true", help="замерить время извлечения GigaChat")
+    args = parser.parse_args()
+
+    search_params = {
+        "country": args.country,
+        "period": args.period,
+        "industry": args.industry,
+        "event_type": args.event_type,
+    }
+    docs = load_corpus(args.corpus, args.limit)
+
+    started = time.perf_counter()
+    filtered, stats = prefilter_chunks(docs, search_params)
+    filter_ms = (time.perf_counter() - started) * 1000
+
+    print(f"Корпус: {len(docs)} чанков, параметры: {search_params}")
+    print(f"Отброшено по дате: {stats['dropped_by_date']}, понижено по стране: {stats['downranked_by_country']}")
+    print(f"Время фильтра: {filter_ms:.1f} мс ({filter_ms / max(len(docs), 1):.2f} мс на чанк)")
+    print(
+        f"Токены всех чанков: {stats['tokens_in']} -> {stats['tokens_out']} "
+        f"(-{100 * (1 - stats['tokens_out'] / max(stats['tokens_in'], 1)):.0f}%)"
+    )
+    before, after = _packed_tokens(docs), _packed_tokens(filtered)
+    print(
+        f"Токены промпта в бюджете {settings.GIGACHAT_PROMPT_TOKEN_BUDGET}: {before} -> {after} "
+        f"(-{100 * (1 - after / max(before, 1)):.0f}%)"
+    )
+
+    if args.llm:
+        base_s, filtered_s = asyncio.run(_compare_extraction(docs, filtered, search_params))
+        print(f"Время извлечения: {base_s:.1f} с -> {filtered_s:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
+from src.services import startup_metrics
+
 import logging
 import asyncio
 import nest_asyncio
-import torch
+
+from src.config import settings, setup_logging
+
+# Настраиваем логирование ДО того, как что-либо логировать (в том числе этапы запуска)
+setup_logging()
+logger = logging.getLogger(__name__)
 
 from telegram import Update
 from telegram.ext import (
@@ -13,16 +20,20 @@ from telegram.ext import (
     filters,
 )
 
-from src.config import settings, setup_logging
+startup_metrics.mark("импорт telegram и настроек")
+
 from src.dialogue.dialogue_manager import DialogueManager
+from src.services.client_data_service import client_data_service
+from src.services.event_search_service import (
+    start_search_service,
+    stop_search_service,
+)
+from src.services.pre_crawler import pre_crawler
+
+startup_metrics.mark("импорт диалогов и сервисов")
 
 # --- Начальная настройка (выполняется один раз при импорте) ---
 nest_asyncio.apply()
-torch.set_num_threads(1)
-
-# Настраиваем логирование ДО того, как что-либо логировать
-setup_logging()
-logger = logging.getLogger(__name__)
 
 # Создаем менеджер диалогов
 dialogue_manager = DialogueManager()
@@ -30,12 +41,39 @@ dialogue_manager = DialogueManager()
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await dialogue_manager.start_dialogue(update, context)
+    startup_metrics.mark_first_reply()
 
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await dialogue_manager.handle_text_message(update, context)
+    startup_metrics.mark_first_reply()
 
 async def handle_buttons(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await dialogue_manager.handle_callback_query(update, context)
+    startup_metrics.mark_first_reply()
+
+async def on_startup(application: Application) -> None:
+    startup_metrics.mark("бот инициализирован")
+    # Тяжелые ресурсы прогреваются в фоне, бот уже принимает сообщения
+    # Ссылка на задачу хранится в bot_data, иначе ее может собрать сборщик мусора
+    warm_up_task = asyncio.get_running_loop().create_task(_warm_up_client_database())
+    warm_up_task.add_done_callback(_log_warm_up_failure)
+    application.bot_data["client_database_warm_up"] = warm_up_task
+    await start_search_service()
+    if settings.PRE_CRAWL_ENABLED:
+        # Агрегаторы обходятся заранее, после прогрева поиска
+        pre_crawler.start()
+
+async def _warm_up_client_database() -> None:
+    await asyncio.to_thread(client_data_service.warm_up)
+    startup_metrics.mark("база клиентов загружена")
+
+def _log_warm_up_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Не удалось загрузить базу клиентов в фоне.", exc_info=task.exception())
+
+async def on_shutdown(application: Application) -> None:
+    await pre_crawler.stop()
+    await stop_search_service()
 
 def main() -> None:
     """Основная функция для запуска бота."""
@@ -45,7 +83,13 @@ def main() -> None:
         logger.critical("Токен Telegram-бота не установлен! Зайдите в src/config.py и укажите TELEGRAM_BOT_TOKEN.")
         return  # Завершаем выполнение, если токена нет
 
-    application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(settings.TELEGRAM_BOT_TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     application.add_handler(CommandHandler("start", start))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text))
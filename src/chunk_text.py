@@ -0,0 +1,24 @@
+"""
+Общие помощники для текста чанков: их используют и сервисы (индексация,
+предфильтр, дедупликация), и слой NLU (бюджет промпта).
+"""
+
+import re
+
+# Оценка без обращения к API: токенизатор GigaChat в среднем дает около
+# 3 символов кириллического текста на токен, цифры и пунктуация — дороже
+_WORD_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+# Служебный префикс, с которым чанки хранятся в векторном индексе
+_SOURCE_PREFIX_RE = re.compile(r"^ИСТОЧНИК: [^\n]*\n\nТЕКСТ: ")
+
+
+def estimate_tokens(text: str) -> int:
+    """Приблизительное число токенов текста (с небольшим запасом)."""
+    if not text:
+        return 0
+    return sum(max(1, (len(token) + 2) // 3) for token in _WORD_RE.findall(text))
+
+
+def strip_source_prefix(text: str) -> str:
+    """Убирает из чанка префикс 'ИСТОЧНИК: ... ТЕКСТ:' — источник передается таблицей."""
+    return _SOURCE_PREFIX_RE.sub("", text, count=1)
@@ -24,6 +24,141 @@ class Settings:
     GIGACHAT_MAX_TOKENS_SUMMARIZE = 2100
     GIGACHAT_TEMPERATURE_NLU = 0.01
     GIGACHAT_MAX_TOKENS_NLU = 2100
+    # Извлечение мероприятий по батчам чанков: бюджет токенов фрагментов
+    # на один вызов; число одновременных вызовов по целям (extract/nlu)
+    GIGACHAT_EXTRACT_BATCH_TOKENS = 6000
+    GIGACHAT_EXTRACT_CONCURRENCY = 3
+    GIGACHAT_NLU_CONCURRENCY = 2
+    # Общий бюджет токенов фрагментов на один поиск: в промпт идут чанки
+    # с наибольшей релевантностью, пока бюджет не исчерпан
+    GIGACHAT_PROMPT_TOKEN_BUDGET = 16000
+    # Квота API: частота запросов (ведро токенов) и повторы при 429/5xx
+    GIGACHAT_REQUESTS_PER_MINUTE = 30
+    GIGACHAT_RATE_LIMIT_BURST = 5
+    GIGACHAT_MAX_RETRIES = 3
+    GIGACHAT_RETRY_BASE_DELAY_SECONDS = 1.0
+    GIGACHAT_RETRY_MAX_DELAY_SECONDS = 20.0
+
+    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+    CACHE_DIR = os.path.join(BASE_DIR, "cache")
+
+    # Пул браузеров Playwright: лимит одновременно открытых страниц
+    # и число выдач, после которого браузер перезапускается
+    BROWSER_HEADLESS = True
+    BROWSER_POOL_MAX_PAGES = 6
+    BROWSER_POOL_MAX_USES = 50
+    PLAYWRIGHT_USER_DATA_DIR = os.path.join(BASE_DIR, "playwright_session")
+
+    # Планировщик загрузок: общий лимит, лимит на домен
+    SCRAPE_MAX_CONCURRENCY = 6
+    SCRAPE_PER_DOMAIN_LIMIT = 2
+
+    # Кэш поисковой выдачи
+    SERP_CACHE_TTL_SECONDS = 6 * 60 * 60
+    SERP_CACHE_MAX_ENTRIES = 2000
+
+    # Модель эмбеддингов и дисковый кэш ее векторов.
+    # EMBEDDING_QUANTIZATION: "none", "int8" (динамическая квантизация torch)
+    # или "onnx" (нужен onnxruntime; EMBEDDING_ONNX_FILE_NAME — например, onnx/model_qint8_avx2.onnx)
+    EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
+    EMBEDDING_BATCH_SIZE = 32
+    EMBEDDING_NUM_THREADS = 1
+    EMBEDDING_QUANTIZATION = "none"
+    EMBEDDING_ONNX_FILE_NAME = None
+    EMBEDDING_CACHE_DIR = os.path.join(CACHE_DIR, "embeddings")
+    EMBEDDING_CACHE_DTYPE = "float16"
+
+    # Долгоживущий векторный индекс чанков
+    VECTOR_INDEX_DIR = os.path.join(CACHE_DIR, "vector_index")
+    VECTOR_INDEX_MAX_AGE_SECONDS = 14 * 24 * 60 * 60
+    VECTOR_SEARCH_K = 60
+
+    # Гибридный поиск чанков: кандидатов из плотного и из лексического (FTS5)
+    # поиска, вес новизны в MMR (1 - HYBRID_MMR_LAMBDA) и адаптивное число
+    # чанков: не меньше HYBRID_MIN_K, не больше VECTOR_SEARCH_K, дальше
+    # min_k — только с релевантностью от HYBRID_MIN_RELEVANCE
+    HYBRID_CANDIDATES = 200
+    HYBRID_MMR_LAMBDA = 0.7
+    HYBRID_MIN_K = 12
+    HYBRID_MIN_RELEVANCE = 0.45
+
+    # Отсев дублей чанков (MinHash): порог оценки сходства Жаккара по шинглам
+    # и размер реестра подписей проиндексированных чанков
+    CHUNK_DEDUP_MIN_SIMILARITY = 0.8
+    CHUNK_DEDUP_MAX_ENTRIES = 100000
+
+    # Общий дедлайн на поиск, загрузку и эмбеддинг страниц, после которого
+    # поиск фрагментов и LLM работают с уже собранными данными
+    SEARCH_COLLECT_DEADLINE_SECONDS = 90
+    # Как часто (не чаще) обновлять статусное сообщение с ходом поиска
+    SEARCH_PROGRESS_EDIT_INTERVAL_SECONDS = 3
+
+    # Общий HTTP-клиент
+    HTTP_TIMEOUT = 15
+    HTTP_MAX_CONNECTIONS = 20
+
+    # Статическая загрузка без браузера: если текста меньше порога,
+    # страница рендерится в Playwright, а решение запоминается для домена
+    STATIC_MIN_TEXT_LENGTH = 500
+    STATIC_FETCH_MAX_BYTES = 5 * 1024 * 1024
+    FETCH_STRATEGY_PATH = os.path.join(CACHE_DIR, "fetch_strategy.json")
+    FETCH_STRATEGY_TTL_SECONDS = 7 * 24 * 60 * 60
+    JS_REQUIRED_DOMAINS = []
+
+    # Извлечение текста из HTML: "lxml" (быстрый разбор, таблицы и списки
+    # отдельными блоками) или "soup" (BeautifulSoup); разбор идет в своем пуле потоков
+    HTML_EXTRACTOR = "lxml"
+    HTML_EXTRACT_WORKERS = 2
+
+    # Профиль загрузки в браузере: отбрасываемые типы ресурсов и трекеры
+    FETCH_BLOCKED_RESOURCE_TYPES = frozenset(
+        {"image", "media", "font", "stylesheet", "texttrack", "eventsource", "websocket", "manifest"}
+    )
+    FETCH_BLOCKED_DOMAINS = [
+        "mc.yandex.ru",
+        "an.yandex.ru",
+        "yabs.yandex.ru",
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "googlesyndication.com",
+        "top-fwz1.mail.ru",
+        "counter.yadro.ru",
+        "connect.facebook.net",
+        "top.mail.ru",
+        "adfox.ru",
+    ]
+
+    # Дисковый кэш извлеченного текста страниц
+    PAGE_CACHE_PATH = os.path.join(CACHE_DIR, "pages.sqlite3")
+    PAGE_CACHE_TTL_SECONDS = 24 * 60 * 60
+    PAGE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+    # Кэш результатов извлечения мероприятий LLM (ключ — критерии и отпечатки
+    # собранных страниц)
+    EXTRACTION_CACHE_PATH = os.path.join(CACHE_DIR, "extractions.sqlite3")
+    EXTRACTION_CACHE_TTL_SECONDS = 24 * 60 * 60
+    EXTRACTION_CACHE_MAX_ENTRIES = 500
+
+    # Локальная база извлеченных мероприятий: поиск отвечает из нее без
+    # обхода сайтов, если подходящих мероприятий не меньше порога и они свежие
+    EVENT_STORE_PATH = os.path.join(CACHE_DIR, "events.sqlite3")
+    EVENT_STORE_MIN_EVENTS = 3
+    EVENT_STORE_MAX_AGE_SECONDS = 3 * 24 * 60 * 60
+    # Сколько мероприятий из базы (полнотекстовый поиск) добавлять к контексту
+    # ответа на вопрос после поиска
+    EVENT_STORE_QUESTION_LIMIT = 5
+
+    # Фоновый обход сайтов-агрегаторов из GOLDEN_LIST_URLS и их пагинации
+    PRE_CRAWL_ENABLED = True
+    PRE_CRAWL_INTERVAL_SECONDS = 12 * 60 * 60
+    PRE_CRAWL_MAX_PAGES_PER_SITE = 20
+    PRE_CRAWL_DELAY_SECONDS = 5
+    PRE_CRAWL_STATE_PATH = os.path.join(CACHE_DIR, "pre_crawl.sqlite3")
+
+    # Снимок базы клиентов (колоночный .npz) и период проверки изменения Excel-файла
+    CLIENT_DATABASE_SNAPSHOT_PATH = os.path.join(CACHE_DIR, "client_database.npz")
+    CLIENT_DATABASE_RELOAD_CHECK_SECONDS = 5
 
     LOG_LEVEL = logging.DEBUG
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s"
@@ -1,10 +1,13 @@
 # --- НАЧАЛО ФИНАЛЬНОЙ ВЕРСИИ ФАЙЛА ---
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List, Tuple
 import re
+import time
 from datetime import datetime
-from telegram import Update
+from telegram import Bot, Message, Update
+from telegram.error import TelegramError
 from telegram.ext import ContextTypes
 from telegram.constants import ChatAction, ParseMode
 
@@ -16,10 +19,18 @@ from src.dialogue.keyboards import (
 )
 from src.services.client_data_service import client_data_service
 from src.services.event_search_service import find_and_summarize_events
+from src.services.scrape_scheduler import get_domain
+from src.services.event_merge import same_event
+from src.services.event_store import event_store
+from src.config import settings
 from src.nlu.gigachat_client import gigachat_service
 
 logger = logging.getLogger(__name__)
 
+# Лимит длины сообщения Telegram и разделитель мероприятий в сообщении
+_MESSAGE_LIMIT = 4096
+_EVENT_SEPARATOR = "\n\n---\n\n"
+
 
 # Упрощенный санитайзер для старого Markdown
 def _sanitize_markdown(text: str) -> str:
@@ -31,6 +42,112 @@ def _sanitize_markdown(text: str) -> str:
     return re.sub(escape_chars, r"\\\1", text)
 
 
+class _SearchProgress:
+    """
+    Обработчик прогресса поиска для одного чата: ход поиска показывается
+    в одном статусном сообщении (правки не чаще заданного интервала), а точные
+    совпадения отправляются сразу, как только их вернул очередной батч LLM.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        chat_id: int,
+        status_message: Message,
+        search_params: Dict[str, Any],
+        format_event: Callable[[Dict[str, Any]], str],
+    ):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.status_message = status_message
+        self.search_params = search_params
+        self.format_event = format_event
+        self.sent_events: List[Dict[str, Any]] = []
+        self._counters: Dict[str, Any] = {}
+        self._stage = "collect"
+        self._last_text = status_message.text or ""
+        self._last_edit = 0.0
+
+    def was_sent(self, event: Dict[str, Any]) -> bool:
+        return any(same_event(event, sent, self.search_params) for sent in self.sent_events)
+
+    def _render(self) -> str:
+        c = self._counters
+        if self._stage == "warm_up":
+            # Бот недавно перезапущен и модель еще прогревается в фоне
+            return (
+                "Поисковая модель еще загружается после перезапуска бота, "
+                "поиск начнется автоматически через несколько секунд..."
+            )
+        if self._stage == "collect":
+            return (
+                "Ищу мероприятия...\n"
+                f"Поисковых запросов: {c.get('queries_done', 0)} из {c.get('queries_total', 0)}\n"
+                f"Найдено ссылок: {c.get('links_found', 0)}, загружено страниц: {c.get('pages_processed', 0)}\n"
+                f"Фрагментов текста: {c.get('chunks_indexed', 0)}"
+            )
+        lines = [
+            f"Анализирую {c.get('chunks', 0)} фрагментов с {c.get('pages_processed', 0)} страниц..."
+        ]
+        if self.sent_events:
+            lines.append(f"Точных совпадений уже найдено: {len(self.sent_events)}")
+        return "\n".join(lines)
+
+    async def _update_status(self, force: bool = False) -> None:
+        text = self._render()
+        now = time.monotonic()
+        if text == self._last_text:
+            return
+        if not force and now - self._last_edit < settings.SEARCH_PROGRESS_EDIT_INTERVAL_SECONDS:
+            return
+        try:
+            await self.status_message.edit_text(text)
+            self._last_text, self._last_edit = text, now
+        except TelegramError as e:
+            logger.debug(f"Не удалось обновить статус поиска: {e}")
+
+    async def _send_new_matches(self, events: List[Dict[str, Any]]) -> None:
+        new_events = [e for e in events if not self.was_sent(e)]
+        if not new_events:
+            return
+        # Сообщения собираются по границам мероприятий, чтобы ни одно не
+        # обрезалось на лимите Telegram; мероприятие считается отправленным
+        # только после успешной отправки, иначе оно попадет в итоговую сводку
+        messages: List[Tuple[str, List[Dict[str, Any]]]] = []
+        text, batch = "✅ *Уже нашел точное совпадение, продолжаю поиск:*", []
+        for event in new_events:
+            part = self.format_event(event)[:_MESSAGE_LIMIT]
+            candidate = f"{text}{_EVENT_SEPARATOR}{part}"
+            if len(candidate) > _MESSAGE_LIMIT:
+                if batch:
+                    messages.append((text, batch))
+                text, batch = part, []
+            else:
+                text = candidate
+            batch.append(event)
+        messages.append((text, batch))
+
+        for text, batch in messages:
+            try:
+                await self.bot.send_message(chat_id=self.chat_id, text=text, parse_mode="Markdown")
+            except TelegramError as e:
+                logger.warning(f"Не удалось отправить найденные совпадения: {e}")
+                return
+            self.sent_events.extend(batch)
+
+    async def __call__(self, event: Dict[str, Any]) -> None:
+        stage = event.get("stage")
+        if stage == "events":
+            await self._send_new_matches(event.get("perfect_matches") or [])
+        else:
+            self._counters.update(event)
+        # Смену этапа показываем сразу, счетчики — не чаще интервала
+        force = stage != self._stage and stage != "events"
+        if stage != "events":
+            self._stage = stage
+        await self._update_status(force=force)
+
+
 class DialogueManager:
     def __init__(self):
         self.user_states: Dict[str, Dict[str, Any]] = {}
@@ -122,7 +239,8 @@ class DialogueManager:
                     chat_id, text="Минутку, сейчас проанализирую ваш вопрос..."
                 )
                 answer = await gigachat_service.get_contextual_answer(
-                    user_question=text, events_context=state["last_search_results"]
+                    user_question=text,
+                    events_context=await self._question_context(text, state),
                 )
                 await context.bot.send_message(chat_id, text=answer)
             else:
@@ -132,7 +250,11 @@ class DialogueManager:
 
         elif stage == "awaiting_inn":
             if re.fullmatch(r"\d{10,12}", text):
-                client_info = client_data_service.get_client_info_by_inn(text)
+                # В потоке: при первом обращении индекс может еще строиться
+                # (чтение Excel), цикл событий при этом не блокируется
+                client_info = await asyncio.to_thread(
+                    client_data_service.get_client_info_by_inn, text
+                )
                 if client_info:
                     state.update(
                         {
@@ -320,30 +442,69 @@ class DialogueManager:
                 f"🔍 _Примечание: {_sanitize_markdown(event.get('mismatch_reason'))}_"
             )
 
-        # Добавляем вывод источника
-        if show_full and event.get("source"):
-            parts.append(f"[Источник]({event.get('source')})")
+        # Добавляем вывод источника (после слияния их может быть несколько)
+        sources = event.get("sources") or [event.get("source")]
+        sources = [s for s in sources if s]
+        if show_full and len(sources) == 1:
+            parts.append(f"[Источник]({sources[0]})")
+        elif show_full and sources:
+            links = ", ".join(
+                f"[{_sanitize_markdown(get_domain(s))}]({s})" for s in sources[:5]
+            )
+            parts.append(f"Источники: {links}")
 
         return "\n".join(parts)
 
+    async def _question_context(self, question: str, state: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Мероприятия для ответа на вопрос: результаты последнего поиска и
+        найденные по тексту вопроса в базе мероприятий (например, выставка,
+        о которой спрашивают по названию, но которой нет в последней выдаче).
+        """
+        events = list(state["last_search_results"])
+        try:
+            stored = await asyncio.to_thread(
+                event_store.search_text, question, settings.EVENT_STORE_QUESTION_LIMIT
+            )
+        except Exception as e:
+            logger.warning(f"Ошибка полнотекстового поиска по базе мероприятий: {e}")
+            return events
+        for event in stored:
+            if not any(same_event(event, known, state) for known in events):
+                events.append(event)
+        return events
+
     async def _execute_search(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = str(update.effective_user.id)
         chat_id = update.effective_chat.id
         state = self._get_or_create_state(user_id)
         await self._send_typing_action(context, chat_id)
 
-        status_message = None
+        # Одно статусное сообщение с ходом поиска, точные совпадения — по мере нахождения
         if update.callback_query:
-            await update.callback_query.edit_message_text(
-                text="Анализирую результаты..."
-            )
+            await update.callback_query.edit_message_text(text="Ищу мероприятия...")
             status_message = update.callback_query.message
+        else:
+            status_message = await context.bot.send_message(
+                chat_id=chat_id, text="Ищу мероприятия..."
+            )
+        progress = _SearchProgress(
+            context.bot,
+            chat_id,
+            status_message,
+            dict(state),
+            lambda event: self._format_event_message(event, show_full=True),
+        )
 
-        search_results = await find_and_summarize_events(state)
+        search_results = await find_and_summarize_events(
+            state, job_id=user_id, progress=progress
+        )
         state["stage"] = "post_search"
 
-        if status_message:
+        try:
             await status_message.delete()
+        except TelegramError as e:
+            logger.debug(f"Не удалось удалить статус поиска: {e}")
 
         if search_results.get("error_message"):
             await context.bot.send_message(
@@ -355,6 +516,12 @@ class DialogueManager:
         near_date = search_results.get("near_date_matches", [])
         mismatched = search_results.get("other_mismatches", [])
         total_links = search_results.get("total_links_analyzed", 0)
+        if search_results.get("from_event_store"):
+            # Ответ собран из базы ранее найденных мероприятий, без обхода сайтов
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text="Нашел подходящие мероприятия в базе недавних поисков.",
+            )
 
         # --- ИЗМЕНЕНИЕ: Сохраняем найденные результаты в контекст ---
         shown_events = perfect + near_date
@@ -364,10 +531,21 @@ class DialogueManager:
         show_alternatives_keyboard = False
 
         if perfect:
-            message_parts.append(
-                f"✅ *Отлично! Я проанализировал {total_links} страниц и нашел точные совпадения:*"
-            )
-            for event in perfect:
+            # Часть совпадений уже отправлена по ходу поиска — повторяем только новые
+            remaining = [e for e in perfect if not progress.was_sent(e)]
+            if len(remaining) == len(perfect):
+                message_parts.append(
+                    f"✅ *Отлично! Я проанализировал {total_links} страниц и нашел точные совпадения:*"
+                )
+            elif remaining:
+                message_parts.append(
+                    f"✅ *Поиск завершен: проанализировано {total_links} страниц. Еще точные совпадения:*"
+                )
+            else:
+                message_parts.append(
+                    f"✅ *Поиск завершен: проанализировано {total_links} страниц.* Все точные совпадения — в сообщениях выше."
+                )
+            for event in remaining:
                 message_parts.append(self._format_event_message(event, show_full=True))
             if near_date:
                 message_parts.append(
@@ -1,21 +1,118 @@
 # --- НАЧАЛО ОБНОВЛЕННОГО ФАЙЛА ---
 
-from langchain_gigachat import GigaChat
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain.callbacks.base import BaseCallbackHandler
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.outputs import LLMResult
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 import asyncio
 import json
+import random
+import re
+
+import httpx
 
 from src.config import settings
+from src.chunk_text import estimate_tokens
+from src.nlu.token_budget import (
+    pack_by_budget,
+    render_fragments,
+    split_into_batches,
+)
+from src.nlu.rate_limiter import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+# Версия промпта извлечения: входит в ключ кэша извлечения, при изменении промпта ее нужно поднять
+EXTRACTION_PROMPT_VERSION = "2"
+
+# Категории результата в порядке приоритета: при дублях побеждает первая
+CATEGORY_KEYS = ("perfect_matches", "near_date_matches", "other_mismatches")
+
+
+def _event_identity(event: Dict[str, Any]) -> str:
+    name = str(event.get("name") or "").lower().replace("ё", "е")
+    return re.sub(r"[^\w]+", " ", name).strip()
+
+
+def _resolve_source_ids(result: Dict[str, List], source_ids: Dict[str, str]) -> Dict[str, List]:
+    """Заменяет номера источников вида [N] в ответе модели на ссылки."""
+    for category in CATEGORY_KEYS:
+        for event in result.get(category) or []:
+            if not isinstance(event, dict):
+                continue
+            source = str(event.get("source") or "").strip()
+            match = re.fullmatch(r"\[?(\d+)\]?", source)
+            if match:
+                event["source"] = source_ids.get(f"[{match.group(1)}]", "")
+    return result
+
+
+def merge_categorized_results(results: List[Dict[str, List]]) -> Dict[str, List]:
+    """
+    Объединяет ответы по батчам. Одно и то же мероприятие (по нормализованному
+    названию) остается один раз — в лучшей из категорий, в которые его отнесли;
+    пустые поля дополняются из других упоминаний.
+    """
+    best: Dict[str, Dict[str, Any]] = {}
+    rank: Dict[str, int] = {}
+    for result in results:
+        for category_rank, category in enumerate(CATEGORY_KEYS):
+            for event in result.get(category) or []:
+                if not isinstance(event, dict):
+                    continue
+                key = _event_identity(event)
+                if not key:
+                    continue
+                if key not in best:
+                    best[key], rank[key] = dict(event), category_rank
+                    continue
+                if category_rank < rank[key]:
+                    merged = dict(event)
+                    for field, value in best[key].items():
+                        if field != "mismatch_reason" and not merged.get(field):
+                            merged[field] = value
+                    best[key], rank[key] = merged, category_rank
+                else:
+                    for field, value in event.items():
+                        if not best[key].get(field):
+                            best[key][field] = value
+    merged_result: Dict[str, List] = {key: [] for key in CATEGORY_KEYS}
+    for key, event in best.items():
+        category = CATEGORY_KEYS[rank[key]]
+        if category == "perfect_matches":
+            event.pop("mismatch_reason", None)
+        merged_result[category].append(event)
+    return merged_result
+
+
+def _error_status(error: Exception) -> Optional[int]:
+    """HTTP-статус из ошибки SDK GigaChat (ResponseError(url, status, ...)) или httpx."""
+    status = getattr(error, "status_code", None)
+    if status is None and isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    if status is None and len(getattr(error, "args", ())) >= 2 and isinstance(error.args[1], int):
+        status = error.args[1]
+    return status
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Повторяем при 429, 5xx, таймаутах и сетевых сбоях."""
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    status = _error_status(error)
+    return status is not None and (status == 429 or status >= 500)
+
 
 class TokenUsageLogger(BaseCallbackHandler):
-    """Callback-класс для логирования использования токенов."""
+    """Callback-класс для логирования использования токенов.
+
+    Если передан словарь usage, токены вызова прибавляются к нему —
+    так считается расход на весь поиск из нескольких вызовов.
+    """
+
+    def __init__(self, usage: Optional[Dict[str, int]] = None):
+        self.usage = usage
 
     def on_llm_start(
         self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any
@@ -23,7 +120,7 @@ class TokenUsageLogger(BaseCallbackHandler):
         logger.info("... GigaChat LLM call starting ...")
 
     def on_llm_end(self, response: LLMResult, **kwargs: Any) -> Any:
-        token_usage = response.llm_output.get("token_usage", {})
+        token_usage = (response.llm_output or {}).get("token_usage", {})
         if token_usage:
             prompt_tokens = token_usage.get("prompt_tokens", "N/A")
             completion_tokens = token_usage.get("completion_tokens", "N/A")
@@ -32,6 +129,11 @@ class TokenUsageLogger(BaseCallbackHandler):
                 f"GigaChat LLM call finished. "
                 f"Tokens Used: [Prompt: {prompt_tokens}, Completion: {completion_tokens}, Total: {total_tokens}]"
             )
+            if self.usage is not None:
+                for key in ("prompt_tokens", "completion_tokens"):
+                    value = token_usage.get(key)
+                    if isinstance(value, int):
+                        self.usage[key] = self.usage.get(key, 0) + value
         else:
             logger.warning(
                 "GigaChat LLM call finished, but token usage info is not available."
@@ -39,10 +141,54 @@ class TokenUsageLogger(BaseCallbackHandler):
 
 
 class GigaChatService:
-    _clients: Dict[str, GigaChat] = {}
+    _clients: Dict[str, "GigaChat"] = {}
+
+    def __init__(self):
+        # Все вызовы идут через ainvoke: клиент на цель переиспользует свое
+        # HTTP-соединение, общий ограничитель держит частоту в пределах квоты,
+        # а семафоры не дают одной цели занять все потоки API
+        self._rate_limiter = TokenBucket(
+            rate=settings.GIGACHAT_REQUESTS_PER_MINUTE / 60,
+            capacity=settings.GIGACHAT_RATE_LIMIT_BURST,
+        )
+        self._semaphores = {
+            "extract": asyncio.Semaphore(settings.GIGACHAT_EXTRACT_CONCURRENCY),
+            "nlu": asyncio.Semaphore(settings.GIGACHAT_NLU_CONCURRENCY),
+        }
+
+    async def _ainvoke(
+        self, purpose: str, messages: List[Any], usage: Optional[Dict[str, int]] = None
+    ) -> Any:
+        """
+        Асинхронный вызов модели с лимитами цели, ограничением частоты и
+        повторами с экспоненциальной задержкой и случайным разбросом.
+        """
+        client = self._get_client(purpose)
+        async with self._semaphores[purpose]:
+            for attempt in range(settings.GIGACHAT_MAX_RETRIES + 1):
+                await self._rate_limiter.acquire()
+                try:
+                    return await client.ainvoke(
+                        messages, config={"callbacks": [TokenUsageLogger(usage)]}
+                    )
+                except Exception as e:
+                    if attempt == settings.GIGACHAT_MAX_RETRIES or not _is_retryable(e):
+                        raise
+                    delay = min(
+                        settings.GIGACHAT_RETRY_MAX_DELAY_SECONDS,
+                        settings.GIGACHAT_RETRY_BASE_DELAY_SECONDS * 2 ** attempt,
+                    ) * random.uniform(0.5, 1.5)
+                    logger.warning(
+                        f"GigaChat ({purpose}): ошибка {_error_status(e) or type(e).__name__}, "
+                        f"повтор {attempt + 1}/{settings.GIGACHAT_MAX_RETRIES} через {delay:.1f} с."
+                    )
+                    await asyncio.sleep(delay)
 
-    def _get_client(self, purpose: str) -> GigaChat:
+    def _get_client(self, purpose: str) -> "GigaChat":
         if purpose not in self._clients:
+            # Отложенный импорт: SDK GigaChat не нужен до первого обращения к LLM
+            from langchain_gigachat import GigaChat
+
             logger.info(f"Создание нового клиента GigaChat для цели: '{purpose}'")
             temp_map = {
                 "extract": settings.GIGACHAT_TEMPERATURE_SUMMARIZE,
@@ -73,20 +219,31 @@ class GigaChatService:
 
     # --- ИЗМЕНЕНИЕ: Добавлено более строгое правило для дат в промпт ---
     async def extract_and_categorize_events(
-        self, chunks: List[str], search_params: Dict[str, Any]
-    ) -> Dict[str, List]:
+        self,
+        chunks: List[Dict[str, Any]],
+        criteria: Dict[str, Any],
+        on_batch: Optional[Callable[[Dict[str, List]], Awaitable[None]]] = None,
+    ) -> Tuple[Dict[str, List], Dict[str, int]]:
+        """
+        chunks — найденные фрагменты с полями text, source и score. В промпт
+        попадают фрагменты с наибольшим score в пределах бюджета токенов.
+        criteria — только критерии поиска (без остального состояния диалога).
+        on_batch вызывается с результатом каждого успешного батча сразу по его
+        готовности. Возвращает результат и статистику батчей: неполный
+        результат (failed_batches > 0) вызывающему не стоит кэшировать.
+        """
 
-        empty_result = {
-            "perfect_matches": [],
-            "near_date_matches": [],
-            "other_mismatches": [],
-        }
+        empty_result = {key: [] for key in CATEGORY_KEYS}
 
+        chunks = pack_by_budget(chunks, settings.GIGACHAT_PROMPT_TOKEN_BUDGET)
         if not chunks:
-            return empty_result
+            return empty_result, {"batches": 0, "failed_batches": 0}
 
-        client = self._get_client("extract")
-        criteria_json = json.dumps(search_params, ensure_ascii=False, indent=2)
+        criteria_json = json.dumps(
+            {k: v for k, v in criteria.items() if v},
+            ensure_ascii=False,
+            indent=2,
+        )
         system_prompt = (
             "Ты — ведущий аналитик по бизнес-мероприятиям. Твоя задача — выполнить полный цикл анализа предоставленных текстов по заданным критериям и вернуть готовый результат в виде ОДНОГО JSON-объекта.\n\n"
             "**ТВОЙ АЛГОРИТМ ДЕЙСТВИЙ:**\n"
@@ -100,7 +257,7 @@ class GigaChatService:
             "-   Твой ответ должен быть **ТОЛЬКО ОДНИМ JSON-объектом** и больше ничего.\n"
             "-   JSON-объект должен содержать ровно три ключа: `perfect_matches`, `near_date_matches`, `other_mismatches`. Значения этих ключей — массивы JSON-объектов мероприятий.\n"
             "-   В ключ `description` включай только самую суть (1-2 предложения), не нужно копировать большие тексты.\n"
-            "-   Если в каком-то фрагменте текста есть ссылка на источник, ОБЯЗАТЕЛЬНО добавь ее в ключ `source`.\n\n"
+            "-   Ссылки на источники перечислены в таблице `ИСТОЧНИКИ`, а каждый фрагмент помечен номером своего источника, например `[2]`. ОБЯЗАТЕЛЬНО укажи этот номер в ключе `source`.\n\n"
             "**ПРИМЕР РАБОТЫ:**\n"
             "Если клиент ищет `{'industry': 'Пищевая промышленность', 'period': 'октябрь 2025'}` и ты нашел в тексте:\n"
             "-   'Indian Ice-cream Congress' на '6-8 октября 2025' (ты должен понять, что мороженое — это пищевая промышленность).\n"
@@ -115,7 +272,7 @@ class GigaChatService:
             '      "dates": "6-8 октября 2025",\n'
             '      "location": "Нью-Дели, Индия",\n'
             '      "description": "Конгресс и выставка для производителей мороженого.",\n'
-            '      "source": "https://example.com/ice_cream_expo"\n'
+            '      "source": "[1]"\n'
             "    }\n"
             "  ],\n"
             '  "near_date_matches": [\n'
@@ -125,7 +282,7 @@ class GigaChatService:
             '      "location": "Нью-Дели, Индия",\n'
             '      "description": "Крупнейшая выставка продуктов питания.",\n'
             '      "mismatch_reason": "Мероприятие в сентябре, а не в октябре",\n'
-            '      "source": "https://example.com/world_food"\n'
+            '      "source": "[2]"\n'
             "    }\n"
             "  ],\n"
             '  "other_mismatches": [\n'
@@ -135,14 +292,73 @@ class GigaChatService:
             '      "location": "Мумбаи, Индия",\n'
             '      "description": "Выставка агротехнологий.",\n'
             '      "mismatch_reason": "Отрасль: Сельское хозяйство, а не Пищевая промышленность",\n'
-            '      "source": "https://example.com/agrotech"\n'
+            '      "source": "[3]"\n'
             "    }\n"
             "  ]\n"
             "}\n"
             "```"
         )
 
-        combined_text = "\n\n--- ФРАГМЕНТ ТЕКСТА ---\n\n".join(chunks)
+        # Map: чанки делятся на батчи по бюджету токенов и обрабатываются
+        # параллельно; сбой одного батча теряет только его мероприятия
+        # (одновременность ограничена общим лимитом цели "extract")
+        batches = split_into_batches(chunks, settings.GIGACHAT_EXTRACT_BATCH_TOKENS)
+        usage: Dict[str, int] = {"prompt_tokens": 0, "completion_tokens": 0}
+
+        async def _run_batch(batch: List[Dict[str, Any]]) -> Optional[Dict[str, List]]:
+            result = await self._extract_batch(system_prompt, criteria_json, batch, usage)
+            if result is not None:
+                await self._notify_batch(on_batch, result)
+            return result
+
+        batch_results = await asyncio.gather(*[_run_batch(b) for b in batches])
+        estimated_prompt = sum(
+            estimate_tokens(system_prompt) + estimate_tokens(criteria_json) + sum(c["tokens"] for c in b)
+            for b in batches
+        )
+        logger.info(
+            f"Токены на поиск ({criteria_json.replace(chr(10), ' ')}): "
+            f"prompt {usage['prompt_tokens']} (оценка ~{estimated_prompt}), "
+            f"completion {usage['completion_tokens']}, вызовов {len(batches)}."
+        )
+        succeeded = [r for r in batch_results if r is not None]
+        logger.info(
+            f"Извлечение мероприятий: успешно {len(succeeded)} из {len(batches)} батчей "
+            f"({len(chunks)} чанков)."
+        )
+        batch_stats = {"batches": len(batches), "failed_batches": len(batches) - len(succeeded)}
+        if not succeeded:
+            return empty_result, batch_stats
+
+        # Reduce: объединение, дедупликация и итоговая категория
+        merged = merge_categorized_results(succeeded)
+        logger.info(
+            f"GigaChat успешно извлек и категоризировал мероприятия. Perfect: {len(merged['perfect_matches'])}, Near: {len(merged['near_date_matches'])}, Other: {len(merged['other_mismatches'])}"
+        )
+        return merged, batch_stats
+
+    @staticmethod
+    async def _notify_batch(
+        on_batch: Optional[Callable[[Dict[str, List]], Awaitable[None]]], result: Dict[str, List]
+    ) -> None:
+        # Обработчик только показывает промежуточный результат: его сбой не
+        # должен терять сам батч
+        if on_batch is None:
+            return
+        try:
+            await on_batch(result)
+        except Exception as e:
+            logger.warning(f"Ошибка обработчика результата батча: {e}", exc_info=True)
+
+    async def _extract_batch(
+        self,
+        system_prompt: str,
+        criteria_json: str,
+        chunks: List[Dict[str, Any]],
+        usage: Optional[Dict[str, int]] = None,
+    ) -> Optional[Dict[str, List]]:
+        """Извлекает мероприятия из одного батча чанков. None — батч не удался."""
+        combined_text, source_ids = render_fragments(chunks)
 
         human_prompt = (
             "Вот критерии поиска от клиента и фрагменты текста для анализа. Выполни задачу согласно твоему алгоритму.\n\n"
@@ -156,42 +372,44 @@ class GigaChatService:
         ]
 
         try:
-            token_logger = TokenUsageLogger()
-            response = await asyncio.to_thread(
-                client.invoke, messages, config={"callbacks": [token_logger]}
-            )
+            response = await self._ainvoke("extract", messages, usage)
             content = response.content.strip()
             clean_content = content.replace("```json", "").replace("```", "").strip()
 
             try:
                 parsed_json = json.loads(clean_content)
                 if isinstance(parsed_json, dict) and all(
-                    k in parsed_json for k in empty_result.keys()
+                    k in parsed_json for k in CATEGORY_KEYS
                 ):
-                    logger.info(
-                        f"GigaChat успешно извлек и категоризировал мероприятия. Perfect: {len(parsed_json.get('perfect_matches',[]))}, Near: {len(parsed_json.get('near_date_matches',[]))}, Other: {len(parsed_json.get('other_mismatches',[]))}"
-                    )
-                    return parsed_json
+                    return _resolve_source_ids(parsed_json, source_ids)
                 else:
                     logger.warning(
                         f"GigaChat вернул JSON, но его структура неверна: {clean_content}"
                     )
-                    return empty_result
+                    return None
             except json.JSONDecodeError as e:
                 logger.error(
                     f"Ошибка декодирования JSON от GigaChat: {e}\nОтвет был: {content}"
                 )
-                return empty_result
+                return None
         except Exception as e:
             logger.error(f"Критическая ошибка при вызове GigaChat: {e}", exc_info=True)
-            return empty_result
+            return None
 
     async def get_contextual_answer(
         self, user_question: str, events_context: List[Dict]
     ) -> str:
-        client = self._get_client("nlu")  # Используем те же настройки, что и для NLU
-
-        context_str = json.dumps(events_context, ensure_ascii=False, indent=2)
+        # Компактный контекст: без пустых полей и отступов, у слитых мероприятий
+        # ссылки только в списке sources
+        compact_events = [
+            {
+                field: value
+                for field, value in event.items()
+                if value and not (field == "source" and event.get("sources"))
+            }
+            for event in events_context
+        ]
+        context_str = json.dumps(compact_events, ensure_ascii=False, separators=(",", ":"))
 
         system_prompt = (
             "Ты — профессиональный консультант по международным бизнес-мероприятиям. Тебе предоставлен список мероприятий, которые были найдены для клиента, и его вопрос по этому списку.\n\n"
@@ -214,10 +432,7 @@ class GigaChatService:
         ]
 
         try:
-            token_logger = TokenUsageLogger()
-            response = await asyncio.to_thread(
-                client.invoke, messages, config={"callbacks": [token_logger]}
-            )
+            response = await self._ainvoke("nlu", messages)
             return response.content.strip()
         except Exception as e:
             logger.error(
@@ -230,7 +445,6 @@ class GigaChatService:
     async def detect_change_request(
         self, text: str, current_params: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
-        client = self._get_client("nlu")
         system_prompt = (
             "Твоя задача — проанализировать запрос пользователя и определить, хочет ли он изменить параметры поиска мероприятий. Текущие параметры поиска уже заданы.\n\n"
             "ПРАВИЛА:\n"
@@ -252,10 +466,7 @@ class GigaChatService:
             HumanMessage(content=human_prompt),
         ]
         try:
-            token_logger = TokenUsageLogger()
-            response = await asyncio.to_thread(
-                client.invoke, messages, config={"callbacks": [token_logger]}
-            )
+            response = await self._ainvoke("nlu", messages)
             content = response.content.strip().lower()
             if "country" in content or "event_type" in content:
                 try:
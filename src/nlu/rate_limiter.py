@@ -0,0 +1,42 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Асинхронный ограничитель частоты «ведро токенов»: ведро емкостью capacity
+    пополняется со скоростью rate токенов в секунду, каждый запрос забирает
+    cost токенов и ждет, пока их не станет достаточно. Ожидающие обслуживаются
+    по очереди, поэтому всплеск запросов растягивается во времени, а не отбрасывается.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, cost: float = 1.0) -> float:
+        """Забирает cost токенов; возвращает время ожидания в секундах."""
+        cost = min(cost, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self._tokens < cost:
+                delay = (cost - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self._tokens -= cost
+        if waited > 1:
+            logger.debug(f"Ограничитель частоты: запрос ждал {waited:.1f} с.")
+        return waited
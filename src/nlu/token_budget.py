@@ -0,0 +1,68 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+from src.chunk_text import estimate_tokens, strip_source_prefix
+
+logger = logging.getLogger(__name__)
+
+
+def pack_by_budget(docs: List[Dict[str, Any]], max_tokens: int) -> List[Dict[str, Any]]:
+    """
+    Отбирает чанки с наибольшим score, пока их суммарный объем не превысит
+    max_tokens. Чанк, который не помещается, пропускается, но более короткие
+    после него еще могут войти. Возвращает чанки без префикса источника
+    с полем tokens, в порядке убывания score.
+    """
+    packed: List[Dict[str, Any]] = []
+    used = 0
+    for doc in sorted(docs, key=lambda d: d.get("score", 0.0), reverse=True):
+        text = strip_source_prefix(doc["text"])
+        tokens = estimate_tokens(text)
+        if used + tokens > max_tokens:
+            continue
+        packed.append({**doc, "text": text, "tokens": tokens})
+        used += tokens
+    logger.info(
+        f"Бюджет промпта: отобрано {len(packed)} из {len(docs)} чанков, "
+        f"~{used} из {max_tokens} токенов."
+    )
+    return packed
+
+
+def split_into_batches(chunks: List[Dict[str, Any]], max_tokens: int) -> List[List[Dict[str, Any]]]:
+    """
+    Делит чанки на последовательные батчи, каждый не больше max_tokens
+    (чанк больше лимита идет отдельным батчем). Порядок чанков сохраняется.
+    """
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = 0
+    for chunk in chunks:
+        tokens = chunk.get("tokens") or estimate_tokens(chunk["text"])
+        if current and current_tokens + tokens > max_tokens:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(chunk)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def render_fragments(chunks: List[Dict[str, Any]]) -> Tuple[str, Dict[str, str]]:
+    """
+    Собирает текст фрагментов для промпта: ссылки вынесены в таблицу
+    источников, а каждый фрагмент помечен коротким номером [N].
+    Возвращает (текст, соответствие номера ссылке).
+    """
+    source_ids: Dict[str, str] = {}
+    for chunk in chunks:
+        source_ids.setdefault(chunk["source"], f"[{len(source_ids) + 1}]")
+    table = "\n".join(f"{sid} {source}" for source, sid in source_ids.items())
+    fragments = "\n\n".join(
+        f"--- ФРАГМЕНТ {source_ids[chunk['source']]} ---\n{chunk['text']}" for chunk in chunks
+    )
+    return (
+        f"ИСТОЧНИКИ:\n{table}\n\n{fragments}",
+        {sid: source for source, sid in source_ids.items()},
+    )
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Union
+
+from playwright.async_api import (
+    async_playwright,
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    Error as PlaywrightError,
+)
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = settings.USER_AGENT
+BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-blink-features=AutomationControlled",
+]
+
+# Цель запуска: обычный браузер (для скрапинга) или persistent-контекст (для Яндекса)
+LaunchTarget = Union[Browser, BrowserContext]
+
+
+class _RecyclingTarget:
+    """
+    Один запущенный экземпляр Chromium, который перезапускается после
+    max_uses выдач или после падения. Старый экземпляр закрывается только
+    тогда, когда его перестают использовать все активные страницы.
+
+    exclusive=True — два экземпляра не могут работать одновременно (persistent-
+    контекст: Chromium блокирует каталог профиля). Тогда новый экземпляр
+    запускается только после закрытия старого, а новые выдачи ждут перезапуска.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        launcher: Callable[[Playwright], Awaitable[LaunchTarget]],
+        max_uses: int,
+        exclusive: bool = False,
+    ):
+        self.name = name
+        self._launcher = launcher
+        self._max_uses = max_uses
+        self._exclusive = exclusive
+        self._current: Optional[LaunchTarget] = None
+        self._uses = 0
+        self._crashed = False
+        self._draining = False
+        self._leases: Dict[int, int] = {}
+        self._retired: Dict[int, LaunchTarget] = {}
+        self._lock = asyncio.Lock()
+        # Условие на той же блокировке: ожидание закрытия старого экземпляра
+        self._changed = asyncio.Condition(self._lock)
+
+    def _is_alive(self, target: LaunchTarget) -> bool:
+        if isinstance(target, Browser):
+            return target.is_connected()
+        browser = target.browser
+        return browser is None or browser.is_connected()
+
+    def mark_crashed(self, target: LaunchTarget) -> None:
+        if target is self._current:
+            self._crashed = True
+
+    async def acquire(self, playwright: Playwright) -> LaunchTarget:
+        async with self._lock:
+            await self._changed.wait_for(lambda: not self._draining)
+            current = self._current
+            if (
+                current is None
+                or self._crashed
+                or self._uses >= self._max_uses
+                or not self._is_alive(current)
+            ):
+                if current is not None:
+                    logger.info(
+                        f"Пул браузеров: перезапуск '{self.name}' "
+                        f"(использований: {self._uses}, сбой: {self._crashed})."
+                    )
+                    await self._retire(current)
+                    if self._exclusive:
+                        key = id(current)
+                        self._draining = True
+                        try:
+                            await self._changed.wait_for(lambda: key not in self._retired)
+                        finally:
+                            self._draining = False
+                            self._changed.notify_all()
+                current = await self._launcher(playwright)
+                if isinstance(current, Browser):
+                    current.on("disconnected", lambda _: self.mark_crashed(current))
+                else:
+                    current.on("close", lambda _: self.mark_crashed(current))
+                self._current = current
+                self._uses = 0
+                self._crashed = False
+            self._uses += 1
+            self._leases[id(current)] = self._leases.get(id(current), 0) + 1
+            return current
+
+    async def release(self, target: LaunchTarget, crashed: bool = False) -> None:
+        async with self._lock:
+            key = id(target)
+            self._leases[key] = self._leases.get(key, 1) - 1
+            if crashed or not self._is_alive(target):
+                self.mark_crashed(target)
+            if key in self._retired and self._leases[key] <= 0:
+                await self._close(self._retired.pop(key))
+                self._leases.pop(key, None)
+                self._changed.notify_all()
+
+    async def _retire(self, target: LaunchTarget) -> None:
+        # Вызывается под self._lock
+        key = id(target)
+        self._current = None
+        if self._leases.get(key, 0) <= 0:
+            self._leases.pop(key, None)
+            await self._close(target)
+        else:
+            self._retired[key] = target
+
+    async def _close(self, target: LaunchTarget) -> None:
+        try:
+            await target.close()
+        except Exception as e:
+            logger.debug(f"Пул браузеров: ошибка при закрытии '{self.name}': {e}")
+
+    async def close(self) -> None:
+        async with self._lock:
+            targets = list(self._retired.values())
+            if self._current is not None:
+                targets.append(self._current)
+            self._current = None
+            self._retired.clear()
+            self._leases.clear()
+            for target in targets:
+                await self._close(target)
+            self._changed.notify_all()
+
+
+class BrowserPool:
+    """
+    Общий пул Playwright, который запускается один раз вместе с ботом.
+
+    - page(): страница в новом изолированном контексте общего браузера (скрапинг);
+    - search_page(): страница в persistent-контексте с сохраненной сессией (Яндекс).
+
+    Общее число одновременно открытых страниц ограничено max_pages.
+    """
+
+    def __init__(
+        self,
+        max_pages: int,
+        max_uses: int,
+        headless: bool,
+        user_data_dir: str,
+    ):
+        self._headless = headless
+        self._user_data_dir = user_data_dir
+        self._playwright: Optional[Playwright] = None
+        self._start_lock = asyncio.Lock()
+        self._pages_semaphore = asyncio.Semaphore(max_pages)
+        self._scrape_browser = _RecyclingTarget(
+            "scrape", self._launch_browser, max_uses
+        )
+        # Persistent-контекст держит блокировку каталога профиля: второй
+        # запуск на том же user_data_dir не пройдет, пока старый не закрыт
+        self._search_context = _RecyclingTarget(
+            "search", self._launch_search_context, max_uses, exclusive=True
+        )
+
+    async def _launch_browser(self, playwright: Playwright) -> Browser:
+        logger.info("Пул браузеров: запуск Chromium для скрапинга.")
+        return await playwright.chromium.launch(
+            headless=self._headless, args=BROWSER_ARGS
+        )
+
+    async def _launch_search_context(self, playwright: Playwright) -> BrowserContext:
+        logger.info("Пул браузеров: запуск persistent-контекста для поиска.")
+        return await playwright.chromium.launch_persistent_context(
+            self._user_data_dir,
+            headless=self._headless,
+            user_agent=USER_AGENT,
+            viewport={"width": 1920, "height": 1080},
+            locale="ru-RU",
+            args=BROWSER_ARGS,
+        )
+
+    async def start(self) -> None:
+        async with self._start_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+                logger.info("Пул браузеров запущен.")
+
+    async def stop(self) -> None:
+        async with self._start_lock:
+            if self._playwright is None:
+                return
+            await self._search_context.close()
+            await self._scrape_browser.close()
+            await self._playwright.stop()
+            self._playwright = None
+            logger.info("Пул браузеров остановлен.")
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Выдает страницу в отдельном контексте общего браузера."""
+        await self.start()
+        async with self._pages_semaphore:
+            browser = await self._scrape_browser.acquire(self._playwright)
+            crashed = False
+            context = None
+            try:
+                context = await browser.new_context(user_agent=USER_AGENT)
+                page = await context.new_page()
+                page.on("crash", lambda _: self._scrape_browser.mark_crashed(browser))
+                yield page
+            except PlaywrightError:
+                crashed = not browser.is_connected()
+                raise
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        crashed = True
+                await self._scrape_browser.release(browser, crashed=crashed)
+
+    @asynccontextmanager
+    async def search_page(self) -> AsyncIterator[Page]:
+        """Выдает страницу в persistent-контексте поиска (общие cookies Яндекса)."""
+        await self.start()
+        async with self._pages_semaphore:
+            context = await self._search_context.acquire(self._playwright)
+            crashed = False
+            page = None
+            try:
+                page = await context.new_page()
+                page.on("crash", lambda _: self._search_context.mark_crashed(context))
+                yield page
+            except PlaywrightError:
+                crashed = not self._search_context._is_alive(context)
+                raise
+            finally:
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        crashed = True
+                await self._search_context.release(context, crashed=crashed)
+
+
+browser_pool = BrowserPool(
+    max_pages=settings.BROWSER_POOL_MAX_PAGES,
+    max_uses=settings.BROWSER_POOL_MAX_USES,
+    headless=settings.BROWSER_HEADLESS,
+    user_data_dir=settings.PLAYWRIGHT_USER_DATA_DIR,
+)
@@ -0,0 +1,227 @@
+"""
+Удаление дублей чанков: точных (хэш нормализованного текста) и почти
+точных (MinHash по шинглам из трех слов, оценка сходства Жаккара ≥ порога).
+
+Агрегаторы перепечатывают описания друг у друга, поэтому один и тот же
+текст о выставке приходит с разных сайтов. Дубль чужого источника не
+эмбеддится и не попадает в индекс; из нескольких копий остается копия
+с лучшего источника (сайт организатора важнее агрегатора).
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.chunk_text import strip_source_prefix
+from src.config import settings, GOLDEN_LIST_URLS
+from src.services.scrape_scheduler import get_domain
+from src.services.vector_index import chunk_hash
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Подпись из 64 минимумов делится на 16 полос по 4 значения (LSH): тексты
+# со сходством 0.8 становятся кандидатами с вероятностью > 0.999, а
+# несвязанные тексты (и соседние чанки с перекрытием 250 символов) — почти никогда
+_NUM_PERM = 64
+_BANDS = 16
+_ROWS = _NUM_PERM // _BANDS
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, 2**63, size=_NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, size=_NUM_PERM, dtype=np.uint64)
+
+_AGGREGATOR_DOMAINS = {get_domain(url) for url in GOLDEN_LIST_URLS}
+
+
+def source_rank(url: str) -> int:
+    """Приоритет источника: страницы агрегаторов ниже остальных (сайтов организаторов)."""
+    return 0 if get_domain(url) in _AGGREGATOR_DOMAINS else 1
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(strip_source_prefix(text).lower().replace("ё", "е"))
+
+
+def exact_hash(words: List[str]) -> str:
+    return hashlib.blake2b(" ".join(words).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def minhash(words: List[str], shingle_size: int = 3) -> np.ndarray:
+    """MinHash-подпись (64 x uint32) множества шинглов из shingle_size слов."""
+    if len(words) < shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i : i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in shingles
+        ),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # Умножение по модулю 2^64 с взятием старших 32 бит — семейство хэшей
+    # multiply-shift; переполнение uint64 здесь ожидаемо
+    with np.errstate(over="ignore"):
+        permuted = (hashes[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Оценка сходства Жаккара по двум подписям."""
+    return float(np.count_nonzero(a == b)) / _NUM_PERM
+
+
+def _bands(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+    return [(band, signature[band * _ROWS : (band + 1) * _ROWS].tobytes()) for band in range(_BANDS)]
+
+
+class ChunkDeduplicator:
+    """
+    Реестр отпечатков проиндексированных чанков для отсева дублей перед
+    эмбеддингом. Запись ссылается на хранимую копию чанка; если ее уже нет
+    в индексе (вытеснена или источник переобойден), запись не считается.
+    Число записей ограничено max_entries, старые вытесняются первыми.
+
+    Реестр живет только в памяти и после перезапуска пуст: чанки, проиндексированные
+    в прошлых запусках, не считаются, пока их источник не будет переобойден.
+    Поэтому сразу после старта перепечатки старых страниц один раз проходят
+    в индекс как новые; повторно они уже отсеиваются.
+
+    filter_page вызывается из рабочих потоков (asyncio.to_thread): подписи
+    считаются параллельно, операции с реестром идут под блокировкой.
+    """
+
+    def __init__(self, min_similarity: float, max_entries: int):
+        self._min_similarity = min_similarity
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        # exact_hash -> (подпись, источник, ключ хранимого чанка)
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, str, str]]" = OrderedDict()
+        self._bands: Dict[Tuple[int, bytes], Set[str]] = {}
+        self.checked = 0
+        self.duplicates = 0
+
+    def _find(self, exact: str, signature: np.ndarray) -> Optional[str]:
+        if exact in self._entries:
+            return exact
+        candidates: Set[str] = set()
+        for band in _bands(signature):
+            candidates |= self._bands.get(band, set())
+        best = max(
+            candidates,
+            key=lambda h: similarity(self._entries[h][0], signature),
+            default=None,
+        )
+        if best is not None and similarity(self._entries[best][0], signature) >= self._min_similarity:
+            return best
+        return None
+
+    def _remove(self, exact: str) -> None:
+        signature, _, _ = self._entries.pop(exact)
+        for band in _bands(signature):
+            members = self._bands.get(band)
+            if members is not None:
+                members.discard(exact)
+                if not members:
+                    del self._bands[band]
+
+    def _register(self, exact: str, signature: np.ndarray, source: str, key: str) -> None:
+        if exact in self._entries:
+            self._remove(exact)
+        self._entries[exact] = (signature, source, key)
+        for band in _bands(signature):
+            self._bands.setdefault(band, set()).add(exact)
+        while len(self._entries) > self._max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def filter_page(
+        self, source: str, texts: List[str], is_indexed: Callable[[str], bool]
+    ) -> List[str]:
+        """
+        Возвращает чанки страницы без дублей уже проиндексированных чанков
+        других источников. Копия с более приоритетного источника не
+        отбрасывается, а занимает место в реестре. Чанки того же источника
+        всегда проходят: иначе индекс удалил бы их как исчезнувшие со страницы.
+        """
+        kept: List[str] = []
+        rank = source_rank(source)
+        fingerprints = []
+        for text in texts:
+            words = _words(text)
+            fingerprints.append((exact_hash(words), minhash(words)) if words else None)
+        with self._lock:
+            for text, fingerprint in zip(texts, fingerprints):
+                if fingerprint is None:
+                    kept.append(text)
+                    continue
+                exact, signature = fingerprint
+                self.checked += 1
+                match = self._find(exact, signature)
+                if match is not None:
+                    _, match_source, match_key = self._entries[match]
+                    if (
+                        match_source != source
+                        and source_rank(match_source) >= rank
+                        and is_indexed(match_key)
+                    ):
+                        self.duplicates += 1
+                        self._entries.move_to_end(match)
+                        continue
+                    self._remove(match)
+                self._register(exact, signature, source, chunk_hash(source, text))
+                kept.append(text)
+        return kept
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "checked": self.checked,
+            "duplicates": self.duplicates,
+            "ratio": round(self.duplicates / self.checked, 3) if self.checked else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+def dedup_docs(
+    docs: List[Dict[str, Any]], min_similarity: float = settings.CHUNK_DEDUP_MIN_SIMILARITY
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Схлопывает точные и почти точные дубли среди найденных чанков перед LLM.
+    Из группы дублей остается копия с лучшего источника (при равенстве — с
+    большим score), ей достается максимальный score группы.
+    Возвращает (чанки по убыванию score, статистика).
+    """
+    ordered = sorted(
+        docs, key=lambda d: (source_rank(d["source"]), d.get("score", 0.0)), reverse=True
+    )
+    kept: List[Dict[str, Any]] = []
+    kept_keys: List[Tuple[str, np.ndarray]] = []
+    for doc in ordered:
+        words = _words(doc["text"])
+        exact, signature = exact_hash(words), minhash(words)
+        for i, (kept_exact, kept_signature) in enumerate(kept_keys):
+            if exact == kept_exact or similarity(signature, kept_signature) >= min_similarity:
+                kept[i]["score"] = max(kept[i].get("score", 0.0), doc.get("score", 0.0))
+                break
+        else:
+            kept.append(dict(doc))
+            kept_keys.append((exact, signature))
+    kept.sort(key=lambda d: d.get("score", 0.0), reverse=True)
+    duplicates = len(docs) - len(kept)
+    return kept, {
+        "chunks_in": len(docs),
+        "duplicates": duplicates,
+        "ratio": round(duplicates / len(docs), 3) if docs else 0.0,
+    }
+
+
+chunk_deduplicator = ChunkDeduplicator(
+    min_similarity=settings.CHUNK_DEDUP_MIN_SIMILARITY,
+    max_entries=settings.CHUNK_DEDUP_MAX_ENTRIES,
+)
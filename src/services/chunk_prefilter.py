@@ -0,0 +1,81 @@
+"""
+Детерминированный предфильтр чанков перед LLM: даты и страны.
+
+В каждом чанке находятся упоминания дат и стран. Чанк, все даты которого
+лежат вне окна "период поиска ±3 месяца", отбрасывается; чанк, где упомянуты
+только другие страны, опускается в ранжировании. Чанки без дат и стран
+остаются как есть — о них ничего нельзя сказать без LLM. Отбрасывают чанк
+только даты мероприятий с днем или месяцем; даты публикации страницы и
+одиночные годы ("проводится с 2001 года") не отбрасывают, а год из окна
+("Foodexpo 2025") оставляет чанк.
+"""
+
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.chunk_text import estimate_tokens, strip_source_prefix
+from src.services.countries import find_countries
+from src.services.date_ranges import find_date_ranges, find_years, ranges_overlap, shift_months
+from src.services.event_store import period_range
+
+logger = logging.getLogger(__name__)
+
+def _date_status(text: str, window: Tuple[date, date], default_year: int) -> str:
+    ranges = find_date_ranges(text, default_year=default_year)
+    if any(ranges_overlap(r, window) for r in ranges):
+        return "in"
+    # Год из окна без месяца ("Foodexpo в Шанхае 2025") тоже говорит в пользу чанка
+    if any(ranges_overlap(r, window) for r in find_years(text)):
+        return "in"
+    return "out" if ranges else "unknown"
+
+
+def _country_status(text: str, requested: Set[str]) -> str:
+    mentioned = find_countries(text)
+    if not mentioned:
+        return "unknown"
+    return "match" if mentioned & requested else "other"
+
+
+def prefilter_chunks(
+    docs: List[Dict[str, Any]],
+    search_params: Dict[str, Any],
+    near_months: int = 3,
+    country_penalty: float = 0.5,
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Отбрасывает чанки с датами только вне окна периода ±near_months и
+    умножает score чанков с упоминанием лишь других стран на country_penalty.
+    Возвращает (чанки по убыванию score, статистика).
+    """
+    period = period_range(search_params)
+    window: Optional[Tuple[date, date]] = None
+    if period:
+        window = (shift_months(period[0], -near_months), shift_months(period[1], near_months))
+    requested = find_countries(search_params.get("country") or "")
+    stats = {
+        "chunks_in": len(docs),
+        "dropped_by_date": 0,
+        "downranked_by_country": 0,
+        "tokens_in": 0,
+        "tokens_out": 0,
+    }
+
+    kept: List[Dict[str, Any]] = []
+    for doc in docs:
+        text = strip_source_prefix(doc["text"])
+        tokens = estimate_tokens(text)
+        stats["tokens_in"] += tokens
+        if window and _date_status(text, window, period[0].year) == "out":
+            stats["dropped_by_date"] += 1
+            continue
+        doc = dict(doc)
+        if requested and _country_status(text, requested) == "other":
+            doc["score"] = doc.get("score", 0.0) * country_penalty
+            stats["downranked_by_country"] += 1
+        stats["tokens_out"] += tokens
+        kept.append(doc)
+    kept.sort(key=lambda d: d.get("score", 0.0), reverse=True)
+    stats["chunks_out"] = len(kept)
+    return kept, stats
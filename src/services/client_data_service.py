@@ -1,49 +1,240 @@
-import pandas as pd
 import logging
 import os
-from typing import Dict, Optional
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
 
 from src.config import settings
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
+REQUIRED_COLUMNS = ['ИНН', 'Клиент', 'Отрасль_ОКК']
+# Версия формата снимка: меняется вместе с правилами нормализации ИНН
+SNAPSHOT_VERSION = 1
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_FLOAT_SUFFIX_RE = re.compile(r"\.0+$")
+
+
+def normalize_inn(value) -> str:
+    """
+    Приводит ИНН к каноническому виду: без пробелов, без хвоста '.0'
+    (ИНН, сохраненный в Excel как число) и с восстановленным ведущим нулем,
+    потерянным при числовом формате ячейки (9 -> 10 и 11 -> 12 цифр).
+    """
+    inn = _FLOAT_SUFFIX_RE.sub("", _WHITESPACE_RE.sub("", str(value)))
+    if len(inn) in (9, 11) and inn.isdigit():
+        inn = "0" + inn
+    return inn
+
+
+def _normalize_inn_column(column: "pd.Series") -> "pd.Series":
+    """Векторная версия normalize_inn для колонки DataFrame."""
+    inns = (
+        column.fillna("").astype(str)
+        .str.replace(_WHITESPACE_RE, "", regex=True)
+        .str.replace(_FLOAT_SUFFIX_RE, "", regex=True)
+    )
+    lengths = inns.str.len()
+    digits = inns.str.isdigit()
+    inns = inns.mask(digits & (lengths == 9), inns.str.zfill(10))
+    return inns.mask(digits & (lengths == 11), inns.str.zfill(12))
+
+
+class ClientIndex:
+    """
+    Компактный индекс клиентов: отсортированный массив ИНН и параллельные
+    массивы названий и отраслей. ИНН нормализуются один раз при построении,
+    поиск — бинарный (np.searchsorted), в том числе сразу по массиву ИНН.
+    При дублях ИНН возвращается первая запись из исходного файла.
+    """
+
+    def __init__(self, inns: np.ndarray, names: np.ndarray, industries: np.ndarray):
+        self.inns = inns
+        self.names = names
+        self.industries = industries
+
+    def __len__(self) -> int:
+        return len(self.inns)
+
+    def lookup(self, inn: str) -> Optional[Tuple[str, str]]:
+        pos = int(np.searchsorted(self.inns, inn, side="left"))
+        if pos < len(self.inns) and self.inns[pos] == inn:
+            return str(self.names[pos]), str(self.industries[pos])
+        return None
+
+    def lookup_many(self, inns: List[str]) -> np.ndarray:
+        """Позиции записей для массива ИНН одним проходом; -1 — ИНН не найден."""
+        queries = np.asarray(inns, dtype=str)
+        if not len(self.inns) or not len(queries):
+            return np.full(len(queries), -1, dtype=np.int64)
+        positions = np.searchsorted(self.inns, queries, side="left")
+        clipped = np.minimum(positions, len(self.inns) - 1)
+        found = (positions < len(self.inns)) & (self.inns[clipped] == queries)
+        return np.where(found, clipped, -1)
+
+    @classmethod
+    def from_dataframe(cls, df: "pd.DataFrame") -> "ClientIndex":
+        df = df.assign(ИНН=_normalize_inn_column(df['ИНН']))
+        df = df[df['ИНН'] != ""]
+        inns = df['ИНН'].to_numpy(dtype=str)
+        names = df['Клиент'].fillna("").astype(str).to_numpy(dtype=str)
+        industries = df['Отрасль_ОКК'].fillna("").astype(str).to_numpy(dtype=str)
+        # Стабильная сортировка сохраняет порядок дублей: первой идет запись из начала файла
+        order = np.argsort(inns, kind="stable")
+        return cls(inns[order], names[order], industries[order])
+
+    def save(self, path: str, source_mtime_ns: int, source_size: int) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            inns=self.inns,
+            names=self.names,
+            industries=self.industries,
+            source=np.array([SNAPSHOT_VERSION, source_mtime_ns, source_size], dtype=np.int64),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, source_mtime_ns: int, source_size: int) -> Optional["ClientIndex"]:
+        """Загружает снимок, если он построен из текущей версии файла и в текущем формате."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            if data["source"].tolist() != [SNAPSHOT_VERSION, source_mtime_ns, source_size]:
+                return None
+            return cls(data["inns"], data["names"], data["industries"])
+
+
 class ClientDataService:
-    def __init__(self, file_path: str):
+    """
+    Поиск клиентов по ИНН. Excel-файл разбирается один раз и сохраняется
+    в колоночный снимок (.npz), который при следующих запусках читается за доли
+    секунды. При изменении файла (mtime/размер) индекс перестраивается в фоне
+    без перезапуска бота; до окончания перестройки работает прежний индекс.
+    """
+
+    def __init__(self, file_path: str, snapshot_path: str, reload_check_seconds: float):
         self.file_path = file_path
-        self.df = self._load_database()
+        self.snapshot_path = snapshot_path
+        self.reload_check_seconds = reload_check_seconds
+        self._index: Optional[ClientIndex] = None
+        self._source_signature: Optional[Tuple[int, int]] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+        self._last_check = 0.0
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build_index(self) -> Tuple[Optional[ClientIndex], Optional[Tuple[int, int]]]:
+        signature = self._file_signature()
+        if signature is None:
+            logger.error(f"Файл базы данных не найден по пути: {self.file_path}")
+            return None, None
+        try:
+            index = ClientIndex.load(self.snapshot_path, *signature)
+            if index is not None:
+                logger.info(f"База данных клиентов загружена из снимка. Записей: {len(index)}")
+                return index, signature
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать снимок базы клиентов: {e}")
+
+        df = self._load_database()
+        if df is None:
+            return None, signature
+        index = ClientIndex.from_dataframe(df)
+        try:
+            index.save(self.snapshot_path, *signature)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить снимок базы клиентов: {e}")
+        return index, signature
+
+    def _load_database(self) -> Optional["pd.DataFrame"]:
+        # Отложенный импорт: pandas и чтение Excel не должны задерживать старт бота
+        import pandas as pd
 
-    def _load_database(self) -> Optional[pd.DataFrame]:
         try:
-            if not os.path.exists(self.file_path):
-                logger.error(f"Файл базы данных не найден по пути: {self.file_path}")
-                return None
-            
             df = pd.read_excel(self.file_path, dtype={'ИНН': str})
-            
-            required_columns = ['ИНН', 'Клиент', 'Отрасль_ОКК']
-            if not all(col in df.columns for col in required_columns):
-                logger.error(f"В файле отсутствуют необходимые колонки: {required_columns}")
+
+            if not all(col in df.columns for col in REQUIRED_COLUMNS):
+                logger.error(f"В файле отсутствуют необходимые колонки: {REQUIRED_COLUMNS}")
                 return None
-                
+
             logger.info(f"База данных клиентов успешно загружена. Записей: {len(df)}")
             return df
         except Exception as e:
             logger.critical(f"Критическая ошибка при загрузке базы данных клиентов: {e}", exc_info=True)
             return None
 
+    def _reload(self) -> None:
+        started = time.perf_counter()
+        index, signature = self._build_index()
+        with self._lock:
+            self._source_signature = signature
+            if index is not None:
+                self._index = index
+        if index is not None:
+            logger.info(
+                f"Индекс базы клиентов перестроен за {time.perf_counter() - started:.2f} с."
+            )
+
+    def _maybe_reload(self) -> None:
+        """Раз в reload_check_seconds проверяет файл и при изменении перестраивает индекс в фоне."""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_check_seconds:
+            return
+        self._last_check = now
+        signature = self._file_signature()
+        if signature is None or signature == self._source_signature:
+            return
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            return
+        logger.info("Файл базы клиентов изменился, перестраиваю индекс в фоне.")
+        self._reload_thread = threading.Thread(target=self._reload, daemon=True)
+        self._reload_thread.start()
+
+    @property
+    def index(self) -> Optional[ClientIndex]:
+        """Индекс строится при первом обращении (или заранее через warm_up)."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._index, self._source_signature = self._build_index()
+                    self._last_check = time.monotonic()
+                    self._loaded = True
+        else:
+            self._maybe_reload()
+        return self._index
+
+    def warm_up(self) -> None:
+        self.index
+
     def get_client_info_by_inn(self, inn: str) -> Optional[Dict[str, str]]:
-        if self.df is None:
+        index = self.index
+        if index is None:
             logger.warning("Попытка поиска по ИНН, но база данных не загружена.")
             return None
 
-        inn = str(inn).strip()
-        client_record = self.df[self.df['ИНН'] == inn]
+        inn = normalize_inn(inn)
+        record = index.lookup(inn)
 
-        if not client_record.empty:
-            record = client_record.iloc[0]
+        if record is not None:
             client_info = {
-                "name": record['Клиент'],
-                "industry": record['Отрасль_ОКК']
+                "name": record[0],
+                "industry": record[1]
             }
             logger.info(f"Найден клиент по ИНН {inn}: {client_info}")
             return client_info
@@ -51,4 +242,38 @@ class ClientDataService:
             logger.warning(f"ИНН {inn} не найден в базе данных.")
             return None
 
-client_data_service = ClientDataService(settings.CLIENT_DATABASE_PATH)
\ No newline at end of file
+    def get_clients_by_inns(
+        self, inns: Iterable[str]
+    ) -> Tuple[Dict[str, Dict[str, str]], List[str]]:
+        """
+        Пакетный поиск: возвращает найденных клиентов (ключ — нормализованный ИНН)
+        и список ненайденных ИНН. Повторы во входных данных схлопываются.
+        """
+        queries = list(dict.fromkeys(normalize_inn(inn) for inn in inns))
+        index = self.index
+        if index is None:
+            logger.warning("Пакетный поиск по ИНН, но база данных не загружена.")
+            return {}, queries
+
+        positions = index.lookup_many(queries)
+        found: Dict[str, Dict[str, str]] = {}
+        missing: List[str] = []
+        for inn, pos in zip(queries, positions.tolist()):
+            if pos < 0:
+                missing.append(inn)
+            else:
+                found[inn] = {
+                    "name": str(index.names[pos]),
+                    "industry": str(index.industries[pos]),
+                }
+        logger.info(
+            f"Пакетный поиск по ИНН: найдено {len(found)}, не найдено {len(missing)} "
+            f"из {len(queries)}."
+        )
+        return found, missing
+
+client_data_service = ClientDataService(
+    settings.CLIENT_DATABASE_PATH,
+    snapshot_path=settings.CLIENT_DATABASE_SNAPSHOT_PATH,
+    reload_check_seconds=settings.CLIENT_DATABASE_RELOAD_CHECK_SECONDS,
+)
@@ -0,0 +1,67 @@
+"""
+Распознавание стран в тексте: по названиям (рус./англ.) и крупнейшим
+городам-площадкам выставок.
+"""
+
+import re
+from typing import Dict, List, Set
+
+# Страна -> шаблоны упоминаний (рус./англ. основы и крупнейшие города-площадки)
+COUNTRY_PATTERNS: Dict[str, List[str]] = {
+    "китай": [r"кита[йея]\w*", r"кнр", r"china", r"chinese", r"шанха[йея]\w*", r"shanghai", r"пекин\w*", r"beijing", r"гуанчжо\w*", r"guangzhou", r"шэньчжэн\w*", r"shenzhen"],
+    "индия": [r"инди[яиюей]\w*", r"india\w*", r"мумба[ий]\w*", r"mumbai", r"нью-дели", r"new delhi", r"дели", r"delhi", r"бангалор\w*"],
+    "турция": [r"турц\w*", r"turkey", r"t[uü]rkiye", r"стамбул\w*", r"istanbul", r"анкар\w*", r"ankara", r"анталь\w*"],
+    "оаэ": [r"оаэ", r"эмират\w*", r"uae", r"emirates", r"дуба[йея]\w*", r"dubai", r"абу-даби", r"abu dhabi", r"шардж\w*", r"sharjah"],
+    "казахстан": [r"казахстан\w*", r"kazakhstan", r"алмат\w*", r"almaty", r"астан\w*", r"astana"],
+    "узбекистан": [r"узбекистан\w*", r"uzbekistan", r"ташкент\w*", r"tashkent", r"самарканд\w*"],
+    "беларусь": [r"беларус\w*", r"белорус\w*", r"belarus", r"минск\w*", r"minsk"],
+    "киргизия": [r"киргиз\w*", r"кыргыз\w*", r"kyrgyz\w*", r"бишкек\w*", r"bishkek"],
+    "таджикистан": [r"таджикистан\w*", r"tajikistan", r"душанбе", r"dushanbe"],
+    "туркменистан": [r"туркмени\w*", r"turkmenistan", r"ашхабад\w*", r"ashgabat"],
+    "армения": [r"армени\w*", r"armenia", r"ереван\w*", r"yerevan"],
+    "азербайджан": [r"азербайджан\w*", r"azerbaijan", r"баку", r"baku"],
+    "грузия": [r"грузи[яиюей]", r"georgia", r"тбилиси", r"tbilisi"],
+    "монголия": [r"монголи\w*", r"mongolia", r"улан-батор\w*"],
+    "вьетнам": [r"вьетнам\w*", r"vietnam", r"viet nam", r"ханое?", r"hanoi", r"хошимин\w*", r"ho chi minh"],
+    "таиланд": [r"таиланд\w*", r"тайланд\w*", r"thailand", r"бангкок\w*", r"bangkok"],
+    "малайзия": [r"малайзи\w*", r"malaysia", r"куала-лумпур\w*", r"kuala lumpur"],
+    "индонезия": [r"индонези\w*", r"indonesia", r"джакарт\w*", r"jakarta"],
+    "сингапур": [r"сингапур\w*", r"singapore"],
+    "япония": [r"япони\w*", r"japan", r"токио", r"tokyo", r"осак\w*", r"osaka"],
+    "южная корея": [r"коре[яиюей]\w*", r"korea", r"сеул\w*", r"seoul"],
+    "пакистан": [r"пакистан\w*", r"pakistan", r"карачи", r"karachi", r"лахор\w*"],
+    "бангладеш": [r"бангладеш\w*", r"bangladesh", r"дакк\w*", r"dhaka"],
+    "иран": [r"иран\w*", r"iran", r"тегеран\w*", r"tehran"],
+    "саудовская аравия": [r"саудовск\w*", r"saudi", r"эр-рияд\w*", r"riyadh", r"джидд\w*", r"jeddah"],
+    "катар": [r"катар\w*", r"qatar", r"доха", r"doha"],
+    "египет": [r"египт?\w*", r"egypt", r"каир\w*", r"cairo"],
+    "алжир": [r"алжир\w*", r"algeria"],
+    "марокко": [r"марокко", r"morocco", r"касабланк\w*", r"casablanca"],
+    "нигерия": [r"нигери\w*", r"nigeria", r"лагос\w*", r"lagos"],
+    "кения": [r"кени[яиюей]", r"kenya", r"найроби", r"nairobi"],
+    "эфиопия": [r"эфиопи\w*", r"ethiopia", r"аддис-абеб\w*"],
+    "юар": [r"юар", r"south africa", r"йоханнесбург\w*", r"johannesburg", r"кейптаун\w*"],
+    "бразилия": [r"бразили\w*", r"brazil", r"сан-паулу", r"sao paulo", r"são paulo"],
+    "аргентина": [r"аргентин\w*", r"argentina", r"буэнос-айрес\w*"],
+    "мексика": [r"мексик\w*", r"mexico"],
+    "куба": [r"куб[аеуы]", r"cuba", r"гаван\w*", r"havana"],
+    "сербия": [r"серби[яиюей]", r"serbia", r"белград\w*", r"belgrade"],
+    "германия": [r"германи\w*", r"germany", r"мюнхен\w*", r"munich", r"франкфурт\w*", r"frankfurt", r"кельн\w*", r"cologne", r"дюссельдорф\w*", r"düsseldorf"],
+    "италия": [r"итали\w*", r"italy", r"милан\w*", r"milan", r"болонь\w*", r"bologna"],
+    "франция": [r"франци\w*", r"france", r"париж\w*", r"paris"],
+    "испания": [r"испани\w*", r"spain", r"мадрид\w*", r"madrid", r"барселон\w*", r"barcelona"],
+    "великобритания": [r"великобритани\w*", r"англи[яиюей]", r"united kingdom", r"\buk\b", r"лондон\w*", r"london"],
+    "сша": [r"сша", r"usa", r"united states", r"нью-йорк\w*", r"new york", r"лас-вегас\w*", r"las vegas", r"чикаго", r"chicago"],
+    "израиль": [r"израил\w*", r"israel", r"тель-авив\w*", r"tel aviv"],
+    "россия": [r"росси[яиюей]\w*", r"russia\w*", r"\bрф\b", r"москв\w*", r"moscow", r"санкт-петербург\w*", r"петербург\w*", r"st\. petersburg", r"екатеринбург\w*", r"казан[ьи]", r"новосибирск\w*"],
+}
+
+_COUNTRY_RES = {
+    country: re.compile(r"(?<![\w-])(?:" + "|".join(patterns) + r")(?![\w-])", re.IGNORECASE)
+    for country, patterns in COUNTRY_PATTERNS.items()
+}
+
+
+def find_countries(text: str) -> Set[str]:
+    """Страны, упомянутые в тексте (по названиям и крупным городам)."""
+    return {country for country, pattern in _COUNTRY_RES.items() if pattern.search(text)}
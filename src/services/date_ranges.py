@@ -0,0 +1,198 @@
+"""
+Разбор дат мероприятий и периодов поиска в диапазон [начало, конец].
+
+Понимает то, что реально встречается в выдаче и в ответах LLM:
+"6-8 октября 2025", "с 30 сентября по 2 октября 2025", "October 6-8, 2025",
+"12.03.2025 - 15.03.2025", "весна 2025", "весь 2025 год".
+"""
+
+import calendar
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+DateRange = Tuple[date, date]
+
+# Названия месяцев (рус. по основе, англ. полностью или сокращением) -> номер месяца.
+# Английское "may" — месяц только рядом с числом ("May 6", "6 May", "May 2025"),
+# иначе это модальный глагол ("you may register")
+_MONTH_PATTERNS = [
+    (r"январ\w*", 1), (r"феврал\w*", 2), (r"март\w*", 3), (r"апрел\w*", 4), (r"ма[йяе]", 5),
+    (r"июн\w*", 6), (r"июл\w*", 7), (r"август\w*", 8), (r"сентябр\w*", 9), (r"октябр\w*", 10),
+    (r"ноябр\w*", 11), (r"декабр\w*", 12),
+    (r"jan(?:uary)?", 1), (r"feb(?:ruary)?", 2), (r"mar(?:ch)?", 3), (r"apr(?:il)?", 4),
+    (r"may(?=,?\s*\d)|(?<=\d\s)may", 5), (r"june?", 6), (r"july?", 7), (r"aug(?:ust)?", 8), (r"sep(?:t|tember)?", 9),
+    (r"oct(?:ober)?", 10), (r"nov(?:ember)?", 11), (r"dec(?:ember)?", 12),
+]
+# Сезоны -> (первый месяц, последний месяц); зима относится к декабрю прошлого года
+_SEASON_PATTERNS = [
+    (r"весн\w*", (3, 5)), (r"лет(?:о|а|ом|н\w*)", (6, 8)), (r"осен\w*", (9, 11)), (r"зим\w*", (12, 2)),
+    (r"spring", (3, 5)), (r"summer", (6, 8)), (r"autumn", (9, 11)), (r"fall", (9, 11)),
+    (r"winter", (12, 2)),
+]
+
+_DAY = r"(?<!\d)(\d{1,2})(?!\d)"
+_RANGE_SEP = r"\s*(?:-|–|—|по|to|until)\s*"
+_MONTH_RE = re.compile(
+    r"\b(?:" + "|".join(f"(?P<m{i}>{pattern})" for i, (pattern, _) in enumerate(_MONTH_PATTERNS)) + r")\b\.?",
+    re.IGNORECASE,
+)
+_SEASON_RE = re.compile(
+    r"\b(?:" + "|".join(f"(?P<s{i}>{pattern})" for i, (pattern, _) in enumerate(_SEASON_PATTERNS)) + r")\b",
+    re.IGNORECASE,
+)
+_YEAR_RE = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+_NUMERIC_DATE_RE = re.compile(r"(?<!\d)(\d{1,2})[./](\d{1,2})[./]((?:19|20)\d{2})(?!\d)")
+_ISO_DATE_RE = re.compile(r"(?<!\d)((?:19|20)\d{2})-(\d{2})-(\d{2})(?!\d)")
+_ADJACENT_YEAR_RE = re.compile(r"\s*,?\s*(?:19|20)\d{2}(?!\d)")
+# Служебные даты страницы ("Опубликовано 12.01.2023", "обновлено: 3 марта 2024"):
+# это даты публикации, а не мероприятия
+_STAMP_RE = re.compile(
+    r"(?:опубликован\w*|обновлен\w*|изменен\w*|размещен\w*|дата публикации|"
+    r"published|updated|posted|last modified)[^\n\d]{0,20}"
+    r"(?:(?:19|20)\d{2}-\d{2}-\d{2}|\d{1,2}[./]\d{1,2}[./](?:19|20)\d{2}|"
+    r"\d{1,2}\s+[^\W\d]+\.?,?\s+(?:19|20)\d{2})",
+    re.IGNORECASE,
+)
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _numeric_dates(text: str) -> List[date]:
+    found = []
+    for match in _ISO_DATE_RE.finditer(text):
+        d = _safe_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        if d:
+            found.append((match.start(), d))
+    for match in _NUMERIC_DATE_RE.finditer(text):
+        d = _safe_date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+        if d:
+            found.append((match.start(), d))
+    return [d for _, d in sorted(found)]
+
+
+def _year_for(text: str, position: int, default_year: Optional[int]) -> Optional[int]:
+    """Год упоминания: ближайший год после него, иначе последний год до него."""
+    after = _YEAR_RE.search(text, position)
+    if after:
+        return int(after.group(1))
+    before = _YEAR_RE.findall(text, 0, position)
+    if before:
+        return int(before[-1])
+    return default_year
+
+
+def _matched_index(match: re.Match) -> int:
+    """Номер сработавшей альтернативы в _MONTH_RE / _SEASON_RE."""
+    name = next(key for key, value in match.groupdict().items() if value)
+    return int(name[1:])
+
+
+def _month_points(text: str, default_year: Optional[int], strict: bool = False) -> List[DateRange]:
+    """
+    Диапазоны для каждого упоминания месяца (с днями, если они указаны).
+    В режиме strict учитываются только месяцы рядом с числом дня или годом:
+    в свободном тексте "Март — рынок" или "в мае открылся офис" не даты.
+    """
+    points: List[DateRange] = []
+    for match in _MONTH_RE.finditer(text):
+        # Дни перед месяцем ("6-8 октября") или после него ("October 6-8")
+        before = re.search(_DAY + r"(?:" + _RANGE_SEP + _DAY + r")?\s*$", text[: match.start()])
+        after = re.match(r"\s*" + _DAY + r"(?:" + _RANGE_SEP + _DAY + r")?", text[match.end():])
+        days_match = before or after
+        if strict and not days_match and not _ADJACENT_YEAR_RE.match(text, match.end()):
+            continue
+        year = _year_for(text, match.end(), default_year)
+        if year is None:
+            continue
+        month = _MONTH_PATTERNS[_matched_index(match)][1]
+        days = [int(d) for d in days_match.groups() if d] if days_match else []
+        start = _safe_date(year, month, days[0]) if days else None
+        end = _safe_date(year, month, days[-1]) if days else None
+        points.append((start or date(year, month, 1), end or _month_end(year, month)))
+    return points
+
+
+def _year_ranges(text: str) -> List[DateRange]:
+    return [(date(y, 1, 1), date(y, 12, 31)) for y in sorted({int(y) for y in _YEAR_RE.findall(text)})]
+
+
+def parse_date_range(text: str, default_year: Optional[int] = None) -> Optional[DateRange]:
+    """
+    Возвращает диапазон дат, упомянутых в тексте, или None, если даты
+    не распознаны. default_year подставляется, если год в тексте не указан.
+    """
+    if not text:
+        return None
+
+    numeric = _numeric_dates(text)
+    if numeric:
+        return min(numeric), max(numeric)
+
+    points = _month_points(text, default_year)
+
+    if not points:
+        for match in _SEASON_RE.finditer(text):
+            year = _year_for(text, match.end(), default_year)
+            if year is None:
+                continue
+            first, last = _SEASON_PATTERNS[_matched_index(match)][1]
+            start_year = year - 1 if first > last else year
+            points.append((date(start_year, first, 1), _month_end(year, last)))
+
+    if not points:
+        years = _year_ranges(text)
+        if not years:
+            return None
+        return years[0][0], years[-1][1]
+
+    start, end = points[0][0], points[-1][1]
+    if end < start:
+        # "28 декабря - 3 января 2026": год указан только у второй даты
+        start = start.replace(year=start.year - 1)
+    return start, end
+
+
+def find_date_ranges(text: str, default_year: Optional[int] = None) -> List[DateRange]:
+    """
+    Все отдельные упоминания дат с месяцем в свободном тексте (например, в
+    чанке со списком мероприятий). Даты публикации и обновления страницы
+    пропускаются, месяц без дня и года ("Март — рынок") датой не считается.
+    Одни годы не учитываются: "проводится с 2001 года" или "основана в 1995
+    году" ничего не говорят о датах мероприятия (см. find_years).
+    """
+    if not text:
+        return []
+    text = _without_stamps(text)
+    return [(d, d) for d in _numeric_dates(text)] + _month_points(text, default_year, strict=True)
+
+
+def find_years(text: str) -> List[DateRange]:
+    """Годы, упомянутые в тексте вне дат публикации и обновления, — диапазонами на весь год."""
+    return _year_ranges(_without_stamps(text)) if text else []
+
+
+def _without_stamps(text: str) -> str:
+    # Пробелы той же длины сохраняют позиции остального текста
+    return _STAMP_RE.sub(lambda m: " " * len(m.group(0)), text)
+
+
+def shift_months(day: date, months: int) -> date:
+    """Сдвигает дату на целое число месяцев (с обрезкой дня по концу месяца)."""
+    total = day.year * 12 + day.month - 1 + months
+    year, month = divmod(total, 12)
+    month += 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def ranges_overlap(a: DateRange, b: DateRange) -> bool:
+    return a[0] <= b[1] and b[0] <= a[1]
@@ -0,0 +1,116 @@
+import logging
+import re
+import threading
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_NONE = "none"
+QUANTIZATION_INT8 = "int8"
+QUANTIZATION_ONNX = "onnx"
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """
+    CPU-бэкенд эмбеддингов на sentence-transformers с настраиваемым размером
+    батча, числом потоков torch и необязательной оптимизацией модели:
+    - int8: динамическая квантизация линейных слоев torch;
+    - onnx: экспортированная ONNX-модель через onnxruntime.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 32,
+        num_threads: int = 1,
+        quantization: str = QUANTIZATION_NONE,
+        onnx_file_name: Optional[str] = None,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.quantization = quantization
+        self.onnx_file_name = onnx_file_name
+        self._model: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def variant_name(self) -> str:
+        """Имя варианта модели: разные варианты дают разные векторы и кэшируются отдельно."""
+        if self.quantization == QUANTIZATION_ONNX and self.onnx_file_name:
+            return f"{self.model_name}:onnx:{self.onnx_file_name}"
+        if self.quantization != QUANTIZATION_NONE:
+            return f"{self.model_name}:{self.quantization}"
+        return self.model_name
+
+    def load(self) -> Any:
+        """Загружает модель (однократно, потокобезопасно)."""
+        with self._lock:
+            if self._model is not None:
+                return self._model
+            import torch
+            from sentence_transformers import SentenceTransformer
+
+            torch.set_num_threads(self.num_threads)
+            logger.info(
+                f"Загрузка модели эмбеддингов {self.variant_name} "
+                f"(батч: {self.batch_size}, потоков: {self.num_threads})..."
+            )
+            if self.quantization == QUANTIZATION_ONNX:
+                model_kwargs = {"provider": "CPUExecutionProvider"}
+                if self.onnx_file_name:
+                    model_kwargs["file_name"] = self.onnx_file_name
+                model = SentenceTransformer(
+                    self.model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs
+                )
+            else:
+                model = SentenceTransformer(self.model_name, device="cpu")
+                if self.quantization == QUANTIZATION_INT8:
+                    model = torch.quantization.quantize_dynamic(
+                        model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+            model.eval()
+            self._model = model
+            logger.info(f"Модель эмбеддингов {self.variant_name} загружена.")
+            return model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        model = self.load()
+        # Как и HuggingFaceEmbeddings, заменяем переводы строк пробелами
+        texts = [t.replace("\n", " ") for t in texts]
+        vectors = model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def create_embedding_backend(
+    quantization: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    num_threads: Optional[int] = None,
+) -> SentenceTransformerEmbeddings:
+    """Создает бэкенд эмбеддингов по настройкам (параметры можно переопределить)."""
+    return SentenceTransformerEmbeddings(
+        model_name=settings.EMBEDDING_MODEL_NAME,
+        batch_size=batch_size or settings.EMBEDDING_BATCH_SIZE,
+        num_threads=num_threads or settings.EMBEDDING_NUM_THREADS,
+        quantization=quantization or settings.EMBEDDING_QUANTIZATION,
+        onnx_file_name=settings.EMBEDDING_ONNX_FILE_NAME,
+    )
+
+
+def embedding_variant_dir_name() -> str:
+    """Имя каталога для данных, зависящих от варианта модели (кэш, индекс)."""
+    return re.sub(r"[^a-zA-Z0-9_.-]", "_", create_embedding_backend().variant_name)
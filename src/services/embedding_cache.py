@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def embedding_key(model_name: str, text: str, kind: str = "doc") -> str:
+    """Ключ кэша: хэш модели, вида эмбеддинга (документ/запрос) и нормализованного текста."""
+    payload = f"{model_name}\0{kind}\0{_normalize_text(text)}".encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Дисковое хранилище эмбеддингов, адресуемых по содержимому.
+
+    Векторы дописываются в один плоский файл float16 (строка = вектор),
+    соответствие ключ -> номер строки хранится в SQLite. Чтение идет
+    через np.memmap, поэтому кэш не загружается в память целиком.
+    """
+
+    def __init__(self, directory: str, dtype: str = "float16"):
+        self._directory = directory
+        self._vectors_path = os.path.join(directory, "vectors.bin")
+        self._dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._rows: Dict[str, int] = {}
+        self._dim: Optional[int] = None
+        self._mmap: Optional[np.memmap] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self._directory, exist_ok=True)
+            conn = sqlite3.connect(
+                os.path.join(self._directory, "index.sqlite3"), check_same_thread=False
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, row INTEGER NOT NULL)"
+            )
+            dim_row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+            self._dim = int(dim_row[0]) if dim_row else None
+            self._rows = dict(conn.execute("SELECT key, row FROM rows").fetchall())
+            self._conn = conn
+            logger.info(f"Кэш эмбеддингов: загружено {len(self._rows)} ключей из {self._directory}.")
+        return self._conn
+
+    def _row_count(self) -> int:
+        if self._dim is None or not os.path.exists(self._vectors_path):
+            return 0
+        return os.path.getsize(self._vectors_path) // (self._dim * self._dtype.itemsize)
+
+    def _vectors(self, min_rows: int) -> np.memmap:
+        if self._mmap is None or self._mmap.shape[0] < min_rows:
+            self._mmap = np.memmap(
+                self._vectors_path,
+                dtype=self._dtype,
+                mode="r",
+                shape=(self._row_count(), self._dim),
+            )
+        return self._mmap
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        with self._lock:
+            self._connect()
+            found = {k: self._rows[k] for k in keys if k in self._rows}
+            if not found:
+                return {}
+            vectors = self._vectors(max(found.values()) + 1)
+            return {k: np.asarray(vectors[row], dtype=np.float32) for k, row in found.items()}
+
+    def add_many(self, keys: List[str], vectors: List[List[float]]) -> None:
+        if not keys:
+            return
+        array = np.asarray(vectors, dtype=self._dtype)
+        with self._lock:
+            conn = self._connect()
+            if self._dim is None:
+                self._dim = array.shape[1]
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (str(self._dim),)
+                )
+            elif array.shape[1] != self._dim:
+                logger.error(
+                    f"Кэш эмбеддингов: размерность {array.shape[1]} не совпадает с {self._dim}."
+                )
+                return
+            # Номер первой строки берем из размера файла: так записи без ключей
+            # (после сбоя между записью векторов и ключей) не сдвигают нумерацию
+            first_row = self._row_count()
+            with open(self._vectors_path, "ab") as f:
+                f.write(array.tobytes())
+            new_rows = {key: first_row + i for i, key in enumerate(keys)}
+            conn.executemany("INSERT OR REPLACE INTO rows VALUES (?, ?)", new_rows.items())
+            conn.commit()
+            self._rows.update(new_rows)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._mmap = None
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Обертка над моделью эмбеддингов: в модель уходят только тексты,
+    которых еще нет в кэше. Используется и для чанков, и для поисковых запросов.
+    """
+
+    def __init__(self, base: Embeddings, model_name: str, store: EmbeddingStore):
+        self.base = base
+        self.model_name = model_name
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(self.model_name, t) for t in texts]
+        cached = self.store.get_many(keys)
+        miss_index: Dict[str, int] = {}
+        for i, key in enumerate(keys):
+            if key not in cached and key not in miss_index:
+                miss_index[key] = i
+        self.hits += len(texts) - len(miss_index)
+        self.misses += len(miss_index)
+        if miss_index:
+            miss_keys = list(miss_index)
+            miss_vectors = self.base.embed_documents([texts[miss_index[k]] for k in miss_keys])
+            self.store.add_many(miss_keys, miss_vectors)
+            for key, vector in zip(miss_keys, miss_vectors):
+                cached[key] = np.asarray(vector, dtype=np.float32)
+        logger.debug(
+            f"Кэш эмбеддингов: {len(texts) - len(miss_index)} из {len(texts)} чанков взяты из кэша."
+        )
+        return [cached[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = embedding_key(self.model_name, text, kind="query")
+        cached = self.store.get_many([key])
+        if key in cached:
+            self.hits += 1
+            return cached[key].tolist()
+        self.misses += 1
+        vector = self.base.embed_query(text)
+        self.store.add_many([key], [vector])
+        return vector
+
+
+def create_embedding_store(dir_name: str) -> EmbeddingStore:
+    return EmbeddingStore(
+        os.path.join(settings.EMBEDDING_CACHE_DIR, dir_name),
+        dtype=settings.EMBEDDING_CACHE_DTYPE,
+    )
@@ -0,0 +1,161 @@
+"""
+Слияние одного и того же мероприятия, извлеченного из разных источников.
+
+Агрегаторы называют одну выставку по-разному ("WorldFood Moscow 2025",
+"Международная выставка WorldFood Moscow") и пишут даты в разных форматах.
+Мероприятия объединяются в группу, если похожи их нормализованные названия,
+пересекаются даты (когда они известны у обоих) и не противоречат страны
+места проведения. Из группы остается одна каноническая запись со списком
+всех источников в лучшей из категорий, в которые попадали ее копии.
+"""
+
+import logging
+import re
+from datetime import date
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Tuple
+
+from src.nlu.gigachat_client import CATEGORY_KEYS
+from src.services.chunk_dedup import source_rank
+from src.services.countries import find_countries
+from src.services.date_ranges import parse_date_range, ranges_overlap
+from src.services.event_store import period_range
+
+logger = logging.getLogger(__name__)
+
+# Слова, которые не различают мероприятия: тип, масштаб, периодичность
+_GENERIC_WORDS = {
+    "международная", "международный", "международные", "международной",
+    "выставка", "выставки", "ярмарка", "ежегодная", "ежегодный",
+    "специализированная", "отраслевая", "the", "international",
+    "exhibition", "annual", "trade", "fair", "и", "в", "of", "and",
+}
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+_MIN_TOKEN_JACCARD = 0.6
+_MIN_NAME_RATIO = 0.85
+
+
+def _name_tokens(name: str) -> List[str]:
+    words = _WORD_RE.findall(name.lower().replace("ё", "е"))
+    # Годы и номера ("2025", "26-я") в названии у разных сайтов есть не всегда
+    return [w for w in words if len(w) > 1 and not w.isdigit() and w not in _GENERIC_WORDS]
+
+
+class _Entry:
+    __slots__ = ("event", "rank", "tokens", "name", "dates", "countries")
+
+    def __init__(self, event: Dict[str, Any], rank: int, default_year: int):
+        self.event = event
+        self.rank = rank
+        self.tokens = _name_tokens(str(event.get("name") or ""))
+        self.name = " ".join(self.tokens)
+        self.dates = parse_date_range(str(event.get("dates") or ""), default_year=default_year)
+        self.countries = find_countries(str(event.get("location") or ""))
+
+
+def _same_name(a: _Entry, b: _Entry) -> bool:
+    if not a.tokens or not b.tokens:
+        return False
+    if a.name == b.name:
+        return True
+    set_a, set_b = set(a.tokens), set(b.tokens)
+    smaller, larger = sorted((set_a, set_b), key=len)
+    # "WorldFood Moscow" внутри "WorldFood Moscow Food Show": вложенное название
+    # из двух и более значимых слов
+    if len(smaller) >= 2 and smaller <= larger:
+        return True
+    if len(set_a & set_b) / len(set_a | set_b) >= _MIN_TOKEN_JACCARD:
+        return True
+    return SequenceMatcher(None, a.name, b.name).ratio() >= _MIN_NAME_RATIO
+
+
+def _compatible(a: _Entry, b: _Entry) -> bool:
+    if a.dates and b.dates and not ranges_overlap(a.dates, b.dates):
+        return False
+    if a.countries and b.countries and not (a.countries & b.countries):
+        return False
+    return _same_name(a, b)
+
+
+def _canonical(group: List[_Entry]) -> Tuple[int, Dict[str, Any]]:
+    """Каноническая запись группы и ее категория (лучшая из категорий копий)."""
+    # Основа — копия из лучшей категории, из них — с лучшего источника и
+    # с самым подробным описанием; пустые поля берутся у остальных копий
+    ordered = sorted(
+        group,
+        key=lambda e: (
+            e.rank,
+            -source_rank(str(e.event.get("source") or "")),
+            -len(str(e.event.get("description") or "")),
+        ),
+    )
+    rank = ordered[0].rank
+    merged = dict(ordered[0].event)
+    for entry in ordered[1:]:
+        for field, value in entry.event.items():
+            if field in ("mismatch_reason", "sources"):
+                continue
+            if not merged.get(field):
+                merged[field] = value
+    if rank == 0:
+        merged.pop("mismatch_reason", None)
+
+    sources: List[str] = []
+    for entry in ordered:
+        for source in entry.event.get("sources") or [entry.event.get("source")]:
+            if source and source not in sources:
+                sources.append(source)
+    sources.sort(key=lambda s: -source_rank(s))
+    if sources:
+        merged["source"] = sources[0]
+        merged["sources"] = sources
+    return rank, merged
+
+
+def merge_events(
+    categorized: Dict[str, Any], search_params: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    Схлопывает копии одного мероприятия во всех категориях результата.
+    Порядок мероприятий внутри категории сохраняется (по первой копии).
+    Возвращает (результат с теми же ключами, статистика).
+    """
+    period = period_range(search_params)
+    default_year = period[0].year if period else date.today().year
+    entries: List[_Entry] = []
+    for rank, category in enumerate(CATEGORY_KEYS):
+        for event in categorized.get(category) or []:
+            if isinstance(event, dict) and event.get("name"):
+                entries.append(_Entry(event, rank, default_year))
+
+    # Жадная группировка: запись попадает в первую группу, со всеми членами
+    # которой она совместима. Сходство не транзитивно — A~B и B~C еще не
+    # значит, что A и C одно мероприятие (например, если их даты не пересекаются)
+    groups: List[List[_Entry]] = []
+    for entry in entries:
+        for group in groups:
+            if all(_compatible(entry, member) for member in group):
+                group.append(entry)
+                break
+        else:
+            groups.append([entry])
+
+    merged_result = dict(categorized)
+    for category in CATEGORY_KEYS:
+        merged_result[category] = []
+    for group in groups:
+        rank, event = _canonical(group)
+        merged_result[CATEGORY_KEYS[rank]].append(event)
+
+    stats = {"events_in": len(entries), "events_out": len(groups)}
+    if stats["events_out"] < stats["events_in"]:
+        logger.info(f"Слияние мероприятий: {stats['events_in']} -> {stats['events_out']}.")
+    return merged_result, stats
+
+
+def same_event(a: Dict[str, Any], b: Dict[str, Any], search_params: Dict[str, Any]) -> bool:
+    """Одно ли это мероприятие (по тем же правилам, что и слияние)."""
+    period = period_range(search_params)
+    default_year = period[0].year if period else date.today().year
+    return _compatible(_Entry(a, 0, default_year), _Entry(b, 0, default_year))
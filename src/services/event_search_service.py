@@ -2,44 +2,135 @@
 
 import logging
 import asyncio
+import hashlib
 import os
-from playwright.async_api import async_playwright, Error as PlaywrightError
+from playwright.async_api import Error as PlaywrightError
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Awaitable, Callable, List, Dict, Optional, Tuple
 import re
-from datetime import datetime, timedelta
-import dateparser
+import uuid
+from datetime import datetime
+
+from src.nlu.gigachat_client import EXTRACTION_PROMPT_VERSION, gigachat_service
+from src.services.browser_pool import browser_pool
+from src.services.scrape_scheduler import scrape_scheduler, get_domain
+from src.services.page_cache import page_cache
+from src.services.serp_cache import serp_cache
+from src.services.http_client import close_http_client
+from src.services.static_fetcher import (
+    fetch_static_html,
+    fetch_strategy,
+    STRATEGY_BROWSER,
+    STRATEGY_STATIC,
+)
+from src.services.embedding_backend import (
+    create_embedding_backend,
+    embedding_variant_dir_name,
+)
+from src.services.embedding_cache import CachedEmbeddings, create_embedding_store
+from src.services.vector_index import vector_index
+from src.services import hybrid_retriever
+from src.services.html_extractor import (
+    extract_text_async,
+    shutdown_html_extractor,
+    split_units,
+)
+from src.services.chunk_dedup import chunk_deduplicator, dedup_docs
+from src.services.event_store import event_store
+from src.services.extraction_cache import (
+    extraction_cache,
+    extraction_fingerprint,
+    search_criteria,
+)
+from src.services.event_merge import merge_events
+from src.services.chunk_prefilter import prefilter_chunks
+from src.services.fetch_profile import (
+    load_page,
+    report_page_metrics,
+    SCRAPE_PROFILE,
+    SEARCH_PROFILE,
+)
+from src.services import startup_metrics
+from src.config import settings
 
-from langchain_community.vectorstores import FAISS
+logger = logging.getLogger(__name__)
 
-# --- ИЗМЕНЕНИЕ: Используем новый пакет для эмбеддингов ---
-from langchain_huggingface import HuggingFaceEmbeddings
+# Модель загружается лениво: первый вызов embed_* (или фоновый прогрев) загрузит ее
+embedding_backend = create_embedding_backend()
+embedding_model = CachedEmbeddings(
+    embedding_backend,
+    model_name=embedding_backend.variant_name,
+    store=create_embedding_store(embedding_variant_dir_name()),
+)
 
-# --- ИЗМЕНЕНИЕ: Импортируем класс Document ---
-from langchain_core.documents import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+YANDEX_SEARCH_URL = "https://yandex.ru/search/"
 
-from src.nlu.gigachat_client import gigachat_service
-from src.config import settings
+# Флаг готовности поиска: выставляется после фонового прогрева модели и индекса
+_search_ready = asyncio.Event()
+_warm_up_task: Optional[asyncio.Task] = None
+_warm_up_error: Optional[BaseException] = None
 
-logger = logging.getLogger(__name__)
 
-try:
-    logger.info("Загрузка модели эмбеддингов sentence-transformers...")
-    # --- ИЗМЕНЕНИЕ: Используем новый класс HuggingFaceEmbeddings ---
-    embedding_model = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
-        model_kwargs={"device": "cpu"},
-    )
-    logger.info("Модель эмбеддингов успешно загружена.")
-except Exception as e:
-    logger.critical(f"Не удалось загрузить модель эмбеддингов! {e}", exc_info=True)
-    embedding_model = None
+async def _warm_up() -> None:
+    """Фоновый прогрев: модель эмбеддингов, векторный индекс и пул браузеров."""
+    global _warm_up_error
+    try:
+        logger.info("Загрузка модели эмбеддингов sentence-transformers...")
+        await asyncio.to_thread(embedding_backend.load)
+        startup_metrics.mark("модель эмбеддингов загружена")
+        await asyncio.to_thread(vector_index.load)
+        await asyncio.to_thread(vector_index.evict_stale, True)
+        startup_metrics.mark("векторный индекс загружен")
+        await browser_pool.start()
+        startup_metrics.mark("пул браузеров запущен")
+        logger.info("Поиск готов к работе.")
+    except Exception as e:
+        logger.critical(f"Не удалось подготовить поиск! {e}", exc_info=True)
+        _warm_up_error = e
+    finally:
+        _search_ready.set()
+
+
+def _ensure_warm_up_started() -> asyncio.Task:
+    global _warm_up_task
+    if _warm_up_task is None:
+        _warm_up_task = asyncio.ensure_future(_warm_up())
+    return _warm_up_task
+
+
+def is_search_ready() -> bool:
+    """True, если модель и индекс уже загружены и поиск можно запускать сразу."""
+    return _search_ready.is_set() and _warm_up_error is None
+
+
+async def wait_until_search_ready() -> bool:
+    """Дожидается окончания прогрева. Возвращает False, если прогрев не удался."""
+    _ensure_warm_up_started()
+    await _search_ready.wait()
+    return _warm_up_error is None
+
 
-# ... (остальные функции до _scrape_page_text без изменений) ...
+async def start_search_service() -> None:
+    """
+    Запускает прогрев ресурсов поиска в фоне и сразу возвращает управление,
+    чтобы бот начал отвечать, пока модель загружается.
+    """
+    _ensure_warm_up_started()
 
-USER_DATA_DIR = os.path.join(settings.BASE_DIR, "playwright_session")
-HEADLESS_MODE = True
+
+async def stop_search_service() -> None:
+    """Корректно освобождает ресурсы поиска при остановке бота."""
+    if _warm_up_task is not None and not _warm_up_task.done():
+        _warm_up_task.cancel()
+        await asyncio.gather(_warm_up_task, return_exceptions=True)
+    await browser_pool.stop()
+    await close_http_client()
+    shutdown_html_extractor()
+    page_cache.close()
+    embedding_model.store.close()
+    await asyncio.to_thread(vector_index.close)
+    event_store.close()
+    extraction_cache.close()
 
 
 async def _search_yandex_links(
@@ -53,31 +144,16 @@ async def _search_yandex_links(
     logger.info(f"Начинаю веб-поиск по запросу: '{query}'")
     html_content = None
     try:
-        async with async_playwright() as p:
-            context = await p.chromium.launch_persistent_context(
-                USER_DATA_DIR,
-                headless=HEADLESS_MODE,
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
-                viewport={"width": 1920, "height": 1080},
-                locale="ru-RU",
-                args=[
-                    "--no-sandbox",
-                    "--disable-setuid-sandbox",
-                    "--disable-dev-shm-usage",
-                    "--disable-gpu",
-                    "--disable-blink-features=AutomationControlled",
-                ],
-            )
-            page = await context.new_page()
-            search_url = f"https://yandex.ru/search/?text={query.replace(' ', '+')}"
+        async with browser_pool.search_page() as page:
+            search_url = f"{YANDEX_SEARCH_URL}?text={query.replace(' ', '+')}"
 
             # --- ИЗМЕНЕНИЕ: Внутренний блок try/except для отказоустойчивости ---
             try:
-                await page.goto(
-                    search_url, wait_until="domcontentloaded", timeout=60000
-                )
                 # Ждем именно появления результатов, это надежнее
-                await page.wait_for_selector("li.serp-item", timeout=20000)
+                metrics = await load_page(page, search_url, SEARCH_PROFILE)
+                await report_page_metrics(metrics, SEARCH_PROFILE)
+                if metrics.ready_timed_out:
+                    raise PlaywrightError("результаты поиска не появились на странице")
                 html_content = await page.content()
             except PlaywrightError as e:
                 # Эта ошибка теперь не фатальна для всей функции
@@ -95,8 +171,6 @@ async def _search_yandex_links(
                         f"Ошибка Playwright при обработке запроса '{query}': {e}. Не удалось сохранить скриншот: {screenshot_error}"
                     )
             # --- КОНЕЦ ИЗМЕНЕНИЯ ---
-            finally:
-                await context.close()
 
     except Exception as e:
         # Этот блок теперь будет ловить только критические ошибки запуска Playwright
@@ -133,47 +207,74 @@ async def _search_yandex_links(
     return results
 
 
+async def _render_page_html(url: str) -> Tuple[str, Dict[str, str]]:
+    """Рендерит страницу в браузере и возвращает (HTML, заголовки ответа)."""
+    async with browser_pool.page() as page:
+        metrics = await load_page(page, url, SCRAPE_PROFILE)
+        html_content = await page.content()
+        await report_page_metrics(metrics, SCRAPE_PROFILE)
+    headers = metrics.response.headers if metrics.response else {}
+    return html_content, headers
+
+
+async def fetch_page(url: str) -> Tuple[str, str, Dict[str, str]]:
+    """
+    Загружает страницу и возвращает (HTML, текст, заголовки ответа).
+    Сначала пробует обычный HTTP-запрос и переходит к браузеру, только если
+    текста слишком мало или домен известен как требующий JavaScript.
+    """
+    domain = get_domain(url)
+    html_content, text, headers = "", "", {}
+    static_text = None
+    if fetch_strategy.get(domain) != STRATEGY_BROWSER:
+        static_result = await fetch_static_html(url)
+        if static_result:
+            static_html, static_headers = static_result
+            static_text = await extract_text_async(static_html)
+            if len(static_text) >= settings.STATIC_MIN_TEXT_LENGTH:
+                await fetch_strategy.remember(domain, STRATEGY_STATIC)
+                html_content, text, headers = static_html, static_text, static_headers
+
+    if not text:
+        html_content, headers = await _render_page_html(url)
+        text = await extract_text_async(html_content)
+        if static_text is not None:
+            # Браузер дал заметно больше текста — домену нужен JavaScript;
+            # иначе страница просто короткая, и статической загрузки достаточно
+            if len(text) >= settings.STATIC_MIN_TEXT_LENGTH and len(text) > 2 * len(static_text):
+                await fetch_strategy.remember(domain, STRATEGY_BROWSER)
+            else:
+                await fetch_strategy.remember(domain, STRATEGY_STATIC)
+    return html_content, text, headers
+
+
 async def _scrape_page_text(url: str) -> List[str]:
+    """Извлекает текст страницы и сохраняет его в кэш."""
     logger.info(f"Начинаю извлечение текста со страницы: {url}")
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+        _, text, headers = await fetch_page(url)
+        if text:
+            await page_cache.put(
+                url, text, headers.get("etag"), headers.get("last-modified")
             )
-            page = await context.new_page()
-            try:
-                await page.goto(url, wait_until="networkidle", timeout=45000)
-            except PlaywrightError:
-                await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            html_content = await page.content()
-            await browser.close()
-        soup = BeautifulSoup(html_content, "lxml")
-        tags_to_remove = [
-            "script",
-            "style",
-            "header",
-            "footer",
-            "nav",
-            "aside",
-            "form",
-            "button",
-            "iframe",
-            "noindex",
-        ]
-        for element in soup(tags_to_remove):
-            element.decompose()
-        main_content = (
-            soup.select_one("article, main, .entry-content, #content, [role='main']")
-            or soup.body
-        )
-        text = main_content.get_text(separator="\n", strip=True) if main_content else ""
         return [text] if text else []
     except Exception as e:
         logger.error(f"Не удалось извлечь текст с {url}: {e}")
         return []
 
 
+async def _get_page_text(job_id: str, url: str) -> List[str]:
+    """
+    Возвращает текст страницы: из кэша, если он свежий или подтвержден
+    сервером, иначе — рендерит страницу через планировщик.
+    """
+    cached_text = await page_cache.get_valid_text(url)
+    if cached_text is not None:
+        logger.info(f"Кэш страниц: текст {url} взят из кэша.")
+        return [cached_text]
+    return await _run_scheduled(job_id, url, lambda: _scrape_page_text(url))
+
+
 def _generate_search_queries(search_params: Dict[str, any]) -> List[str]:
     """
     Генерирует разнообразные поисковые запросы на основе параметров пользователя
@@ -222,12 +323,213 @@ def _generate_search_queries(search_params: Dict[str, any]) -> List[str]:
     return unique_queries
 
 
+async def _run_scheduled(job_id: str, url: str, coro_factory):
+    """Выполняет загрузку только после выдачи слота планировщиком."""
+    async with scrape_scheduler.slot(job_id, url):
+        return await coro_factory()
+
+
+# Маркер конца потока страниц для этапа нарезки и эмбеддинга
+_PAGES_DONE = object()
+
+# Обработчик событий прогресса поиска: получает словарь с ключом stage
+# ("warm_up", "collect", "analysis", "events") и счетчиками этапа
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+async def _report_progress(progress: Optional[ProgressCallback], **event: Any) -> None:
+    """Передает событие прогресса; ошибка обработчика не прерывает поиск."""
+    if progress is None:
+        return
+    try:
+        await progress(event)
+    except Exception as e:
+        logger.warning(f"Ошибка обработчика прогресса поиска: {e}")
+
+
+async def _produce_pages(
+    queries: List[str],
+    job_id: str,
+    pages_queue: asyncio.Queue,
+    links_seen: Dict[str, str],
+    stats: Dict[str, int],
+    on_update: Optional[Callable[[], Awaitable[None]]] = None,
+) -> None:
+    """
+    Этап 1: поиск и загрузка. Каждая новая ссылка из выдачи сразу уходит
+    на загрузку, а каждая загруженная страница — в очередь следующего этапа,
+    не дожидаясь остальных. on_update вызывается после каждого запроса к поиску.
+    """
+    fetch_tasks: List[asyncio.Task] = []
+
+    async def _fetch_and_enqueue(link: str) -> None:
+        page_texts = await _get_page_text(job_id, link)
+        await pages_queue.put((link, page_texts))
+
+    async def _search_and_dispatch(query: str) -> None:
+        link_list = await serp_cache.get_or_fetch(
+            query,
+            lambda: _run_scheduled(
+                job_id, YANDEX_SEARCH_URL, lambda: _search_yandex_links(query)
+            ),
+        )
+        for link_info in link_list:
+            if link_info["link"] not in links_seen:
+                links_seen[link_info["link"]] = link_info["title"]
+                fetch_tasks.append(
+                    asyncio.ensure_future(_fetch_and_enqueue(link_info["link"]))
+                )
+        stats["queries_done"] += 1
+        if on_update is not None:
+            await on_update()
+
+    try:
+        await asyncio.gather(*[_search_and_dispatch(q) for q in queries])
+        logger.info(
+            f"Кэш выдачи: {serp_cache.stats()}. "
+            f"Собрано {len(links_seen)} уникальных ссылок для анализа."
+        )
+        await asyncio.gather(*fetch_tasks)
+        logger.info(f"Загрузка страниц завершена. Планировщик: {scrape_scheduler.stats(job_id)}")
+    finally:
+        for task in fetch_tasks:
+            task.cancel()
+        await pages_queue.put(_PAGES_DONE)
+
+
+_text_splitter = None
+
+
+def _get_text_splitter():
+    global _text_splitter
+    if _text_splitter is None:
+        # Отложенный импорт: пакет langchain заметно замедляет старт бота
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        _text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=250)
+    return _text_splitter
+
+
+async def index_page_text(source_link: str, text: str) -> int:
+    """
+    Нарезает текст страницы на чанки, считает эмбеддинги и добавляет их
+    в векторный индекс. Возвращает число чанков страницы.
+    """
+    # Основной текст и таблицы/списки мероприятий нарезаются по отдельности.
+    # Источник добавляем прямо в текст чанка, чтобы LLM было легче его найти
+    splitter = _get_text_splitter()
+    chunk_texts = [
+        f"ИСТОЧНИК: {source_link}\n\nТЕКСТ: {chunk}"
+        for unit in split_units(text)
+        for chunk in splitter.split_text(unit)
+    ]
+    if not chunk_texts:
+        return 0
+    # Перепечатки с других сайтов уже есть в индексе: не тратим на них эмбеддинг
+    unique_texts = await asyncio.to_thread(
+        chunk_deduplicator.filter_page, source_link, chunk_texts, vector_index.contains
+    )
+    added = 0
+    if unique_texts:
+        vectors = await asyncio.to_thread(embedding_model.embed_documents, unique_texts)
+        added = await asyncio.to_thread(
+            vector_index.add_page, source_link, unique_texts, vectors
+        )
+    logger.debug(
+        f"Страница {source_link}: {len(chunk_texts)} чанков, дублей других источников: "
+        f"{len(chunk_texts) - len(unique_texts)}, новых в индексе: {added}."
+    )
+    return len(chunk_texts)
+
+
+async def _consume_pages(
+    pages_queue: asyncio.Queue,
+    stats: Dict[str, int],
+    page_digests: Dict[str, str],
+    on_update: Optional[Callable[[], Awaitable[None]]] = None,
+) -> None:
+    """
+    Этап 2: нарезка, эмбеддинг и добавление в векторный индекс.
+    Каждая страница обрабатывается сразу после загрузки; хэш ее текста
+    записывается в page_digests для ключа кэша извлечения.
+    """
+    while True:
+        item = await pages_queue.get()
+        if item is _PAGES_DONE:
+            return
+        source_link, page_texts = item
+        stats["pages_processed"] += 1
+        if page_texts and page_texts[0].strip():
+            page_digests[source_link] = hashlib.blake2b(
+                page_texts[0].encode("utf-8"), digest_size=16
+            ).hexdigest()
+            stats["chunks_indexed"] += await index_page_text(source_link, page_texts[0])
+        if on_update is not None:
+            await on_update()
+
+
+async def _retrieve_relevant_docs(search_params: Dict[str, any]) -> List[Dict[str, Any]]:
+    """
+    Этап 3: выбор чанков для LLM — гибридный поиск по индексу,
+    предфильтр дат и стран и удаление дублей.
+    """
+    # Поиск идет по долгоживущему индексу: он уже содержит и свежие
+    # страницы этого запроса, и ранее проиндексированный контент
+    vector_search_query = " ".join(
+        filter(
+            None,
+            [
+                search_params.get("event_type"),
+                search_params.get("industry"),
+                search_params.get("country"),
+                search_params.get("period"),
+            ],
+        )
+    )
+
+    query_vector = await asyncio.to_thread(
+        embedding_model.embed_query, vector_search_query
+    )
+    # Плотный и лексический поиск, затем MMR по источникам с адаптивным k
+    relevant_docs, retrieval_stats = await asyncio.to_thread(
+        hybrid_retriever.retrieve, query_vector, search_params
+    )
+    logger.info(f"Гибридный поиск чанков: {retrieval_stats}")
+    # Чанки с датами далеко от периода не идут в LLM, чанки про другие
+    # страны опускаются в ранжировании
+    relevant_docs, prefilter_stats = await asyncio.to_thread(
+        prefilter_chunks, relevant_docs, search_params
+    )
+    logger.info(f"Предфильтр дат и стран: {prefilter_stats}")
+    # Одинаковые описания с разных сайтов отправляем в LLM один раз
+    relevant_docs, dedup_stats = await asyncio.to_thread(dedup_docs, relevant_docs)
+    logger.info(f"Дубли среди найденных чанков: {dedup_stats}")
+
+    logger.debug("--- НАЧАЛО ЧАНКОВ ДЛЯ АНАЛИЗА В LLM ---")
+    for i, doc in enumerate(relevant_docs):
+        logger.debug(f"ЧАНК #{i+1} (Источник: {doc['source']}, score: {doc['score']:.3f})")
+        logger.debug(doc["text"])
+        logger.debug("---")
+    logger.debug("--- КОНЕЦ ЧАНКОВ ДЛЯ АНАЛИЗА В LLM ---")
+    return relevant_docs
+
+
 # --- ГЛАВНАЯ ФУНКЦИЯ ПОИСКА, ИЗМЕНЕНА ЛОГИКА ВЕКТОРНОГО ПОИСКА ---
-async def find_and_summarize_events(search_params: Dict[str, any]) -> Dict[str, any]:
+async def find_and_summarize_events(
+    search_params: Dict[str, any],
+    job_id: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, any]:
     """
     Выполняет поиск, делегирует анализ и категоризацию LLM,
     и возвращает готовый результат.
+    job_id — идентификатор задачи (обычно id пользователя) для честного
+    распределения слотов загрузки между одновременными поисками.
+    progress — необязательный обработчик событий прогресса: счетчики сбора
+    ("collect"), начало анализа ("analysis") и мероприятия из каждого
+    обработанного батча LLM ("events"), не дожидаясь остальных.
     """
+    job_id = job_id or uuid.uuid4().hex
     # Структура для возврата в случае ранней ошибки
     error_results = {
         "total_links_analyzed": 0,
@@ -237,55 +539,82 @@ async def find_and_summarize_events(search_params: Dict[str, any]) -> Dict[str,
         "other_mismatches": [],
     }
 
-    if not embedding_model:
+    # Повторный поиск по той же стране, отрасли и периоду отвечаем из локальной
+    # базы мероприятий, если в ней достаточно свежих данных
+    try:
+        stored_results = await asyncio.to_thread(event_store.lookup, search_params)
+    except Exception as e:
+        logger.error(f"Ошибка чтения базы мероприятий: {e}", exc_info=True)
+        stored_results = None
+    if stored_results is not None:
+        merged_results, _ = merge_events(stored_results, search_params)
+        return merged_results
+
+    if not is_search_ready():
+        await _report_progress(progress, stage="warm_up")
+    if not await wait_until_search_ready():
         logger.critical("Модель для обработки текста не загружена!")
         error_results["error_message"] = (
             "Критическая ошибка: модель для обработки текста не загружена."
         )
         return error_results
 
-    # Шаги 1-5 (сбор данных и векторный поиск) остаются практически без изменений
     queries = _generate_search_queries(search_params)
     if not queries:
         error_results["error_message"] = "Не удалось сформировать поисковые запросы."
         return error_results
 
-    search_tasks = [_search_yandex_links(q) for q in queries]
-    link_results_lists = await asyncio.gather(*search_tasks)
-    all_links_map = {
-        link_info["link"]: link_info["title"]
-        for link_list in link_results_lists
-        for link_info in link_list
-    }
+    await asyncio.to_thread(vector_index.evict_stale)
+
+    # Шаги 1-2 идут конвейером: поиск -> загрузка -> нарезка и эмбеддинг.
+    # По истечении дедлайна работаем с тем, что уже успели собрать.
+    pages_queue: asyncio.Queue = asyncio.Queue()
+    links_seen: Dict[str, str] = {}
+    page_digests: Dict[str, str] = {}
+    stats = {"queries_done": 0, "pages_processed": 0, "chunks_indexed": 0}
+
+    async def _collect_progress() -> None:
+        await _report_progress(
+            progress,
+            stage="collect",
+            queries_total=len(queries),
+            queries_done=stats["queries_done"],
+            links_found=len(links_seen),
+            pages_processed=stats["pages_processed"],
+            chunks_indexed=stats["chunks_indexed"],
+        )
+
+    await _collect_progress()
+    producer = asyncio.ensure_future(
+        _produce_pages(queries, job_id, pages_queue, links_seen, stats, _collect_progress)
+    )
+    consumer = asyncio.ensure_future(
+        _consume_pages(pages_queue, stats, page_digests, _collect_progress)
+    )
+    done, _ = await asyncio.wait(
+        {consumer}, timeout=settings.SEARCH_COLLECT_DEADLINE_SECONDS
+    )
+    if consumer not in done:
+        logger.warning(
+            f"Дедлайн сбора ({settings.SEARCH_COLLECT_DEADLINE_SECONDS} с) истек: "
+            f"обработано {stats['pages_processed']} из {len(links_seen)} страниц, "
+            f"продолжаем с собранными данными."
+        )
+    producer.cancel()
+    consumer.cancel()
+    for result in await asyncio.gather(producer, consumer, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.error(f"Ошибка на этапе сбора данных: {result}", exc_info=result)
+
+    total_links_analyzed = stats["pages_processed"]
 
-    if not all_links_map:
+    if not links_seen:
         error_results["error_message"] = (
             "К сожалению, по вашему запросу не удалось найти релевантных страниц в поиске."
         )
         return error_results
 
-    unique_links = list(all_links_map.keys())
-    total_links_analyzed = len(unique_links)
-    logger.info(f"Собрано {total_links_analyzed} уникальных ссылок для анализа.")
-
-    scraping_tasks = [_scrape_page_text(link) for link in unique_links]
-    scraped_pages_with_links = zip(await asyncio.gather(*scraping_tasks), unique_links)
-
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=250)
-    all_docs_with_metadata = []
-    for page_texts, source_link in scraped_pages_with_links:
-        if page_texts and page_texts[0].strip():
-            chunks = text_splitter.split_text(page_texts[0])
-            for chunk in chunks:
-                # Добавляем источник прямо в текст чанка, чтобы LLM было легче его найти
-                chunk_with_source = f"ИСТОЧНИК: {source_link}\n\nТЕКСТ: {chunk}"
-                all_docs_with_metadata.append(
-                    Document(
-                        page_content=chunk_with_source, metadata={"source": source_link}
-                    )
-                )
-
-    if not all_docs_with_metadata:
+    if not stats["chunks_indexed"]:
         error_results["error_message"] = (
             "Не удалось извлечь текстовое содержимое с найденных страниц."
         )
@@ -293,30 +622,34 @@ async def find_and_summarize_events(search_params: Dict[str, any]) -> Dict[str,
         return error_results
 
     logger.info(
-        f"Всего получено {len(all_docs_with_metadata)} чанков-документов для анализа."
+        f"Всего получено {stats['chunks_indexed']} чанков-документов для анализа. "
+        f"Индекс: {vector_index.stats()}. "
+        f"Кэш эмбеддингов (всего): попаданий {embedding_model.hits}, промахов {embedding_model.misses}. "
+        f"Дубли чанков при индексации (всего): {chunk_deduplicator.stats()}."
     )
 
-    try:
-        vector_store = await asyncio.to_thread(
-            FAISS.from_documents,
-            documents=all_docs_with_metadata,
-            embedding=embedding_model,
-        )
-        vector_search_query = " ".join(
-            filter(
-                None,
-                [
-                    search_params.get("event_type"),
-                    search_params.get("industry"),
-                    search_params.get("country"),
-                    search_params.get("period"),
-                ],
-            )
-        )
-
-        relevant_docs = await asyncio.to_thread(
-            vector_store.similarity_search, vector_search_query, k=60
+    # Ключ кэша извлечения — критерии и отпечатки собранных страниц: при
+    # повторном поиске по неизменившимся страницам эмбеддинг запроса,
+    # гибридный поиск и вызовы LLM пропускаются
+    cache_key = extraction_fingerprint(
+        search_params,
+        sorted(f"{link}\n{digest}" for link, digest in page_digests.items()),
+        EXTRACTION_PROMPT_VERSION,
+    )
+    categorized_results = await extraction_cache.get(cache_key)
+    if categorized_results is not None:
+        logger.info(
+            f"Кэш извлечения: результат для {len(page_digests)} страниц взят из кэша "
+            f"(попаданий {extraction_cache.hits}, промахов {extraction_cache.misses})."
         )
+    else:
+        try:
+            relevant_docs = await _retrieve_relevant_docs(search_params)
+        except Exception as e:
+            logger.error(f"Ошибка при векторном поиске: {e}", exc_info=True)
+            error_results["error_message"] = "Произошла ошибка на этапе анализа текста."
+            error_results["total_links_analyzed"] = total_links_analyzed
+            return error_results
 
         if not relevant_docs:
             error_results["error_message"] = (
@@ -325,26 +658,37 @@ async def find_and_summarize_events(search_params: Dict[str, any]) -> Dict[str,
             error_results["total_links_analyzed"] = total_links_analyzed
             return error_results
 
-        logger.debug("--- НАЧАЛО ЧАНКОВ ДЛЯ АНАЛИЗА В LLM ---")
-        for i, doc in enumerate(relevant_docs):
-            logger.debug(f"ЧАНК #{i+1} (Источник: {doc.metadata.get('source', 'N/A')})")
-            logger.debug(doc.page_content)
-            logger.debug("---")
-        logger.debug("--- КОНЕЦ ЧАНКОВ ДЛЯ АНАЛИЗА В LLM ---")
+        # --- КЛЮЧЕВОЕ ИЗМЕНЕНИЕ: Вся аналитика делегируется GigaChat ---
+        # Python больше не анализирует и не фильтрует. Он просто передает данные.
+        await _report_progress(
+            progress, stage="analysis", pages_processed=total_links_analyzed, chunks=len(relevant_docs)
+        )
 
-        relevant_chunks_for_llm = [doc.page_content for doc in relevant_docs]
+        async def _on_batch(batch_result: Dict[str, List]) -> None:
+            batch_events, _ = merge_events(batch_result, search_params)
+            await _report_progress(
+                progress,
+                stage="events",
+                perfect_matches=batch_events["perfect_matches"],
+                near_date_matches=batch_events["near_date_matches"],
+            )
 
-    except Exception as e:
-        logger.error(f"Ошибка при векторном поиске: {e}", exc_info=True)
-        error_results["error_message"] = "Произошла ошибка на этапе анализа текста."
-        error_results["total_links_analyzed"] = total_links_analyzed
-        return error_results
+        categorized_results, extraction_stats = await gigachat_service.extract_and_categorize_events(
+            chunks=relevant_docs,
+            criteria=search_criteria(search_params),
+            on_batch=_on_batch if progress is not None else None,
+        )
+        # Неполный результат не кэшируем: при повторе упавшие батчи стоит перезапросить
+        if extraction_stats["batches"] and not extraction_stats["failed_batches"]:
+            await extraction_cache.put(cache_key, categorized_results)
 
-    # --- КЛЮЧЕВОЕ ИЗМЕНЕНИЕ: Вся аналитика делегируется GigaChat ---
-    # Python больше не анализирует и не фильтрует. Он просто передает данные.
-    categorized_results = await gigachat_service.extract_and_categorize_events(
-        chunks=relevant_chunks_for_llm, search_params=search_params
-    )
+    # Одно мероприятие с разных агрегаторов — одна запись со всеми источниками
+    categorized_results, _ = merge_events(categorized_results, search_params)
+
+    try:
+        await asyncio.to_thread(event_store.add_events, categorized_results, search_params)
+    except Exception as e:
+        logger.error(f"Не удалось сохранить мероприятия в базу: {e}", exc_info=True)
 
     # Добавляем мета-информацию и возвращаем готовый результат
     categorized_results["total_links_analyzed"] = total_links_analyzed
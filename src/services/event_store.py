@@ -0,0 +1,286 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from src.config import settings
+from src.services.countries import find_countries
+from src.services.date_ranges import parse_date_range, ranges_overlap, shift_months
+
+logger = logging.getLogger(__name__)
+
+# Тип мероприятия "Все вместе" не сужает поиск по базе
+ANY_EVENT_TYPE = "мероприятия по ВЭД"
+
+_EVENT_FIELDS = ("name", "dates", "location", "description", "source")
+
+
+def normalize_field(value: Optional[str]) -> str:
+    """Нормализация для индексируемых полей: регистр, ё, пунктуация, пробелы."""
+    text = (value or "").lower().replace("ё", "е")
+    text = re.sub(r"[^\w\s-]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _country_stem(country_norm: str) -> str:
+    # "индия" должна находиться в "нью-дели, индии": отбрасываем окончание
+    return country_norm[:-1] if len(country_norm) > 4 else country_norm
+
+
+def canonical_country(country: Optional[str]) -> str:
+    """
+    Ключ страны для хранения и поиска: синонимы из справочника стран сводятся
+    к одному ключу ("КНР", "Китай" -> "китай"; "Эмираты", "ОАЭ" -> "оаэ"),
+    страна вне справочника — нормализованная строка.
+    """
+    countries = find_countries(country or "")
+    return countries.pop() if len(countries) == 1 else normalize_field(country)
+
+
+def event_country(location: Optional[str], search_country: Optional[str]) -> Optional[str]:
+    """
+    Страна мероприятия: страна поиска, если она упомянута в месте проведения,
+    иначе страна из последней части адреса ("Мумбаи, Индия" -> "индия",
+    "Пудун, Шанхай" -> "китай"). None, если страну определить нельзя
+    (в последней части только город вне справочника или улица).
+    """
+    country_norm = canonical_country(search_country)
+    if country_norm and (
+        country_norm in find_countries(location or "")
+        or _country_stem(country_norm) in normalize_field(location)
+    ):
+        return country_norm
+    parts = [p for p in (location or "").split(",") if p.strip()]
+    countries = find_countries(parts[-1]) if parts else set()
+    return countries.pop() if len(countries) == 1 else None
+
+
+def period_range(search_params: Dict[str, Any]) -> Optional[tuple]:
+    return parse_date_range(search_params.get("period") or "", default_year=date.today().year)
+
+
+class EventStore:
+    """
+    Локальная база извлеченных мероприятий (SQLite).
+
+    Каждое мероприятие, которое вернул LLM, сохраняется с нормализованными
+    страной, отраслью, типом и диапазоном дат (по ним есть индексы) и попадает
+    в полнотекстовый индекс FTS5 по названию, месту и описанию. Повторный поиск
+    по той же стране, отрасли и периоду отвечает из базы, если данных достаточно
+    и они свежие; иначе выполняется живой поиск.
+    """
+
+    def __init__(self, db_path: str, min_events: int, max_age_seconds: int, near_months: int = 3):
+        self._db_path = db_path
+        self._min_events = min_events
+        self._max_age_seconds = max_age_seconds
+        self._near_months = near_months
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY,
+                    key TEXT UNIQUE NOT NULL,
+                    name TEXT NOT NULL,
+                    dates TEXT,
+                    location TEXT,
+                    description TEXT,
+                    source TEXT,
+                    country_norm TEXT NOT NULL,
+                    industry_norm TEXT NOT NULL,
+                    event_type_norm TEXT NOT NULL,
+                    start_date TEXT,
+                    end_date TEXT,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_events_lookup
+                    ON events (country_norm, industry_norm, start_date);
+                CREATE INDEX IF NOT EXISTS idx_events_dates ON events (start_date, end_date);
+                CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+                    name, location, description, content='events', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS events_ai AFTER INSERT ON events BEGIN
+                    INSERT INTO events_fts (rowid, name, location, description)
+                    VALUES (new.id, new.name, new.location, new.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS events_ad AFTER DELETE ON events BEGIN
+                    INSERT INTO events_fts (events_fts, rowid, name, location, description)
+                    VALUES ('delete', old.id, old.name, old.location, old.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS events_au AFTER UPDATE ON events BEGIN
+                    INSERT INTO events_fts (events_fts, rowid, name, location, description)
+                    VALUES ('delete', old.id, old.name, old.location, old.description);
+                    INSERT INTO events_fts (rowid, name, location, description)
+                    VALUES (new.id, new.name, new.location, new.description);
+                END;
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _event_key(name_norm: str, start_date: Optional[str], country_norm: str) -> str:
+        payload = f"{name_norm}\0{start_date or ''}\0{country_norm}".encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def add_events(self, categorized: Dict[str, List[Dict]], search_params: Dict[str, Any]) -> int:
+        """
+        Сохраняет результат извлечения. Отрасль и тип поиска присваиваются
+        только подошедшим мероприятиям (perfect/near): про остальные LLM
+        сообщил лишь, что они не подходят.
+        """
+        period = period_range(search_params)
+        default_year = period[0].year if period else date.today().year
+        industry_norm = normalize_field(search_params.get("industry"))
+        event_type_norm = normalize_field(search_params.get("event_type"))
+        now = time.time()
+        rows = []
+        for category in ("perfect_matches", "near_date_matches", "other_mismatches"):
+            matched = category != "other_mismatches"
+            for event in categorized.get(category) or []:
+                if not isinstance(event, dict) or not event.get("name"):
+                    continue
+                fields = {f: str(event.get(f) or "").strip() for f in _EVENT_FIELDS}
+                date_range = parse_date_range(fields["dates"], default_year=default_year)
+                start_date = date_range[0].isoformat() if date_range else None
+                end_date = date_range[1].isoformat() if date_range else None
+                country_norm = event_country(fields["location"], search_params.get("country")) or ""
+                rows.append((
+                    self._event_key(normalize_field(fields["name"]), start_date, country_norm),
+                    fields["name"], fields["dates"], fields["location"],
+                    fields["description"], fields["source"], country_norm,
+                    industry_norm if matched else "",
+                    event_type_norm if matched else "",
+                    start_date, end_date, now, now,
+                ))
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            # При повторной встрече обновляем время и непустые поля; отрасль и тип
+            # не затираются пустыми значениями из other_mismatches
+            conn.executemany(
+                """
+                INSERT INTO events (key, name, dates, location, description, source,
+                                    country_norm, industry_norm, event_type_norm,
+                                    start_date, end_date, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    dates = COALESCE(NULLIF(excluded.dates, ''), dates),
+                    location = COALESCE(NULLIF(excluded.location, ''), location),
+                    description = COALESCE(NULLIF(excluded.description, ''), description),
+                    source = COALESCE(NULLIF(excluded.source, ''), source),
+                    industry_norm = COALESCE(NULLIF(excluded.industry_norm, ''), industry_norm),
+                    event_type_norm = COALESCE(NULLIF(excluded.event_type_norm, ''), event_type_norm),
+                    last_seen = excluded.last_seen
+                """,
+                rows,
+            )
+            conn.commit()
+        logger.info(f"База мероприятий: сохранено {len(rows)} мероприятий.")
+        return len(rows)
+
+    def lookup(self, search_params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Отвечает на поиск из базы в формате extract_and_categorize_events.
+        Возвращает None, если период не распознан, подходящих мероприятий
+        меньше min_events или самые свежие из них старше max_age_seconds.
+        """
+        period = period_range(search_params)
+        country_norm = canonical_country(search_params.get("country"))
+        industry_norm = normalize_field(search_params.get("industry"))
+        if not period or not country_norm or not industry_norm:
+            return None
+        window = (
+            shift_months(period[0], -self._near_months),
+            shift_months(period[1], self._near_months),
+        )
+        query = (
+            "SELECT name, dates, location, description, source, start_date, end_date, last_seen "
+            "FROM events WHERE country_norm = ? AND industry_norm = ? "
+            "AND start_date <= ? AND end_date >= ?"
+        )
+        params: List[Any] = [country_norm, industry_norm, window[1].isoformat(), window[0].isoformat()]
+        event_type_norm = normalize_field(search_params.get("event_type"))
+        if event_type_norm and event_type_norm != normalize_field(ANY_EVENT_TYPE):
+            query += " AND event_type_norm = ?"
+            params.append(event_type_norm)
+        with self._lock:
+            rows = self._connect().execute(query + " ORDER BY start_date", params).fetchall()
+
+        if len(rows) < self._min_events:
+            logger.info(
+                f"База мероприятий: найдено {len(rows)} (нужно {self._min_events}), нужен живой поиск."
+            )
+            return None
+        age = time.time() - max(row[7] for row in rows)
+        if age > self._max_age_seconds:
+            logger.info(f"База мероприятий: данные устарели ({age / 3600:.0f} ч), нужен живой поиск.")
+            return None
+
+        perfect, near = [], []
+        for name, dates, location, description, source, start, end, _ in rows:
+            event = {
+                "name": name,
+                "dates": dates,
+                "location": location,
+                "description": description,
+                "source": source,
+            }
+            if ranges_overlap((date.fromisoformat(start), date.fromisoformat(end)), period):
+                perfect.append(event)
+            else:
+                event["mismatch_reason"] = "Мероприятие проходит вне запрошенного периода"
+                near.append(event)
+        logger.info(
+            f"База мероприятий: ответ без живого поиска. Perfect: {len(perfect)}, Near: {len(near)}"
+        )
+        return {
+            "perfect_matches": perfect,
+            "near_date_matches": near,
+            "other_mismatches": [],
+            "total_links_analyzed": len({row[4] for row in rows if row[4]}),
+            "from_event_store": True,
+        }
+
+    def search_text(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Полнотекстовый поиск по названию, месту и описанию (FTS5, ранжирование bm25)."""
+        # Короткие служебные слова ("а", "в", "по") только размывают ранжирование
+        terms = [term for term in re.findall(r"\w+", text.lower()) if len(term) > 2]
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"*' for term in terms)
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT e.name, e.dates, e.location, e.description, e.source "
+                "FROM events_fts JOIN events e ON e.id = events_fts.rowid "
+                "WHERE events_fts MATCH ? ORDER BY bm25(events_fts) LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        return [dict(zip(_EVENT_FIELDS, row)) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+event_store = EventStore(
+    settings.EVENT_STORE_PATH,
+    min_events=settings.EVENT_STORE_MIN_EVENTS,
+    max_age_seconds=settings.EVENT_STORE_MAX_AGE_SECONDS,
+)
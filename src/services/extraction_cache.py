@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Поля параметров поиска, которые влияют на ответ LLM. Остальное в состоянии
+# диалога (стадия, ИНН, прошлые результаты) в ключ не входит
+CRITERIA_FIELDS = ("industry", "country", "period", "event_type", "extra_info")
+
+
+def _normalize_value(value: Any) -> Any:
+    if isinstance(value, (list, tuple, set)):
+        return sorted(_normalize_value(v) for v in value)
+    text = str(value or "").lower().replace("ё", "е")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def normalize_criteria(search_params: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: _normalize_value(search_params.get(field)) for field in CRITERIA_FIELDS}
+
+
+def search_criteria(search_params: Dict[str, Any]) -> Dict[str, Any]:
+    """Заполненные критерии поиска — то, что передается в промпт извлечения."""
+    return {field: search_params[field] for field in CRITERIA_FIELDS if search_params.get(field)}
+
+
+def extraction_fingerprint(
+    search_params: Dict[str, Any], sources: List[str], prompt_version: str
+) -> str:
+    """
+    Отпечаток поиска для кэша извлечения: версия промпта и модель,
+    нормализованные критерии и упорядоченный список отпечатков источников
+    (ссылка и хэш текста страницы). Набор найденных чанков в ключ не входит:
+    он меняется по мере роста индекса, и повторные поиски не попадали бы в кэш.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{settings.GIGACHAT_MODEL}\0{prompt_version}\0".encode("utf-8"))
+    digest.update(
+        json.dumps(normalize_criteria(search_params), ensure_ascii=False, sort_keys=True).encode("utf-8")
+    )
+    for source in sources:
+        digest.update(hashlib.blake2b(source.encode("utf-8"), digest_size=16).digest())
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Дисковый кэш результатов извлечения мероприятий LLM (SQLite).
+    Запись живет ttl_seconds, число записей ограничено max_entries
+    (вытесняются давно не читанные).
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: int, max_entries: int):
+        self._db_path = db_path
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS extractions (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_extractions_last_access ON extractions (last_access)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _get_sync(self, key: str) -> Optional[Dict[str, List]]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT result, created_at FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self._ttl_seconds:
+                conn.execute("DELETE FROM extractions WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE extractions SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return json.loads(row[0])
+
+    def _put_sync(self, key: str, result: Dict[str, List]) -> None:
+        now = time.time()
+        payload = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            conn.execute(
+                "DELETE FROM extractions WHERE created_at < ?", (now - self._ttl_seconds,)
+            )
+            conn.execute(
+                """
+                DELETE FROM extractions WHERE key IN (
+                    SELECT key FROM extractions ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self._max_entries,),
+            )
+            conn.commit()
+
+    async def get(self, key: str) -> Optional[Dict[str, List]]:
+        try:
+            result = await asyncio.to_thread(self._get_sync, key)
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Ошибка чтения кэша извлечения: {e}")
+            result = None
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    async def put(self, key: str, result: Dict[str, List]) -> None:
+        try:
+            await asyncio.to_thread(self._put_sync, key, result)
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка записи в кэш извлечения: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+extraction_cache = ExtractionCache(
+    db_path=settings.EXTRACTION_CACHE_PATH,
+    ttl_seconds=settings.EXTRACTION_CACHE_TTL_SECONDS,
+    max_entries=settings.EXTRACTION_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Request, Response, Route, Error as PlaywrightError
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Проверка готовности: в основном блоке страницы уже есть текст нужной длины
+_READY_JS = """
+([selector, minLength]) => {
+    const el = document.querySelector(selector) || document.body;
+    return !!el && (el.innerText || "").trim().length >= minLength;
+}
+"""
+
+
+class FetchProfile:
+    """
+    Профиль загрузки страницы в браузере: какие запросы отбрасывать
+    и по какому признаку считать страницу готовой к извлечению текста.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        blocked_resource_types: Iterable[str],
+        blocked_domains: Iterable[str],
+        ready_selector: str,
+        ready_min_text_length: int,
+        goto_timeout_ms: int,
+        ready_timeout_ms: int,
+    ):
+        self.name = name
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.blocked_domains = tuple(blocked_domains)
+        self.ready_selector = ready_selector
+        self.ready_min_text_length = ready_min_text_length
+        self.goto_timeout_ms = goto_timeout_ms
+        self.ready_timeout_ms = ready_timeout_ms
+
+    def is_blocked(self, request: Request) -> bool:
+        if request.resource_type in self.blocked_resource_types:
+            return True
+        host = urlparse(request.url).netloc.lower()
+        return any(host == d or host.endswith("." + d) for d in self.blocked_domains)
+
+
+class PageMetrics:
+    """Метрики загрузки одной страницы: трафик, запросы и время до текста."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.started_at = time.monotonic()
+        self.time_to_text: Optional[float] = None
+        self.bytes_transferred = 0
+        self.requests = 0
+        self.blocked = 0
+        self.ready_timed_out = False
+        self.response: Optional[Response] = None
+        self._pending: List[asyncio.Task] = []
+
+    async def _account(self, request: Request) -> None:
+        try:
+            sizes = await request.sizes()
+            self.bytes_transferred += (
+                sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+            )
+        except PlaywrightError:
+            pass
+
+    def on_request_finished(self, request: Request) -> None:
+        self.requests += 1
+        self._pending.append(asyncio.ensure_future(self._account(request)))
+
+    async def flush(self) -> None:
+        """Дожидается подсчета размеров всех завершенных запросов."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+            self._pending.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "kb": round(self.bytes_transferred / 1024, 1),
+            "requests": self.requests,
+            "blocked": self.blocked,
+            "time_to_text_s": round(self.time_to_text, 2)
+            if self.time_to_text is not None
+            else None,
+            "ready_timed_out": self.ready_timed_out,
+        }
+
+
+async def apply_fetch_profile(page: Page, profile: FetchProfile, url: str) -> PageMetrics:
+    """Включает перехват запросов по профилю и сбор метрик на странице."""
+    metrics = PageMetrics(url)
+
+    async def _handle_route(route: Route) -> None:
+        if profile.is_blocked(route.request):
+            metrics.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", _handle_route)
+    page.on("requestfinished", metrics.on_request_finished)
+    return metrics
+
+
+async def load_page(page: Page, url: str, profile: FetchProfile) -> PageMetrics:
+    """
+    Открывает url по профилю: ждет только DOM, а затем — появления основного
+    контента вместо фиксированного ожидания networkidle. Если признак готовности
+    не появился за ready_timeout_ms, работаем с тем, что уже загружено.
+    """
+    metrics = await apply_fetch_profile(page, profile, url)
+    metrics.response = await page.goto(
+        url, wait_until="domcontentloaded", timeout=profile.goto_timeout_ms
+    )
+    try:
+        await page.wait_for_function(
+            _READY_JS,
+            arg=[profile.ready_selector, profile.ready_min_text_length],
+            timeout=profile.ready_timeout_ms,
+        )
+    except PlaywrightError:
+        metrics.ready_timed_out = True
+    metrics.time_to_text = time.monotonic() - metrics.started_at
+    return metrics
+
+
+async def report_page_metrics(metrics: PageMetrics, profile: FetchProfile) -> None:
+    await metrics.flush()
+    logger.info(f"Загрузка [{profile.name}] {metrics.url}: {metrics.as_dict()}")
+
+
+SCRAPE_PROFILE = FetchProfile(
+    name="scrape",
+    blocked_resource_types=settings.FETCH_BLOCKED_RESOURCE_TYPES,
+    blocked_domains=settings.FETCH_BLOCKED_DOMAINS,
+    ready_selector="article, main, .entry-content, #content, [role='main']",
+    ready_min_text_length=settings.STATIC_MIN_TEXT_LENGTH,
+    goto_timeout_ms=30000,
+    ready_timeout_ms=10000,
+)
+
+SEARCH_PROFILE = FetchProfile(
+    name="search",
+    # Стили на выдаче оставляем: без них Яндекс чаще показывает капчу
+    blocked_resource_types=settings.FETCH_BLOCKED_RESOURCE_TYPES - {"stylesheet"},
+    blocked_domains=settings.FETCH_BLOCKED_DOMAINS,
+    ready_selector="li.serp-item",
+    ready_min_text_length=1,
+    goto_timeout_ms=60000,
+    ready_timeout_ms=20000,
+)
@@ -0,0 +1,203 @@
+"""
+Извлечение текста из HTML страниц вне цикла событий.
+
+Экстрактор выбирается настройкой HTML_EXTRACTOR:
+- "lxml" — разбор lxml без BeautifulSoup: служебные теги вырезаются одним
+  проходом strip_elements, комментарии отбрасывает сам парсер, текст
+  собирается itertext. Таблицы и списки мероприятий выделяются в отдельные
+  блоки, чтобы нарезка на чанки не рвала их строки и не смешивала с прозой;
+- "soup" — прежний путь через BeautifulSoup (для сравнения и отката).
+
+Текст страницы хранится одной строкой: основной текст и блоки разделены
+UNIT_SEPARATOR, split_units разбирает ее обратно на единицы нарезки.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Type
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Теги, содержимое которых не относится к тексту страницы
+REMOVED_TAGS = (
+    "script",
+    "style",
+    "header",
+    "footer",
+    "nav",
+    "aside",
+    "form",
+    "button",
+    "iframe",
+    "noindex",
+)
+MAIN_CONTENT_SELECTOR = "article, main, .entry-content, #content, [role='main']"
+
+UNIT_SEPARATOR = "\n\n\f\n\n"
+
+# Минимальный размер структурного блока: короткие таблицы и списки
+# (меню, пары "ключ — значение") остаются в основном тексте
+_BLOCK_MIN_CHARS = 200
+_TABLE_MIN_ROWS = 2
+_LIST_MIN_ITEMS = 3
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def split_units(text: str) -> List[str]:
+    """Разбивает сохраненный текст страницы на основной текст и блоки."""
+    return [unit for unit in text.split(UNIT_SEPARATOR) if unit.strip()]
+
+
+def join_units(text: str, blocks: List[str]) -> str:
+    return UNIT_SEPARATOR.join(unit for unit in [text, *blocks] if unit)
+
+
+class HtmlExtractor(ABC):
+    """Базовый экстрактор: extract возвращает (основной текст, структурные блоки)."""
+
+    name = ""
+
+    @abstractmethod
+    def extract(self, html_content: str) -> Tuple[str, List[str]]:
+        ...
+
+
+class SoupExtractor(HtmlExtractor):
+    """Прежний путь: дерево BeautifulSoup, decompose служебных тегов и get_text."""
+
+    name = "soup"
+
+    def extract(self, html_content: str) -> Tuple[str, List[str]]:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html_content, "lxml")
+        for element in soup(list(REMOVED_TAGS)):
+            element.decompose()
+        main_content = soup.select_one(MAIN_CONTENT_SELECTOR) or soup.body
+        text = main_content.get_text(separator="\n", strip=True) if main_content else ""
+        return text, []
+
+
+class LxmlExtractor(HtmlExtractor):
+    """Однопроходная обрезка дерева lxml и выделение таблиц и списков в блоки."""
+
+    name = "lxml"
+
+    def __init__(self):
+        # Отложенный импорт, как и для остальных тяжелых библиотек
+        import lxml.html
+        from lxml import etree
+
+        self._etree = etree
+        self._document_fromstring = lxml.html.document_fromstring
+        self._parser = lxml.html.HTMLParser(
+            encoding="utf-8", remove_comments=True, remove_pis=True
+        )
+        # Аналог MAIN_CONTENT_SELECTOR: первый подходящий элемент в порядке документа
+        self._main_xpath = etree.XPath(
+            "(//article | //main | //*[@id='content'] | //*[@role='main']"
+            " | //*[contains(concat(' ', normalize-space(@class), ' '), ' entry-content ')])[1]"
+        )
+        self._blocks_xpath = etree.XPath(
+            ".//table[not(ancestor::table)]"
+            " | .//ul[not(ancestor::ul or ancestor::ol or ancestor::table)]"
+            " | .//ol[not(ancestor::ul or ancestor::ol or ancestor::table)]"
+        )
+
+    @staticmethod
+    def _inline_text(element) -> str:
+        return _SPACES_RE.sub(" ", " ".join(element.itertext())).strip()
+
+    def _render_block(self, element) -> Optional[str]:
+        if element.tag == "table":
+            rows = []
+            for row in element.iter("tr"):
+                cells = [self._inline_text(c) for c in row if c.tag in ("td", "th")]
+                cells = [c for c in cells if c]
+                if cells:
+                    rows.append(" | ".join(cells))
+            lines = rows if len(rows) >= _TABLE_MIN_ROWS else []
+        else:
+            items = [self._inline_text(li) for li in element if li.tag == "li"]
+            items = [f"- {item}" for item in items if item]
+            lines = items if len(items) >= _LIST_MIN_ITEMS else []
+        block = "\n".join(lines)
+        return block if len(block) >= _BLOCK_MIN_CHARS else None
+
+    def extract(self, html_content: str) -> Tuple[str, List[str]]:
+        if not html_content or not html_content.strip():
+            return "", []
+        try:
+            root = self._document_fromstring(html_content.encode("utf-8"), parser=self._parser)
+        except (self._etree.ParserError, ValueError):
+            return "", []
+        self._etree.strip_elements(root, *REMOVED_TAGS, with_tail=False)
+        main = self._main_xpath(root)
+        main = main[0] if main else root.find("body")
+        if main is None:
+            return "", []
+
+        blocks: List[str] = []
+        for element in self._blocks_xpath(main):
+            block = self._render_block(element)
+            if block:
+                blocks.append(block)
+                element.drop_tree()
+        lines = (line.strip() for line in main.itertext())
+        return "\n".join(line for line in lines if line), blocks
+
+
+EXTRACTORS: Dict[str, Type[HtmlExtractor]] = {
+    LxmlExtractor.name: LxmlExtractor,
+    SoupExtractor.name: SoupExtractor,
+}
+
+# Парсер и XPath lxml не рассчитаны на одновременное использование из
+# нескольких потоков, поэтому у каждого рабочего потока свой экстрактор
+_local = threading.local()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def create_html_extractor(name: Optional[str] = None) -> HtmlExtractor:
+    """Создает экстрактор по имени (по умолчанию — из настроек)."""
+    name = name or settings.HTML_EXTRACTOR
+    if name not in EXTRACTORS:
+        raise ValueError(f"Неизвестный экстрактор HTML: {name}. Доступны: {', '.join(EXTRACTORS)}")
+    return EXTRACTORS[name]()
+
+
+def get_html_extractor() -> HtmlExtractor:
+    extractor = getattr(_local, "extractor", None)
+    if extractor is None:
+        extractor = _local.extractor = create_html_extractor()
+    return extractor
+
+
+def extract_text(html_content: str) -> str:
+    """Текст страницы: основной текст и структурные блоки, разделенные UNIT_SEPARATOR."""
+    return join_units(*get_html_extractor().extract(html_content))
+
+
+async def extract_text_async(html_content: str) -> str:
+    """extract_text в отдельном пуле потоков, чтобы разбор не блокировал цикл событий."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.HTML_EXTRACT_WORKERS, thread_name_prefix="html-extract"
+        )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, extract_text, html_content)
+
+
+def shutdown_html_extractor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,159 @@
+"""
+Гибридный поиск чанков для извлечения мероприятий.
+
+Кандидаты берутся из двух источников: плотного поиска по эмбеддингу запроса
+и лексического поиска FTS5 (bm25) по словам критериев — стране, отрасли,
+месяцам и годам, которые эмбеддинг короткого запроса улавливает плохо.
+Оценки нормируются и смешиваются, затем отбор идет по MMR (maximal marginal
+relevance): каждый следующий чанк должен быть релевантен и не повторять уже
+выбранные, а чанки того же источника считаются похожими, поэтому одна
+страница не забирает всю выдачу. Число чанков адаптивно: после min_k отбор
+останавливается, как только релевантность кандидатов падает ниже порога.
+"""
+
+import logging
+import re
+import sqlite3
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from src.config import settings
+from src.services.event_store import period_range
+from src.services.vector_index import vector_index
+
+logger = logging.getLogger(__name__)
+
+# Вес плотной оценки в смеси (остальное — лексическая)
+_DENSE_WEIGHT = 0.6
+# Минимальная "похожесть" двух чанков одного источника для MMR
+_SAME_SOURCE_SIMILARITY = 0.6
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+_CYRILLIC_RE = re.compile(r"[а-яё]")
+_STOP_WORDS = {"по", "и", "в", "на", "для", "или", "все", "любые", "мероприятия"}
+
+
+def _term_query(word: str) -> str:
+    # Грубая замена морфологии: у русских слов отбрасываем окончание и ищем
+    # по префиксу (Китай -> "кита"* найдет Китае, Китая)
+    if _CYRILLIC_RE.search(word) and len(word) >= 5:
+        word = word[: max(4, len(word) - 2)]
+    return f'"{word}"' if word.isdigit() else f'"{word}"*'
+
+
+def lexical_query(search_params: Dict[str, Any]) -> str:
+    """Выражение FTS5 по словам критериев поиска и годам периода (через OR)."""
+    text = " ".join(
+        str(search_params.get(field) or "")
+        for field in ("event_type", "industry", "country", "period")
+    ).lower()
+    words = [w for w in _TERM_RE.findall(text) if len(w) > 2 and w not in _STOP_WORDS]
+    period = period_range(search_params)
+    if period:
+        words += [str(year) for year in range(period[0].year, period[1].year + 1)]
+    terms = list(dict.fromkeys(_term_query(w) for w in words))
+    return " OR ".join(terms)
+
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    if len(values) == 0:
+        return values
+    low, high = float(values.min()), float(values.max())
+    if high - low < 1e-9:
+        return np.ones_like(values)
+    return (values - low) / (high - low)
+
+
+def _mmr_select(
+    relevance: np.ndarray,
+    similarity: np.ndarray,
+    min_k: int,
+    max_k: int,
+    min_relevance: float,
+    mmr_lambda: float,
+) -> List[int]:
+    selected: List[int] = []
+    available = np.ones(len(relevance), dtype=bool)
+    redundancy = np.full(len(relevance), -1.0, dtype=np.float32)
+    while len(selected) < max_k:
+        pool = available.copy()
+        if len(selected) >= min_k:
+            pool &= relevance >= min_relevance
+        if not pool.any():
+            break
+        scores = np.where(pool, mmr_lambda * relevance - (1 - mmr_lambda) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
+
+
+def retrieve(
+    query_vector: List[float], search_params: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Возвращает (чанки по убыванию отбора MMR, статистика). score чанка —
+    смешанная нормированная релевантность в [0, 1].
+    """
+    candidates_k = settings.HYBRID_CANDIDATES
+    match = lexical_query(search_params)
+    lexical: List[Dict[str, Any]] = []
+    # Кандидаты и их векторы читаются под одной блокировкой индекса: иначе
+    # уплотнение между вызовами перенумерует строки и векторы не совпадут с чанками
+    with vector_index.snapshot():
+        dense = vector_index.search(query_vector, candidates_k)
+        if match:
+            try:
+                lexical = vector_index.search_text(match, candidates_k)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Лексический поиск не выполнен ({match}): {e}")
+
+        candidates: Dict[int, Dict[str, Any]] = {doc["row"]: doc for doc in dense}
+        for doc in lexical:
+            candidates.setdefault(doc["row"], doc)
+        if not candidates:
+            return [], {"dense": 0, "lexical": 0, "selected": 0}
+        rows = list(candidates)
+        vectors = vector_index.vectors_for(rows)
+
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    dense_scores = vectors @ query
+    lexical_by_row = {doc["row"]: doc["score"] for doc in lexical}
+    lexical_scores = np.asarray([lexical_by_row.get(row, 0.0) for row in rows], dtype=np.float32)
+    if lexical_scores.max() > 0:
+        lexical_scores = lexical_scores / lexical_scores.max()
+    relevance = _DENSE_WEIGHT * _normalize(dense_scores) + (1 - _DENSE_WEIGHT) * lexical_scores
+
+    similarity = vectors @ vectors.T
+    sources = np.asarray([candidates[row]["source"] for row in rows], dtype=object)
+    same_source = sources[:, None] == sources[None, :]
+    similarity = np.where(same_source, np.maximum(similarity, _SAME_SOURCE_SIMILARITY), similarity)
+
+    selected = _mmr_select(
+        relevance,
+        similarity,
+        min_k=settings.HYBRID_MIN_K,
+        max_k=settings.VECTOR_SEARCH_K,
+        min_relevance=settings.HYBRID_MIN_RELEVANCE,
+        mmr_lambda=settings.HYBRID_MMR_LAMBDA,
+    )
+    docs = [
+        {
+            "text": candidates[rows[i]]["text"],
+            "source": candidates[rows[i]]["source"],
+            "crawled_at": candidates[rows[i]]["crawled_at"],
+            "score": float(relevance[i]),
+        }
+        for i in selected
+    ]
+    stats = {
+        "dense": len(dense),
+        "lexical": len(lexical),
+        "both": len(set(d["row"] for d in dense) & set(lexical_by_row)),
+        "selected": len(docs),
+        "sources": len({doc["source"] for doc in docs}),
+    }
+    return docs, stats
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import httpx
+
+from src.config import settings
+from src.services.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# Параметры ссылок, которые не влияют на содержимое страницы: utm_* по
+# префиксу, остальные — точным совпадением имени (from, fromDate и т. п.
+# у листингов задают фильтр и остаются в ключе)
+_TRACKING_PARAM_PREFIX = "utm_"
+_TRACKING_PARAMS = frozenset({"yclid", "gclid", "fbclid", "_openstat", "ysclid", "_ga"})
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name.startswith(_TRACKING_PARAM_PREFIX) or name in _TRACKING_PARAMS
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Приводит ссылку к каноническому виду для ключа кэша: схема и хост в нижнем
+    регистре, без www, фрагмента, трекинговых параметров и завершающего слэша.
+    """
+    parsed = urlparse(url.strip())
+    netloc = parsed.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    query = urlencode(
+        sorted(
+            (k, v)
+            for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+            if not _is_tracking_param(k)
+        )
+    )
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse(((parsed.scheme or "https").lower(), netloc, path, "", query, ""))
+
+
+class PageCache:
+    """
+    Дисковый кэш извлеченного текста страниц (SQLite).
+
+    - ключ — каноническая ссылка, хранится уже извлеченный текст, а не HTML;
+    - запись свежая в течение ttl_seconds, после этого ее можно дешево
+      перепроверить условным запросом (ETag / Last-Modified);
+    - суммарный размер ограничен max_bytes, вытесняются давно не читанные записи (LRU).
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: int, max_bytes: int):
+        self._db_path = db_path
+        self._ttl_seconds = ttl_seconds
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages (last_access)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["fetched_at"] < self._ttl_seconds
+
+    def _get_sync(self, url: str) -> Optional[Dict[str, Any]]:
+        key = canonicalize_url(url)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT text, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), key)
+            )
+            conn.commit()
+        return {
+            "text": row[0],
+            "etag": row[1],
+            "last_modified": row[2],
+            "fetched_at": row[3],
+        }
+
+    def _put_sync(
+        self,
+        url: str,
+        text: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> None:
+        key = canonicalize_url(url)
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, text, etag, last_modified, now, now, size),
+            )
+            self._evict_locked(conn)
+            conn.commit()
+
+    def _evict_locked(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self._max_bytes:
+            return
+        evicted = 0
+        for url, size in conn.execute(
+            "SELECT url, size FROM pages ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self._max_bytes:
+                break
+            conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+        logger.info(f"Кэш страниц: вытеснено {evicted} записей по LRU.")
+
+    def _touch_sync(self, url: str) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE pages SET fetched_at = ?, last_access = ? WHERE url = ?",
+                (now, now, canonicalize_url(url)),
+            )
+            conn.commit()
+
+    async def get(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.to_thread(self._get_sync, url)
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка чтения кэша страниц для {url}: {e}")
+            return None
+
+    async def put(
+        self,
+        url: str,
+        text: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        try:
+            await asyncio.to_thread(self._put_sync, url, text, etag, last_modified)
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка записи в кэш страниц для {url}: {e}")
+
+    async def revalidate(self, url: str, entry: Dict[str, Any]) -> bool:
+        """
+        Перепроверяет устаревшую запись условным запросом.
+        Возвращает True, если сервер ответил 304 и запись продлена.
+        """
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        if not headers:
+            return False
+        try:
+            # Тело ответа не читаем: при 200 страницу все равно нужно отрендерить заново
+            async with get_http_client().stream("GET", url, headers=headers) as response:
+                not_modified = response.status_code == 304
+        except httpx.HTTPError as e:
+            logger.debug(f"Не удалось перепроверить {url}: {e}")
+            return False
+        if not not_modified:
+            return False
+        try:
+            await asyncio.to_thread(self._touch_sync, url)
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка продления записи кэша страниц для {url}: {e}")
+            return False
+        logger.info(f"Кэш страниц: {url} не изменилась (304), запись продлена.")
+        return True
+
+    async def get_valid_text(self, url: str) -> Optional[str]:
+        """Возвращает текст из кэша, если запись свежая или подтверждена сервером."""
+        entry = await self.get(url)
+        if entry is None:
+            return None
+        if self.is_fresh(entry) or await self.revalidate(url, entry):
+            return entry["text"]
+        return None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+page_cache = PageCache(
+    db_path=settings.PAGE_CACHE_PATH,
+    ttl_seconds=settings.PAGE_CACHE_TTL_SECONDS,
+    max_bytes=settings.PAGE_CACHE_MAX_BYTES,
+)
@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from bs4 import BeautifulSoup
+
+from src.config import settings, GOLDEN_LIST_URLS
+from src.services.http_client import get_http_client
+from src.services.page_cache import canonicalize_url, page_cache
+from src.services.scrape_scheduler import scrape_scheduler
+from src.services.vector_index import vector_index
+
+logger = logging.getLogger(__name__)
+
+# Идентификатор задачи обхода в планировщике загрузок: обход получает
+# свою долю слотов наравне с каждым пользовательским поиском, не больше
+PRE_CRAWL_JOB_ID = "pre-crawl"
+
+_PAGINATION_HREF_RE = re.compile(
+    r"[?&](?:page|p|pg|PAGEN_\d+|start|offset)=\d+|/page/?\d+/?$|/p\d+/?$", re.IGNORECASE
+)
+_PAGINATION_TEXT_RE = re.compile(
+    r"^(?:\d{1,3}|далее|дальше|следующая|вперед|next|»|›|→|>)$", re.IGNORECASE
+)
+
+
+def find_pagination_links(html_content: str, page_url: str, seed_url: str) -> List[str]:
+    """
+    Ссылки на следующие страницы списка: rel="next", номера страниц и
+    параметры пагинации в ссылке. Учитываются только ссылки того же сайта
+    внутри раздела стартовой страницы.
+    """
+    seed = urlparse(seed_url)
+    section = seed.path.rstrip("/")
+    soup = BeautifulSoup(html_content, "lxml")
+    links = []
+    for a in soup.find_all("a", href=True):
+        href = urljoin(page_url, a["href"])
+        parsed = urlparse(href)
+        if parsed.scheme not in ("http", "https") or parsed.netloc != seed.netloc:
+            continue
+        if not parsed.path.rstrip("/").startswith(section):
+            continue
+        is_next = "next" in (a.get("rel") or [])
+        if (
+            is_next
+            or _PAGINATION_HREF_RE.search(href)
+            or _PAGINATION_TEXT_RE.match(a.get_text(strip=True))
+        ):
+            links.append(href.split("#")[0])
+    return list(dict.fromkeys(links))
+
+
+class CrawlState:
+    """Отпечатки обойденных страниц для инкрементального обхода (SQLite)."""
+
+    def __init__(self, db_path: str):
+        self._db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    crawled_at REAL NOT NULL,
+                    changed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def get_hash(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT content_hash FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save(self, url: str, content_hash: str, changed: bool) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                """
+                INSERT INTO pages VALUES (?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    crawled_at = excluded.crawled_at,
+                    changed_at = CASE WHEN ? THEN excluded.changed_at ELSE changed_at END
+                """,
+                (url, content_hash, now, now, changed),
+            )
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class PreCrawler:
+    """
+    Фоновый обход сайтов-агрегаторов мероприятий.
+
+    Раз в interval_seconds проходит стартовые страницы и их пагинацию,
+    извлекает текст, кладет его в кэш страниц и векторный индекс, чтобы
+    пользовательские поиски находили эти сайты уже обработанными.
+    - вежливость: страницы одного сайта загружаются по очереди с паузой
+      delay_seconds (со случайным разбросом), запреты robots.txt соблюдаются;
+    - инкрементальность: если текст страницы не изменился с прошлого обхода,
+      она не нарезается и не эмбеддится заново, ее чанки только продлеваются.
+    """
+
+    def __init__(
+        self,
+        seed_urls: List[str],
+        state: CrawlState,
+        interval_seconds: int,
+        max_pages_per_site: int,
+        delay_seconds: float,
+    ):
+        self.seed_urls = seed_urls
+        self.state = state
+        self.interval_seconds = interval_seconds
+        self.max_pages_per_site = max_pages_per_site
+        self.delay_seconds = delay_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def _load_robots(self, seed_url: str) -> Optional[RobotFileParser]:
+        parsed = urlparse(seed_url)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        try:
+            response = await get_http_client().get(robots_url)
+        except httpx.HTTPError as e:
+            logger.debug(f"Не удалось загрузить {robots_url}: {e}")
+            return None
+        if response.status_code != 200:
+            return None
+        parser = RobotFileParser(robots_url)
+        parser.parse(response.text.splitlines())
+        return parser
+
+    async def _crawl_page(self, url: str, seed_url: str) -> Tuple[str, List[str]]:
+        """Обрабатывает одну страницу. Возвращает (статус, ссылки пагинации)."""
+        # Отложенный импорт: поиск тянет браузер и модель, а обходчик нужен
+        # и без них (разбор пагинации, состояние обхода)
+        from src.services.event_search_service import fetch_page, index_page_text
+
+        async with scrape_scheduler.slot(PRE_CRAWL_JOB_ID, url):
+            html_content, text, headers = await fetch_page(url)
+        if not text:
+            return "failed", []
+        # Разбор HTML и SQLite состояния — в потоках, чтобы обход не тормозил бота
+        links = await asyncio.to_thread(find_pagination_links, html_content, url, seed_url)
+        await page_cache.put(url, text, headers.get("etag"), headers.get("last-modified"))
+
+        content_hash = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        if await asyncio.to_thread(self.state.get_hash, url) == content_hash:
+            # Чанков может не оказаться, если индекс вытеснил их или был очищен
+            if await asyncio.to_thread(vector_index.touch_source, url):
+                await asyncio.to_thread(self.state.save, url, content_hash, False)
+                return "unchanged", links
+
+        await index_page_text(url, text)
+        await asyncio.to_thread(self.state.save, url, content_hash, True)
+        return "changed", links
+
+    async def _crawl_site(self, seed_url: str) -> Dict[str, int]:
+        stats = {"changed": 0, "unchanged": 0, "failed": 0, "disallowed": 0}
+        robots = await self._load_robots(seed_url)
+        queue = [seed_url]
+        visited = set()
+        while queue and len(visited) < self.max_pages_per_site:
+            url = queue.pop(0)
+            key = canonicalize_url(url)
+            if key in visited:
+                continue
+            visited.add(key)
+            if robots is not None and not robots.can_fetch(settings.USER_AGENT, url):
+                stats["disallowed"] += 1
+                continue
+            try:
+                status, links = await self._crawl_page(url, seed_url)
+            except Exception as e:
+                logger.warning(f"Фоновый обход: ошибка на странице {url}: {e}")
+                status, links = "failed", []
+            stats[status] += 1
+            queue.extend(link for link in links if canonicalize_url(link) not in visited)
+            await asyncio.sleep(self.delay_seconds * random.uniform(0.75, 1.5))
+        return stats
+
+    async def crawl_once(self) -> None:
+        """Один проход по всем агрегаторам; разные сайты обходятся параллельно."""
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *[self._crawl_site(url) for url in self.seed_urls], return_exceptions=True
+        )
+        for seed_url, result in zip(self.seed_urls, results):
+            if isinstance(result, Exception):
+                logger.error(f"Фоновый обход {seed_url} прерван: {result}", exc_info=result)
+            else:
+                logger.info(f"Фоновый обход {seed_url}: {result}")
+        logger.info(
+            f"Фоновый обход агрегаторов завершен за {time.perf_counter() - started:.0f} с. "
+            f"Индекс: {vector_index.stats()}"
+        )
+
+    async def _run(self) -> None:
+        from src.services.event_search_service import wait_until_search_ready
+
+        if not await wait_until_search_ready():
+            logger.error("Фоновый обход не запущен: поиск не готов к работе.")
+            return
+        while True:
+            try:
+                await self.crawl_once()
+            except Exception as e:
+                logger.error(f"Ошибка фонового обхода: {e}", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self.state.close()
+
+
+pre_crawler = PreCrawler(
+    GOLDEN_LIST_URLS,
+    CrawlState(settings.PRE_CRAWL_STATE_PATH),
+    interval_seconds=settings.PRE_CRAWL_INTERVAL_SECONDS,
+    max_pages_per_site=settings.PRE_CRAWL_MAX_PAGES_PER_SITE,
+    delay_seconds=settings.PRE_CRAWL_DELAY_SECONDS,
+)
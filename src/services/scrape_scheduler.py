@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Any, Optional
+from urllib.parse import urlparse
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def get_domain(url: str) -> str:
+    """Возвращает домен ссылки без префикса www."""
+    netloc = urlparse(url).netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+class _Waiter:
+    __slots__ = ("job_id", "domain", "future", "enqueued_at")
+
+    def __init__(self, job_id: str, domain: str, future: asyncio.Future):
+        self.job_id = job_id
+        self.domain = domain
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class ScrapeScheduler:
+    """
+    Планировщик загрузок страниц с тремя ограничениями:
+    - глобальный лимит одновременных загрузок;
+    - лимит на один домен;
+    - справедливая доля на задачу (поиск пользователя): слоты раздаются
+      по кругу между задачами, и ни одна задача не занимает больше
+      ceil(global_limit / число_активных_задач) слотов, пока ждут другие.
+    """
+
+    def __init__(self, max_concurrency: int, per_domain_limit: int):
+        self._max_concurrency = max_concurrency
+        self._per_domain_limit = per_domain_limit
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._active_total = 0
+        self._active_by_domain: Dict[str, int] = defaultdict(int)
+        self._active_by_job: Dict[str, int] = defaultdict(int)
+        self._wait_times: Deque[float] = deque(maxlen=500)
+        self._granted_total = 0
+
+    def _fair_share(self) -> int:
+        jobs = set(self._queues) | {j for j, n in self._active_by_job.items() if n > 0}
+        return max(1, math.ceil(self._max_concurrency / max(1, len(jobs))))
+
+    def _dispatch(self) -> None:
+        """Раздает свободные слоты ожидающим, обходя задачи по кругу."""
+        while self._active_total < self._max_concurrency and self._queues:
+            fair_share = self._fair_share()
+            granted = None
+            for job_id in list(self._queues):
+                if self._active_by_job.get(job_id, 0) >= fair_share:
+                    continue
+                queue = self._queues[job_id]
+                for waiter in queue:
+                    if waiter.future.done():
+                        continue
+                    if self._active_by_domain.get(waiter.domain, 0) < self._per_domain_limit:
+                        granted = waiter
+                        break
+                if granted:
+                    queue.remove(granted)
+                    if queue:
+                        # Задача уходит в конец очереди обхода
+                        self._queues.move_to_end(job_id)
+                    else:
+                        del self._queues[job_id]
+                    break
+            if granted is None:
+                return
+            self._active_total += 1
+            self._active_by_domain[granted.domain] += 1
+            self._active_by_job[granted.job_id] += 1
+            self._granted_total += 1
+            self._wait_times.append(time.monotonic() - granted.enqueued_at)
+            granted.future.set_result(None)
+
+    def _release(self, job_id: str, domain: str) -> None:
+        self._active_total -= 1
+        self._active_by_domain[domain] -= 1
+        if self._active_by_domain[domain] <= 0:
+            del self._active_by_domain[domain]
+        self._active_by_job[job_id] -= 1
+        if self._active_by_job[job_id] <= 0:
+            del self._active_by_job[job_id]
+        self._dispatch()
+
+    def _remove_waiter(self, waiter: _Waiter) -> None:
+        queue = self._queues.get(waiter.job_id)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[waiter.job_id]
+
+    @asynccontextmanager
+    async def slot(self, job_id: str, url: str) -> AsyncIterator[None]:
+        """Ждет свободного слота для загрузки url в рамках задачи job_id."""
+        domain = get_domain(url)
+        waiter = _Waiter(job_id, domain, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(job_id, deque()).append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Слот успели выдать до отмены — возвращаем его
+                self._release(job_id, domain)
+            else:
+                self._remove_waiter(waiter)
+            raise
+        waited = time.monotonic() - waiter.enqueued_at
+        if waited > 5:
+            logger.info(
+                f"Планировщик: задача '{job_id}' ждала слот для {domain} {waited:.1f} с "
+                f"(в очереди: {self.stats()['queue_depth']})."
+            )
+        try:
+            yield
+        finally:
+            self._release(job_id, domain)
+
+    def stats(self, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Снимок состояния очереди: глубина, активные слоты и время ожидания."""
+        waits = list(self._wait_times)
+        result = {
+            "queue_depth": sum(len(q) for q in self._queues.values()),
+            "queue_depth_by_job": {j: len(q) for j, q in self._queues.items()},
+            "active": self._active_total,
+            "active_by_domain": dict(self._active_by_domain),
+            "granted_total": self._granted_total,
+            "avg_wait_s": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "max_wait_s": round(max(waits), 3) if waits else 0.0,
+        }
+        if job_id is not None:
+            result["job_queue_depth"] = len(self._queues.get(job_id, ()))
+            result["job_active"] = self._active_by_job.get(job_id, 0)
+        return result
+
+
+scrape_scheduler = ScrapeScheduler(
+    max_concurrency=settings.SCRAPE_MAX_CONCURRENCY,
+    per_domain_limit=settings.SCRAPE_PER_DOMAIN_LIMIT,
+)
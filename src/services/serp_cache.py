@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+SerpResults = List[Dict[str, str]]
+
+
+def normalize_query(query: str) -> str:
+    """
+    Нормализует поисковый запрос для ключа кэша: нижний регистр, ё -> е,
+    без лишней пунктуации и с отсортированными словами, чтобы
+    'Выставки Китай 2025' и 'китай выставки, 2025' давали один ключ.
+    """
+    text = query.lower().replace("ё", "е")
+    # Оставляем ':' и '.' — они значимы в операторах вида site:expomap.ru
+    text = re.sub(r"[^\w\s:.\-]", " ", text)
+    tokens = sorted(set(text.split()))
+    return " ".join(tokens)
+
+
+class SerpCache:
+    """
+    Кэш списков ссылок из поисковой выдачи с TTL и single-flight:
+    одинаковые запросы, пришедшие одновременно, разделяют одну загрузку.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, SerpResults]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.in_flight_joins = 0
+
+    def _get_fresh(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, results = entry
+        if time.monotonic() - stored_at > self._ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return results
+
+    def _store(self, key: str, results: SerpResults) -> None:
+        self._entries[key] = (time.monotonic(), results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(
+        self, query: str, fetcher: Callable[[], Awaitable[SerpResults]]
+    ) -> SerpResults:
+        key = normalize_query(query)
+        cached = self._get_fresh(key)
+        if cached is not None:
+            self.hits += 1
+            logger.info(f"Кэш выдачи: попадание для запроса '{query}'.")
+            return list(cached)
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.in_flight_joins += 1
+            logger.info(f"Кэш выдачи: запрос '{query}' присоединен к уже идущей загрузке.")
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetcher())
+            self._in_flight[key] = task
+
+            def _on_done(t: asyncio.Task, key: str = key) -> None:
+                self._in_flight.pop(key, None)
+                # Пустую выдачу не кэшируем: чаще всего это капча или сбой
+                if not t.cancelled() and t.exception() is None and t.result():
+                    self._store(key, t.result())
+
+            task.add_done_callback(_on_done)
+
+        # shield: отмена одного ожидающего не должна прерывать загрузку для остальных
+        results = await asyncio.shield(task)
+        return list(results)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.in_flight_joins
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "in_flight_joins": self.in_flight_joins,
+            "hit_ratio": round((self.hits + self.in_flight_joins) / lookups, 3)
+            if lookups
+            else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+serp_cache = SerpCache(
+    ttl_seconds=settings.SERP_CACHE_TTL_SECONDS,
+    max_entries=settings.SERP_CACHE_MAX_ENTRIES,
+)
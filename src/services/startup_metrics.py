@@ -0,0 +1,43 @@
+"""
+Замеры времени запуска бота: импорты, готовность тяжелых ресурсов
+и время до первого ответа пользователю. Модуль импортируется первым
+в main.py, поэтому отсчет идет практически от старта процесса.
+Подробная разбивка импортов по модулям: python -X importtime main.py
+"""
+
+import logging
+import time
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROCESS_START = time.perf_counter()
+_marks: List[Tuple[str, float]] = []
+_first_reply_sent = False
+
+
+def mark(name: str) -> float:
+    """Отмечает этап запуска и возвращает время от старта процесса в секундах."""
+    elapsed = time.perf_counter() - PROCESS_START
+    _marks.append((name, elapsed))
+    logger.info(f"Запуск: '{name}' через {elapsed:.2f} с от старта процесса.")
+    return elapsed
+
+
+def mark_first_reply() -> None:
+    """Отмечает первый ответ пользователю и выводит сводку по этапам запуска."""
+    global _first_reply_sent
+    if _first_reply_sent:
+        return
+    _first_reply_sent = True
+    mark("первый ответ пользователю")
+    report()
+
+
+def report() -> None:
+    previous = 0.0
+    lines = []
+    for name, elapsed in sorted(_marks, key=lambda m: m[1]):
+        lines.append(f"  {name:<40} {elapsed:7.2f} с (+{elapsed - previous:.2f})")
+        previous = elapsed
+    logger.info("Сводка по запуску:\n" + "\n".join(lines))
@@ -0,0 +1,140 @@
+import asyncio
+import codecs
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from src.config import settings
+from src.services.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_STATIC = "static"
+STRATEGY_BROWSER = "browser"
+
+# <meta charset="..."> или <meta http-equiv="Content-Type" content="...; charset=...">
+# в начале документа
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+_META_CHARSET_SCAN_BYTES = 4096
+
+
+class FetchStrategyRegistry:
+    """
+    Запоминает для каждого домена, хватает ли обычного HTTP-запроса
+    или страницы нужно рендерить в браузере. Решения сохраняются на диск
+    и пересматриваются после ttl_seconds.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, js_domains):
+        self._path = path
+        self._ttl_seconds = ttl_seconds
+        self._js_domains = set(js_domains)
+        self._lock = threading.Lock()
+        self._decisions: Optional[Dict[str, Dict]] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._decisions is None:
+            try:
+                with open(self._path, "r", encoding="utf-8") as f:
+                    self._decisions = json.load(f)
+            except FileNotFoundError:
+                self._decisions = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Не удалось прочитать стратегии загрузки доменов: {e}")
+                self._decisions = {}
+        return self._decisions
+
+    def get(self, domain: str) -> Optional[str]:
+        if domain in self._js_domains:
+            return STRATEGY_BROWSER
+        with self._lock:
+            decision = self._load().get(domain)
+        if decision and time.time() - decision["updated_at"] < self._ttl_seconds:
+            return decision["mode"]
+        return None
+
+    async def remember(self, domain: str, mode: str) -> None:
+        """Запоминает стратегию домена; запись файла идет вне цикла событий."""
+        await asyncio.to_thread(self._remember, domain, mode)
+
+    def _remember(self, domain: str, mode: str) -> None:
+        with self._lock:
+            decisions = self._load()
+            previous = decisions.get(domain, {})
+            if (
+                previous.get("mode") == mode
+                and time.time() - previous["updated_at"] < self._ttl_seconds / 2
+            ):
+                return
+            decisions[domain] = {"mode": mode, "updated_at": time.time()}
+            try:
+                os.makedirs(os.path.dirname(self._path), exist_ok=True)
+                tmp_path = f"{self._path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(decisions, f, ensure_ascii=False)
+                os.replace(tmp_path, self._path)
+            except OSError as e:
+                logger.warning(f"Не удалось сохранить стратегии загрузки доменов: {e}")
+        if previous.get("mode") != mode:
+            logger.info(f"Стратегия загрузки для домена {domain}: {mode}.")
+
+
+def _detect_encoding(body: bytes, header_charset: Optional[str]) -> str:
+    """
+    Кодировка страницы: из заголовка Content-Type, иначе из <meta charset>
+    (многие русскоязычные сайты отдают windows-1251 без charset в заголовке),
+    иначе utf-8.
+    """
+    candidates = [header_charset]
+    match = _META_CHARSET_RE.search(body[:_META_CHARSET_SCAN_BYTES])
+    if match:
+        candidates.append(match.group(1).decode("ascii", errors="ignore"))
+    for candidate in candidates:
+        if not candidate:
+            continue
+        try:
+            return codecs.lookup(candidate).name
+        except LookupError:
+            continue
+    return "utf-8"
+
+
+async def fetch_static_html(url: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    Загружает HTML обычным HTTP-запросом без браузера.
+    Возвращает (html, заголовки ответа) или None, если страница недоступна
+    или это не HTML-документ.
+    """
+    try:
+        async with get_http_client().stream("GET", url) as response:
+            if response.status_code != 200:
+                logger.debug(f"Статическая загрузка {url}: HTTP {response.status_code}")
+                return None
+            content_type = response.headers.get("content-type", "")
+            if "html" not in content_type:
+                logger.debug(f"Статическая загрузка {url}: не HTML ({content_type})")
+                return None
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) > settings.STATIC_FETCH_MAX_BYTES:
+                    logger.debug(f"Статическая загрузка {url}: страница слишком большая")
+                    return None
+            encoding = _detect_encoding(bytes(body), response.charset_encoding)
+            return bytes(body).decode(encoding, errors="replace"), dict(response.headers)
+    except httpx.HTTPError as e:
+        logger.debug(f"Статическая загрузка {url} не удалась: {e}")
+        return None
+
+
+fetch_strategy = FetchStrategyRegistry(
+    path=settings.FETCH_STRATEGY_PATH,
+    ttl_seconds=settings.FETCH_STRATEGY_TTL_SECONDS,
+    js_domains=settings.JS_REQUIRED_DOMAINS,
+)
@@ -0,0 +1,384 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, ContextManager, Dict, List, Optional
+
+import numpy as np
+
+from src.config import settings
+from src.services.embedding_backend import embedding_variant_dir_name
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_hash(source: str, text: str) -> str:
+    payload = f"{source}\0{text}".encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class VectorIndex:
+    """
+    Долгоживущий дисковый индекс эмбеддингов чанков.
+
+    - векторы (float32, нормированные) дописываются в плоский файл и читаются
+      через np.memmap, поэтому после рестарта индекс доступен сразу;
+    - метаданные (источник, время обхода, текст) лежат в SQLite;
+    - страницы добавляются инкрементально: при повторном обходе источника
+      его исчезнувшие чанки помечаются удаленными;
+    - устаревшие по времени обхода чанки вытесняются, а файл векторов
+      переписывается (compact), когда удаленных строк становится много.
+    """
+
+    def __init__(self, directory: str, max_age_seconds: int, compact_ratio: float = 0.3):
+        self._directory = directory
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._db_path = os.path.join(directory, "chunks.sqlite3")
+        self._max_age_seconds = max_age_seconds
+        self._compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._dim: Optional[int] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._hash_to_row: Dict[str, int] = {}
+        self._mmap: Optional[np.memmap] = None
+        self._last_eviction = 0.0
+
+    # --- Загрузка и хранение ---
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self._directory, exist_ok=True)
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    row INTEGER PRIMARY KEY,
+                    chunk_hash TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    crawled_at REAL NOT NULL,
+                    text TEXT NOT NULL,
+                    deleted INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks (source)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_crawled ON chunks (crawled_at)")
+            # Лексический индекс чанков для гибридного поиска. REPLACE в add_page
+            # удаляет строки, поэтому триггеры должны срабатывать и на них
+            conn.execute("PRAGMA recursive_triggers = ON")
+            fts_exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'chunks_fts'"
+            ).fetchone()
+            conn.executescript(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                    text, content='chunks', content_rowid='row'
+                );
+                CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                    INSERT INTO chunks_fts (rowid, text) VALUES (new.row, new.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                    INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', old.row, old.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE OF text ON chunks BEGIN
+                    INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', old.row, old.text);
+                    INSERT INTO chunks_fts (rowid, text) VALUES (new.row, new.text);
+                END;
+                """
+            )
+            if not fts_exists:
+                # Индекс, созданный до появления лексического поиска
+                conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+                conn.commit()
+            self._conn = conn
+            self._load_state()
+        return self._conn
+
+    def _load_state(self) -> None:
+        conn = self._conn
+        dim_row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self._dim = int(dim_row[0]) if dim_row else None
+        rows = self._row_count()
+        # Строки без метаданных (сбой между записью вектора и коммитом) считаем удаленными
+        self._alive = np.zeros(rows, dtype=bool)
+        self._hash_to_row = {}
+        for row, h in conn.execute(
+            "SELECT row, chunk_hash FROM chunks WHERE deleted = 0 AND row < ?", (rows,)
+        ):
+            self._alive[row] = True
+            self._hash_to_row[h] = row
+        self._mmap = None
+        logger.info(
+            f"Векторный индекс загружен: {int(self._alive.sum())} активных чанков из {rows}."
+        )
+
+    def _row_count(self) -> int:
+        if self._dim is None or not os.path.exists(self._vectors_path):
+            return 0
+        return os.path.getsize(self._vectors_path) // (self._dim * 4)
+
+    def _vectors(self) -> np.ndarray:
+        rows = self._row_count()
+        if rows == 0:
+            return np.zeros((0, self._dim or 0), dtype=np.float32)
+        if self._mmap is None or self._mmap.shape[0] != rows:
+            self._mmap = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim)
+            )
+        return self._mmap
+
+    def load(self) -> None:
+        """Открывает индекс с диска (векторы отображаются в память через memmap)."""
+        with self._lock:
+            self._connect()
+            self._vectors()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self.compact()
+                self._conn.close()
+                self._conn = None
+            self._mmap = None
+
+    # --- Изменение индекса ---
+
+    def add_page(
+        self,
+        source: str,
+        texts: List[str],
+        vectors: List[List[float]],
+        crawled_at: Optional[float] = None,
+    ) -> int:
+        """
+        Добавляет чанки страницы. Уже известные чанки только продлеваются,
+        чанки источника, которых больше нет на странице, удаляются.
+        Возвращает число новых строк.
+        """
+        if not texts:
+            return 0
+        crawled_at = crawled_at or time.time()
+        with self._lock:
+            conn = self._connect()
+            hashes = [chunk_hash(source, t) for t in texts]
+            new_items = [
+                (h, t, v)
+                for h, t, v in zip(hashes, texts, vectors)
+                if h not in self._hash_to_row
+            ]
+            # Дубли внутри одной страницы
+            new_items = list({h: (h, t, v) for h, t, v in new_items}.values())
+
+            known = [h for h in set(hashes) if h in self._hash_to_row]
+            conn.executemany(
+                "UPDATE chunks SET crawled_at = ? WHERE row = ?",
+                [(crawled_at, self._hash_to_row[h]) for h in known],
+            )
+            known_rows = {self._hash_to_row[h] for h in known}
+            stale_rows = [
+                row
+                for (row,) in conn.execute(
+                    "SELECT row FROM chunks WHERE source = ? AND deleted = 0", (source,)
+                )
+                if row not in known_rows
+            ]
+            self._mark_deleted(conn, stale_rows)
+
+            if new_items:
+                array = np.asarray([v for _, _, v in new_items], dtype=np.float32)
+                norms = np.linalg.norm(array, axis=1, keepdims=True)
+                array = array / np.maximum(norms, 1e-12)
+                if self._dim is None:
+                    self._dim = array.shape[1]
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (str(self._dim),))
+                first_row = self._row_count()
+                with open(self._vectors_path, "ab") as f:
+                    f.write(array.tobytes())
+                conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (row, chunk_hash, source, crawled_at, text) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (first_row + i, h, source, crawled_at, t)
+                        for i, (h, t, _) in enumerate(new_items)
+                    ],
+                )
+                self._alive = np.concatenate(
+                    [self._alive, np.ones(len(new_items), dtype=bool)]
+                )
+                for i, (h, _, _) in enumerate(new_items):
+                    self._hash_to_row[h] = first_row + i
+            conn.commit()
+            return len(new_items)
+
+    def _mark_deleted(self, conn: sqlite3.Connection, rows: List[int]) -> None:
+        if not rows:
+            return
+        for start in range(0, len(rows), 500):
+            batch = rows[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for (h,) in conn.execute(
+                f"SELECT chunk_hash FROM chunks WHERE row IN ({placeholders})", batch
+            ):
+                self._hash_to_row.pop(h, None)
+        conn.executemany("UPDATE chunks SET deleted = 1 WHERE row = ?", [(r,) for r in rows])
+        for row in rows:
+            if row < len(self._alive):
+                self._alive[row] = False
+
+    def touch_source(self, source: str, crawled_at: Optional[float] = None) -> int:
+        """Продлевает чанки страницы, содержимое которой не изменилось. Возвращает их число."""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "UPDATE chunks SET crawled_at = ? WHERE source = ? AND deleted = 0",
+                (crawled_at or time.time(), source),
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def evict_stale(self, force: bool = False) -> int:
+        """Удаляет чанки, обойденные раньше max_age_seconds назад (не чаще раза в час)."""
+        now = time.time()
+        if not force and now - self._last_eviction < 3600:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            self._last_eviction = now
+            rows = [
+                row
+                for (row,) in conn.execute(
+                    "SELECT row FROM chunks WHERE deleted = 0 AND crawled_at < ?",
+                    (now - self._max_age_seconds,),
+                )
+            ]
+            self._mark_deleted(conn, rows)
+            conn.commit()
+            if rows:
+                logger.info(f"Векторный индекс: вытеснено {len(rows)} устаревших чанков.")
+            self.compact()
+            return len(rows)
+
+    def compact(self) -> None:
+        """Переписывает файл векторов без удаленных строк, если их доля велика."""
+        with self._lock:
+            conn = self._connect()
+            total = len(self._alive)
+            dead = total - int(self._alive.sum())
+            if total == 0 or dead / total < self._compact_ratio:
+                return
+            vectors = self._vectors()
+            alive_rows = np.flatnonzero(self._alive)
+            tmp_path = f"{self._vectors_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                for start in range(0, len(alive_rows), 10000):
+                    f.write(np.asarray(vectors[alive_rows[start : start + 10000]]).tobytes())
+            self._mmap = None
+            remap = {int(old): new for new, old in enumerate(alive_rows)}
+            # Строки за концом файла векторов (запись прервалась между SQLite
+            # и файлом) не попадают в remap: удаляем их вместе с удаленными,
+            # иначе они остались бы с отрицательными номерами
+            conn.execute("DELETE FROM chunks WHERE deleted = 1 OR row >= ?", (total,))
+            conn.execute("UPDATE chunks SET row = -row - 1")
+            conn.executemany(
+                "UPDATE chunks SET row = ? WHERE row = ?",
+                [(new, -old - 1) for old, new in remap.items()],
+            )
+            # Номера строк сменились — лексический индекс строится заново
+            conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+            conn.commit()
+            os.replace(tmp_path, self._vectors_path)
+            self._load_state()
+            logger.info(f"Векторный индекс уплотнен: удалено {dead} строк.")
+
+    # --- Поиск ---
+
+    def snapshot(self) -> ContextManager:
+        """
+        Блокировка для согласованной серии чтений: пока она удерживается,
+        compact() не перенумерует строки, и номера row из search и search_text
+        остаются действительными для vectors_for.
+        """
+        return self._lock
+
+    def search(self, query_vector: List[float], k: int) -> List[Dict[str, Any]]:
+        """Возвращает k ближайших по косинусу активных чанков с метаданными."""
+        with self._lock:
+            conn = self._connect()
+            vectors = self._vectors()
+            if len(vectors) == 0 or not self._alive.any():
+                return []
+            query = np.asarray(query_vector, dtype=np.float32)
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            scores = np.empty(len(vectors), dtype=np.float32)
+            for start in range(0, len(vectors), 50000):
+                scores[start : start + 50000] = vectors[start : start + 50000] @ query
+            scores[~self._alive[: len(scores)]] = -np.inf
+            k = min(k, int(self._alive.sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            rows = [int(r) for r in top]
+            placeholders = ",".join("?" * len(rows))
+            meta = {
+                row: (source, crawled_at, text)
+                for row, source, crawled_at, text in conn.execute(
+                    f"SELECT row, source, crawled_at, text FROM chunks WHERE row IN ({placeholders})",
+                    rows,
+                )
+            }
+            return [
+                {
+                    "row": row,
+                    "text": meta[row][2],
+                    "source": meta[row][0],
+                    "crawled_at": meta[row][1],
+                    "score": float(scores[row]),
+                }
+                for row in rows
+                if row in meta
+            ]
+
+    def search_text(self, match: str, k: int) -> List[Dict[str, Any]]:
+        """
+        Полнотекстовый поиск активных чанков (FTS5). match — выражение запроса
+        FTS5; score — инвертированный bm25 (больше — лучше).
+        """
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT c.row, c.source, c.crawled_at, c.text, -bm25(chunks_fts) "
+                "FROM chunks_fts JOIN chunks c ON c.row = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? AND c.deleted = 0 "
+                "ORDER BY bm25(chunks_fts) LIMIT ?",
+                (match, k),
+            ).fetchall()
+            return [
+                {"row": row, "text": text, "source": source, "crawled_at": crawled_at, "score": score}
+                for row, source, crawled_at, text, score in rows
+                if row < len(self._alive) and self._alive[row]
+            ]
+
+    def vectors_for(self, rows: List[int]) -> np.ndarray:
+        """Нормированные векторы указанных строк (в том же порядке)."""
+        with self._lock:
+            return np.asarray(self._vectors()[np.asarray(rows, dtype=np.int64)])
+
+    def contains(self, chunk_key: str) -> bool:
+        """Есть ли активный чанк с таким chunk_hash."""
+        with self._lock:
+            return chunk_key in self._hash_to_row
+
+    def stats(self) -> Dict[str, int]:
+        return {"alive": int(self._alive.sum()), "rows": len(self._alive)}
+
+
+vector_index = VectorIndex(
+    directory=os.path.join(settings.VECTOR_INDEX_DIR, embedding_variant_dir_name()),
+    max_age_seconds=settings.VECTOR_INDEX_MAX_AGE_SECONDS,
+)
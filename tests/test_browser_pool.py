@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from src.services.browser_pool import _RecyclingTarget  # noqa: E402
+
+
+class FakeContext:
+    """Persistent-контекст: держит каталог профиля, пока не закрыт."""
+
+    browser = None
+
+    def __init__(self, profiles, user_data_dir):
+        self._profiles = profiles
+        self._user_data_dir = user_data_dir
+        self.closed = False
+
+    def on(self, event, callback):
+        pass
+
+    async def close(self):
+        self.closed = True
+        self._profiles.discard(self._user_data_dir)
+
+
+class FakeLauncher:
+    def __init__(self, user_data_dir="/tmp/profile"):
+        self.user_data_dir = user_data_dir
+        self.profiles = set()
+        self.launched = []
+
+    async def __call__(self, playwright):
+        if self.user_data_dir in self.profiles:
+            raise RuntimeError("ProcessSingleton: профиль уже используется")
+        self.profiles.add(self.user_data_dir)
+        context = FakeContext(self.profiles, self.user_data_dir)
+        self.launched.append(context)
+        return context
+
+
+def test_exclusive_target_waits_for_leases_before_relaunch():
+    async def scenario():
+        launcher = FakeLauncher()
+        target = _RecyclingTarget("search", launcher, max_uses=1, exclusive=True)
+        first = await target.acquire(None)
+
+        # Лимит использований исчерпан, но первый контекст еще занят страницей
+        second_task = asyncio.create_task(target.acquire(None))
+        third_task = asyncio.create_task(target.acquire(None))
+        await asyncio.sleep(0.01)
+        assert not second_task.done() and not third_task.done()
+        assert len(launcher.launched) == 1 and not first.closed
+
+        await target.release(first)
+        second = await asyncio.wait_for(second_task, 1)
+        assert first.closed
+        assert second is launcher.launched[1]
+        await target.release(second)
+        third = await asyncio.wait_for(third_task, 1)
+        await target.release(third)
+        await target.close()
+        assert len(launcher.launched) == 3
+        assert launcher.profiles == set()
+
+    asyncio.run(scenario())
+
+
+def test_shared_target_relaunches_without_waiting():
+    async def scenario():
+        launched = []
+
+        async def launcher(playwright):
+            launched.append(FakeContext(set(), None))
+            return launched[-1]
+
+        target = _RecyclingTarget("scrape", launcher, max_uses=1)
+        first = await target.acquire(None)
+        second = await asyncio.wait_for(target.acquire(None), 1)
+        assert second is not first and not first.closed
+        await target.release(first)
+        assert first.closed
+        await target.release(second)
+        await target.close()
+
+    asyncio.run(scenario())
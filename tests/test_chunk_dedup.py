@@ -0,0 +1,59 @@
+import asyncio
+
+from src.services.chunk_dedup import ChunkDeduplicator, dedup_docs, exact_hash, minhash, similarity
+from src.services.vector_index import chunk_hash
+
+AGGREGATOR = "https://expomap.ru/expo/worldfood/"
+ORGANIZER = "https://worldfood-moscow.ru/about"
+TEXT = (
+    "WorldFood Moscow — международная выставка продуктов питания и напитков. "
+    "Выставка пройдет 23-26 сентября 2025 года в МВЦ Крокус Экспо, павильон 3. "
+    "В экспозиции участвуют производители из 30 стран, ожидается более 25000 посетителей."
+)
+NEAR_COPY = TEXT.replace("более 25000", "свыше 25000")
+OTHER = (
+    "Агропродмаш — выставка оборудования для пищевой и перерабатывающей промышленности. "
+    "Проходит в октябре в Экспоцентре, в деловой программе — конференции и семинары."
+)
+
+
+def _doc(text, source, score):
+    return {"text": f"ИСТОЧНИК: {source}\n\nТЕКСТ: {text}", "source": source, "score": score}
+
+
+def test_minhash_similarity_estimates_jaccard():
+    words, near = TEXT.lower().split(), NEAR_COPY.lower().split()
+    assert similarity(minhash(words), minhash(words)) == 1.0
+    assert similarity(minhash(words), minhash(near)) >= 0.7
+    assert similarity(minhash(words), minhash(OTHER.lower().split())) < 0.2
+    assert exact_hash(words) != exact_hash(near)
+
+
+def test_dedup_docs_keeps_best_source_with_max_score():
+    docs = [
+        _doc(TEXT, AGGREGATOR, 0.9),
+        _doc(NEAR_COPY, ORGANIZER, 0.5),
+        _doc(OTHER, AGGREGATOR, 0.7),
+    ]
+    kept, stats = dedup_docs(docs, min_similarity=0.6)
+    assert [(d["source"], d["score"]) for d in kept] == [(ORGANIZER, 0.9), (AGGREGATOR, 0.7)]
+    assert stats == {"chunks_in": 3, "duplicates": 1, "ratio": 0.333}
+
+
+def test_filter_page_drops_copies_of_indexed_chunks_from_other_sources():
+    dedup = ChunkDeduplicator(min_similarity=0.6, max_entries=100)
+    indexed = set()
+
+    def index(source, texts):
+        kept = asyncio.run(asyncio.to_thread(dedup.filter_page, source, texts, indexed.__contains__))
+        indexed.update(chunk_hash(source, text) for text in kept)
+        return kept
+
+    assert index(ORGANIZER, [TEXT, OTHER]) == [TEXT, OTHER]
+    # Перепечатка на агрегаторе отсеивается, обновленная страница того же источника — нет
+    assert index(AGGREGATOR, [NEAR_COPY]) == []
+    assert index(ORGANIZER, [NEAR_COPY]) == [NEAR_COPY]
+    # Копия, которой уже нет в индексе, не считается
+    indexed.clear()
+    assert index(AGGREGATOR, [TEXT]) == [TEXT]
+    assert dedup.stats()["duplicates"] == 1
@@ -0,0 +1,49 @@
+from src.services.chunk_prefilter import find_countries, prefilter_chunks
+
+SEARCH_PARAMS = {"period": "октябрь 2025", "country": "Китай"}
+
+
+def _doc(text, score=1.0):
+    return {"text": text, "source": "https://example.com", "score": score}
+
+
+def test_find_countries_by_name_and_city():
+    assert find_countries("Шанхай, Китай") == {"китай"}
+    assert find_countries("Expo Center, Dubai") == {"оаэ"}
+    assert find_countries("Выставочный центр") == set()
+
+
+def test_prefilter_drops_only_chunks_with_every_date_out_of_window():
+    docs = [
+        _doc("Выставка 6-8 мая 2023 в Шанхае"),
+        _doc("Выставка 6-8 октября 2025 в Шанхае, прошлая прошла 6 мая 2023"),
+        _doc("Выставка 20 декабря 2025 в Пекине"),
+    ]
+    kept, stats = prefilter_chunks(docs, SEARCH_PARAMS)
+    assert [d["text"] for d in kept] == [docs[1]["text"], docs[2]["text"]]
+    assert stats["dropped_by_date"] == 1
+
+
+def test_prefilter_keeps_chunks_with_only_a_year_or_no_dates():
+    docs = [_doc("Выставка проводится в Шанхае с 2001 года"), _doc("Крупнейшая выставка отрасли")]
+    kept, stats = prefilter_chunks(docs, SEARCH_PARAMS)
+    assert len(kept) == 2
+    assert stats["dropped_by_date"] == 0
+
+
+def test_prefilter_downranks_other_countries():
+    docs = [_doc("Выставка 7 октября 2025 в Стамбуле", 1.0), _doc("Выставка 7 октября 2025 в Пекине", 0.8)]
+    kept, stats = prefilter_chunks(docs, SEARCH_PARAMS)
+    assert [d["score"] for d in kept] == [0.8, 0.5]
+    assert stats["downranked_by_country"] == 1
+
+
+def test_prefilter_ignores_publication_date_and_keeps_year_in_window():
+    docs = [
+        _doc("Опубликовано 12.01.2023. Выставка Foodexpo в Шанхае 2025"),
+        _doc("Март — рынок растет. Выставка Foodexpo в Шанхае"),
+        _doc("Обновлено 05.10.2025. Выставка прошла 6-8 мая 2023 в Шанхае"),
+    ]
+    kept, stats = prefilter_chunks(docs, SEARCH_PARAMS)
+    assert [d["text"] for d in kept] == [docs[0]["text"], docs[1]["text"]]
+    assert stats["dropped_by_date"] == 1
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+
+from src.services.client_data_service import ClientDataService, ClientIndex, normalize_inn
+
+
+def _index() -> ClientIndex:
+    inns = np.array(["0123456789", "7701234567", "771234567890"])
+    names = np.array(["ООО Ромашка", "АО Вектор", "ИП Иванов"])
+    industries = np.array(["Пищевая", "Логистика", "Торговля"])
+    return ClientIndex(inns, names, industries)
+
+
+def test_normalize_inn_restores_excel_number_format():
+    assert normalize_inn(" 7701 234567 ") == "7701234567"
+    assert normalize_inn("7701234567.0") == "7701234567"
+    # Ведущий ноль, потерянный числовой ячейкой Excel
+    assert normalize_inn(123456789) == "0123456789"
+    assert normalize_inn("71234567890") == "071234567890"
+
+
+def test_client_index_lookup_and_lookup_many():
+    index = _index()
+    assert index.lookup("7701234567") == ("АО Вектор", "Логистика")
+    assert index.lookup("7701234568") is None
+    assert index.lookup_many(["771234567890", "000", "0123456789"]).tolist() == [2, -1, 0]
+    empty = ClientIndex(np.array([], dtype=str), np.array([], dtype=str), np.array([], dtype=str))
+    assert empty.lookup_many(["7701234567"]).tolist() == [-1]
+
+
+def test_client_index_snapshot_is_tied_to_source_file(tmp_path):
+    path = str(tmp_path / "clients.npz")
+    _index().save(path, source_mtime_ns=1, source_size=2)
+    assert len(ClientIndex.load(path, 1, 2)) == 3
+    assert ClientIndex.load(path, 1, 3) is None
+
+
+def test_get_client_info_by_inn_normalizes_query(tmp_path):
+    source = tmp_path / "clients.xlsx"
+    source.write_bytes(b"stub")
+    stat = os.stat(source)
+    snapshot = str(tmp_path / "clients.npz")
+    _index().save(snapshot, stat.st_mtime_ns, stat.st_size)
+    service = ClientDataService(str(source), snapshot, reload_check_seconds=3600)
+
+    assert service.get_client_info_by_inn(123456789)["name"] == "ООО Ромашка"
+    assert service.get_client_info_by_inn("7701234567.0")["industry"] == "Логистика"
+    assert service.get_client_info_by_inn("0000000000") is None
@@ -0,0 +1,59 @@
+from datetime import date
+
+from src.services.date_ranges import (
+    find_date_ranges,
+    find_years,
+    parse_date_range,
+    ranges_overlap,
+    shift_months,
+)
+
+
+def test_parse_date_range_formats():
+    assert parse_date_range("6-8 октября 2025") == (date(2025, 10, 6), date(2025, 10, 8))
+    assert parse_date_range("с 30 сентября по 2 октября 2025") == (date(2025, 9, 30), date(2025, 10, 2))
+    assert parse_date_range("October 6-8, 2025") == (date(2025, 10, 6), date(2025, 10, 8))
+    assert parse_date_range("12.03.2025 - 15.03.2025") == (date(2025, 3, 12), date(2025, 3, 15))
+    assert parse_date_range("весна 2025") == (date(2025, 3, 1), date(2025, 5, 31))
+    assert parse_date_range("весь 2025 год") == (date(2025, 1, 1), date(2025, 12, 31))
+    assert parse_date_range("28 декабря - 3 января 2026") == (date(2025, 12, 28), date(2026, 1, 3))
+    assert parse_date_range("в мае", default_year=2025) == (date(2025, 5, 1), date(2025, 5, 31))
+    assert parse_date_range("скоро") is None
+
+
+def test_english_may_is_a_month_only_next_to_a_number():
+    assert parse_date_range("May 20-22, 2025") == (date(2025, 5, 20), date(2025, 5, 22))
+    assert parse_date_range("20 May 2025") == (date(2025, 5, 20), date(2025, 5, 20))
+    assert find_date_ranges("Visitors may register online until 2025", default_year=2025) == []
+
+
+def test_find_date_ranges_ignores_bare_years():
+    text = "Выставка проводится с 2001 года. Ближайшая — 6-8 октября 2025, следующая 12.04.2026."
+    assert find_date_ranges(text) == [
+        (date(2026, 4, 12), date(2026, 4, 12)),
+        (date(2025, 10, 6), date(2025, 10, 8)),
+    ]
+    assert find_date_ranges("Компания основана в 1995 году") == []
+
+
+def test_shift_months_and_overlap():
+    assert shift_months(date(2025, 1, 31), 1) == date(2025, 2, 28)
+    assert shift_months(date(2025, 2, 15), -3) == date(2024, 11, 15)
+    october = (date(2025, 10, 1), date(2025, 10, 31))
+    assert ranges_overlap(october, (date(2025, 9, 30), date(2025, 10, 2)))
+    assert not ranges_overlap(october, (date(2025, 11, 1), date(2025, 11, 3)))
+
+
+def test_find_date_ranges_skips_publication_stamps():
+    text = "Опубликовано 12.01.2023. Обновлено: 3 марта 2024. Выставка пройдет 6-8 октября 2025"
+    assert find_date_ranges(text) == [(date(2025, 10, 6), date(2025, 10, 8))]
+    assert find_date_ranges("Published 2023-01-12. Expo in Shanghai") == []
+    assert find_years("Опубликовано 12.01.2023. Foodexpo 2025") == [(date(2025, 1, 1), date(2025, 12, 31))]
+
+
+def test_find_date_ranges_needs_day_or_year_next_to_month():
+    assert find_date_ranges("Март — рынок растет, в мае открылся офис", default_year=2025) == []
+    assert find_date_ranges("Выставка в октябре 2025 года") == [(date(2025, 10, 1), date(2025, 10, 31))]
+    assert find_date_ranges("Выставка 6 мая", default_year=2025) == [(date(2025, 5, 6), date(2025, 5, 6))]
+    # Период поиска по-прежнему понимает месяц без года
+    assert parse_date_range("Март", default_year=2025) == (date(2025, 3, 1), date(2025, 3, 31))
@@ -0,0 +1,50 @@
+from src.services.event_merge import merge_events, same_event
+
+SEARCH_PARAMS = {"period": "сентябрь 2025"}
+
+
+def _event(name, dates="", location="Москва, Россия", source="https://worldfood-moscow.ru/"):
+    return {"name": name, "dates": dates, "location": location, "source": source}
+
+
+def test_same_event_by_name_dates_and_country():
+    a = _event("WorldFood Moscow 2025", "23-26 сентября 2025")
+    b = _event("Международная выставка WorldFood Moscow", "23.09.2025 - 26.09.2025")
+    assert same_event(a, b, SEARCH_PARAMS)
+    assert not same_event(a, _event("WorldFood Moscow", "10-12 марта 2025"), SEARCH_PARAMS)
+    assert not same_event(a, _event("WorldFood Moscow", location="Шанхай, Китай"), SEARCH_PARAMS)
+    assert not same_event(a, _event("Агропродмаш", "23-26 сентября 2025"), SEARCH_PARAMS)
+
+
+def test_merge_events_collects_sources_and_keeps_best_category():
+    categorized = {
+        "perfect_matches": [_event("WorldFood Moscow 2025", "23-26 сентября 2025")],
+        "near_date_matches": [],
+        "other_mismatches": [
+            dict(
+                _event("WorldFood Moscow", "23.09.2025", source="https://expomap.ru/expo/worldfood/"),
+                description="Подробное описание",
+                mismatch_reason="страна",
+            )
+        ],
+    }
+    merged, stats = merge_events(categorized, SEARCH_PARAMS)
+    assert stats == {"events_in": 2, "events_out": 1}
+    assert merged["other_mismatches"] == []
+    event = merged["perfect_matches"][0]
+    assert set(event["sources"]) == {"https://worldfood-moscow.ru/", "https://expomap.ru/expo/worldfood/"}
+    assert event["description"] == "Подробное описание"
+    assert "mismatch_reason" not in event
+
+
+def test_merge_events_is_not_transitive():
+    # Запись без дат совместима с обеими, но сами они в разные даты
+    early = _event("WorldFood Moscow", "1-5 сентября 2025")
+    undated = _event("WorldFood Moscow", source="https://expomap.ru/expo/worldfood/")
+    late = _event("WorldFood Moscow", "20-25 сентября 2025")
+    merged, stats = merge_events(
+        {"perfect_matches": [early, undated, late], "near_date_matches": [], "other_mismatches": []},
+        SEARCH_PARAMS,
+    )
+    assert stats["events_out"] == 2
+    assert [e["dates"] for e in merged["perfect_matches"]] == ["1-5 сентября 2025", "20-25 сентября 2025"]
@@ -0,0 +1,58 @@
+from src.services.event_store import EventStore, canonical_country, event_country
+
+SEARCH_PARAMS = {
+    "country": "Китай",
+    "industry": "Пищевая промышленность",
+    "period": "октябрь 2025",
+    "event_type": "выставки",
+}
+
+
+def test_event_country_prefers_search_country():
+    assert event_country("Шанхай, Китай", "Китай") == "китай"
+    assert event_country("Нью-Дели, Индии", "Индия") == "индия"
+    assert event_country("Пекин, Китай", "КНР") == "китай"
+
+
+def test_canonical_country_merges_synonyms():
+    assert canonical_country("КНР") == canonical_country("Китай") == "китай"
+    assert canonical_country("Эмираты") == canonical_country("ОАЭ") == "оаэ"
+    assert canonical_country("Новая Зеландия") == "новая зеландия"
+
+
+def test_event_country_from_last_part_of_location():
+    assert event_country("Мумбаи, Индия", "Китай") == "индия"
+    assert event_country("Expo Center, Dubai", None) == "оаэ"
+
+
+def test_event_country_is_none_for_unknown_city_or_street():
+    assert event_country("Экспоцентр, Краснопресненская наб. 14", "Китай") is None
+    assert event_country("Нинбо", "Индия") is None
+    assert event_country("", "Китай") is None
+
+
+def test_event_store_answers_repeated_search(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"), min_events=2, max_age_seconds=3600)
+    categorized = {
+        "perfect_matches": [
+            {"name": "Food Expo", "dates": "6-8 октября 2025", "location": "Шанхай, Китай", "source": "a"},
+            {"name": "Sial China", "dates": "20 октября 2025", "location": "Пекин", "source": "b"},
+        ],
+        "near_date_matches": [
+            {"name": "Agro Fair", "dates": "5 декабря 2025", "location": "Гуанчжоу, КНР", "source": "c"},
+        ],
+        "other_mismatches": [
+            {"name": "Food India", "dates": "7 октября 2025", "location": "Мумбаи", "source": "d"},
+        ],
+    }
+    try:
+        assert store.add_events(categorized, SEARCH_PARAMS) == 4
+        result = store.lookup(SEARCH_PARAMS)
+        assert [e["name"] for e in result["perfect_matches"]] == ["Food Expo", "Sial China"]
+        assert [e["name"] for e in result["near_date_matches"]] == ["Agro Fair"]
+        assert store.lookup({**SEARCH_PARAMS, "country": "Индия"}) is None
+        # Синоним страны находит те же мероприятия
+        assert len(store.lookup({**SEARCH_PARAMS, "country": "КНР"})["perfect_matches"]) == 2
+        assert [e["name"] for e in store.search_text("Когда будет Sial?")] == ["Sial China"]
+    finally:
+        store.close()
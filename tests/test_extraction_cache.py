@@ -0,0 +1,40 @@
+import asyncio
+
+from src.services.extraction_cache import ExtractionCache, extraction_fingerprint, search_criteria
+
+PARAMS = {"industry": "Пищевая промышленность", "country": "Китай", "period": "Октябрь 2025"}
+
+
+def test_fingerprint_ignores_case_spaces_and_unrelated_fields():
+    same = {"industry": "пищевая  промышленность", "country": "китай ", "period": "октябрь 2025", "user_id": 1}
+    assert extraction_fingerprint(PARAMS, ["a", "b"], "v1") == extraction_fingerprint(same, ["a", "b"], "v1")
+
+
+def test_fingerprint_depends_on_criteria_chunks_and_prompt():
+    base = extraction_fingerprint(PARAMS, ["a", "b"], "v1")
+    assert base != extraction_fingerprint({**PARAMS, "country": "Индия"}, ["a", "b"], "v1")
+    assert base != extraction_fingerprint(PARAMS, ["b", "a"], "v1")
+    assert base != extraction_fingerprint(PARAMS, ["a"], "v1")
+    assert base != extraction_fingerprint(PARAMS, ["a", "b"], "v2")
+
+
+def test_search_criteria_keeps_only_filled_criteria():
+    params = {**PARAMS, "extra_info": "", "stage": "confirm", "last_search_results": {}}
+    assert search_criteria(params) == PARAMS
+
+
+def test_extraction_cache_round_trip_and_eviction(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "extractions.db"), ttl_seconds=3600, max_entries=1)
+
+    async def scenario():
+        assert await cache.get("k1") is None
+        await cache.put("k1", {"perfect_matches": [{"name": "Food Expo"}]})
+        assert await cache.get("k1") == {"perfect_matches": [{"name": "Food Expo"}]}
+        await cache.put("k2", {"perfect_matches": []})
+        assert await cache.get("k1") is None
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        cache.close()
+    assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,58 @@
+import pytest
+
+from src.services.html_extractor import (
+    HtmlExtractor,
+    LxmlExtractor,
+    SoupExtractor,
+    join_units,
+    split_units,
+)
+
+ROWS = "".join(
+    f"<tr><td>{i}.10.2025</td><td>Выставка пищевой промышленности {i}</td><td>Шанхай, Китай</td></tr>"
+    for i in range(1, 11)
+)
+PAGE = f"""<html><head><title>Календарь</title><script>var x = "скрипт";</script>
+<style>body {{ color: red; }}</style></head><body>
+<header>Шапка сайта</header><nav><ul><li>Меню</li><li>Раздел</li><li>Контакты</li></ul></nav>
+<div id="content"><h1>Выставки 2025</h1><p>Вводный текст <!-- комментарий --> календаря.</p>
+<table>{ROWS}</table>
+<ul><li>Коротко</li></ul>
+<noindex>Реклама</noindex></div>
+<footer>Подвал</footer></body></html>"""
+
+
+def test_html_extractor_is_abstract():
+    with pytest.raises(TypeError):
+        HtmlExtractor()
+
+
+def test_lxml_extractor_strips_service_tags_and_splits_table_block():
+    text, blocks = LxmlExtractor().extract(PAGE)
+    lines = text.splitlines()
+    assert lines[0] == "Выставки 2025"
+    assert lines[1].split() == ["Вводный", "текст", "календаря."]
+    assert lines[2:] == ["Коротко"]
+    assert len(blocks) == 1
+    rows = blocks[0].splitlines()
+    assert len(rows) == 10
+    assert rows[0] == "1.10.2025 | Выставка пищевой промышленности 1 | Шанхай, Китай"
+    for removed in ("скрипт", "Шапка", "Меню", "Реклама", "Подвал", "комментарий"):
+        assert removed not in text + "".join(blocks)
+
+
+def test_lxml_extractor_matches_soup_words():
+    lxml_text, blocks = LxmlExtractor().extract(PAGE)
+    soup_text, _ = SoupExtractor().extract(PAGE)
+    assert sorted(" ".join([lxml_text, *blocks]).replace("|", " ").split()) == sorted(soup_text.split())
+
+
+def test_lxml_extractor_handles_empty_and_bodyless_input():
+    assert LxmlExtractor().extract("") == ("", [])
+    assert LxmlExtractor().extract("   ") == ("", [])
+
+
+def test_split_units_round_trip():
+    stored = join_units("Основной текст", ["Блок 1", "Блок 2"])
+    assert split_units(stored) == ["Основной текст", "Блок 1", "Блок 2"]
+    assert split_units(join_units("", ["Блок"])) == ["Блок"]
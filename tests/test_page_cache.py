@@ -0,0 +1,51 @@
+import asyncio
+import sqlite3
+
+import httpx
+
+from src.services import page_cache as page_cache_module
+from src.services.page_cache import PageCache, canonicalize_url
+
+
+def test_canonicalize_url_drops_tracking_params_and_www():
+    assert canonicalize_url(
+        "HTTPS://www.Expomap.ru/all/?utm_source=ya&yclid=1&b=2&a=1#top"
+    ) == "https://expomap.ru/all?a=1&b=2"
+
+
+def test_canonicalize_url_keeps_filter_params_that_look_like_tracking():
+    # from / fromDate / from_date задают фильтр листинга — разные страницы
+    urls = [
+        "https://expomap.ru/all/?from=2025-10-01",
+        "https://expomap.ru/all/?fromDate=2025-11-01",
+        "https://expomap.ru/all/?from_date=2025-12-01",
+        "https://expomap.ru/all/",
+    ]
+    keys = {canonicalize_url(u) for u in urls}
+    assert len(keys) == len(urls)
+    assert canonicalize_url(urls[0]) == "https://expomap.ru/all?from=2025-10-01"
+
+
+def test_canonicalize_url_root_path():
+    assert canonicalize_url("http://example.com") == "http://example.com/"
+
+
+def test_revalidate_degrades_to_miss_when_touch_fails(tmp_path, monkeypatch):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(304)))
+    monkeypatch.setattr(page_cache_module, "get_http_client", lambda: client)
+    cache = PageCache(str(tmp_path / "pages.db"), ttl_seconds=0, max_bytes=1024 * 1024)
+
+    def _locked(url):
+        raise sqlite3.OperationalError("database is locked")
+
+    async def scenario():
+        await cache.put("https://expomap.ru/all/", "Выставка", etag='"v1"')
+        assert await cache.get_valid_text("https://expomap.ru/all/") == "Выставка"
+        monkeypatch.setattr(cache, "_touch_sync", _locked)
+        assert await cache.get_valid_text("https://expomap.ru/all/") is None
+        await client.aclose()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        cache.close()
@@ -0,0 +1,37 @@
+from src.services.pre_crawler import CrawlState, find_pagination_links
+
+SEED = "https://expomap.ru/all/"
+
+
+def test_find_pagination_links():
+    html = """
+    <a href="/all/?page=2">2</a>
+    <a href="/all/page/3/">3</a>
+    <a href="/all/archive" rel="next">Следующие</a>
+    <a href="/all/expo-1/">Выставка</a>
+    <a href="/news/?page=2">2</a>
+    <a href="https://other.ru/all/?page=2">2</a>
+    <a href="/all/list">далее</a>
+    <a href="/all/?page=2#top">2</a>
+    """
+    assert find_pagination_links(html, "https://expomap.ru/all/", SEED) == [
+        "https://expomap.ru/all/?page=2",
+        "https://expomap.ru/all/page/3/",
+        "https://expomap.ru/all/archive",
+        "https://expomap.ru/all/list",
+    ]
+
+
+def test_crawl_state_keeps_hash_and_change_time(tmp_path):
+    state = CrawlState(str(tmp_path / "crawl.db"))
+    try:
+        assert state.get_hash(SEED) is None
+        state.save(SEED, "h1", changed=True)
+        state.save(SEED, "h1", changed=False)
+        assert state.get_hash(SEED) == "h1"
+        crawled_at, changed_at = state._connect().execute(
+            "SELECT crawled_at, changed_at FROM pages WHERE url = ?", (SEED,)
+        ).fetchone()
+        assert crawled_at >= changed_at
+    finally:
+        state.close()
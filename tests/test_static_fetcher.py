@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+from src.services.static_fetcher import (
+    STRATEGY_BROWSER,
+    STRATEGY_STATIC,
+    FetchStrategyRegistry,
+    _detect_encoding,
+)
+
+
+def test_detect_encoding_reads_meta_charset_when_header_has_none():
+    body = '<html><head><meta charset="windows-1251"></head><body>Выставка</body></html>'
+    encoding = _detect_encoding(body.encode("cp1251"), None)
+    assert encoding == "cp1251"
+    assert body.encode("cp1251").decode(encoding) == body
+
+
+def test_detect_encoding_reads_http_equiv_content_type():
+    body = b'<meta http-equiv="Content-Type" content="text/html; charset=windows-1251">'
+    assert _detect_encoding(body, None) == "cp1251"
+
+
+def test_detect_encoding_prefers_header_and_falls_back_to_utf8():
+    body = b'<meta charset="windows-1251">'
+    assert _detect_encoding(body, "utf-8") == "utf-8"
+    assert _detect_encoding(b"<p>text</p>", None) == "utf-8"
+    assert _detect_encoding(b'<meta charset="unknown-charset">', None) == "utf-8"
+
+
+def test_fetch_strategy_registry_persists_decisions(tmp_path):
+    path = str(tmp_path / "strategies.json")
+    registry = FetchStrategyRegistry(path, ttl_seconds=3600, js_domains={"js.example"})
+    asyncio.run(registry.remember("expomap.ru", STRATEGY_STATIC))
+
+    assert registry.get("expomap.ru") == STRATEGY_STATIC
+    assert registry.get("js.example") == STRATEGY_BROWSER
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["expomap.ru"]["mode"] == STRATEGY_STATIC
+    assert FetchStrategyRegistry(path, 3600, []).get("expomap.ru") == STRATEGY_STATIC
@@ -0,0 +1,50 @@
+from src.chunk_text import estimate_tokens, strip_source_prefix
+from src.nlu.token_budget import (
+    pack_by_budget,
+    render_fragments,
+    split_into_batches,
+)
+
+
+def _chunk(text, score, source="https://example.com"):
+    return {"text": f"ИСТОЧНИК: {source}\n\nТЕКСТ: {text}", "source": source, "score": score}
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("а") == 1
+    assert estimate_tokens("выставка") == 3
+    assert estimate_tokens("6-8 октября") == 1 + 1 + 1 + 3
+
+
+def test_strip_source_prefix_only_at_start():
+    assert strip_source_prefix("ИСТОЧНИК: https://a.ru\n\nТЕКСТ: Выставка") == "Выставка"
+    assert strip_source_prefix("Выставка. ИСТОЧНИК: x\n\nТЕКСТ: y") == "Выставка. ИСТОЧНИК: x\n\nТЕКСТ: y"
+
+
+def test_pack_by_budget_skips_chunks_that_do_not_fit():
+    long_text = "выставка " * 10  # 30 токенов
+    docs = [_chunk("коротко", 0.5), _chunk(long_text, 0.9), _chunk("еще коротко", 0.1)]
+    packed = pack_by_budget(docs, max_tokens=10)
+    assert [d["text"] for d in packed] == ["коротко", "еще коротко"]
+    assert [d["tokens"] for d in packed] == [3, 4]
+    assert [d["score"] for d in pack_by_budget(docs, max_tokens=100)] == [0.9, 0.5, 0.1]
+
+
+def test_split_into_batches_keeps_order_and_limit():
+    chunks = [{"text": "x", "tokens": t} for t in (4, 4, 3, 12, 1)]
+    batches = split_into_batches(chunks, max_tokens=8)
+    assert [[c["tokens"] for c in batch] for batch in batches] == [[4, 4], [3], [12], [1]]
+    assert split_into_batches([], max_tokens=8) == []
+
+
+def test_render_fragments_numbers_sources():
+    chunks = [
+        {"text": "Первый", "source": "https://a.ru"},
+        {"text": "Второй", "source": "https://b.ru"},
+        {"text": "Третий", "source": "https://a.ru"},
+    ]
+    text, sources = render_fragments(chunks)
+    assert sources == {"[1]": "https://a.ru", "[2]": "https://b.ru"}
+    assert text.startswith("ИСТОЧНИКИ:\n[1] https://a.ru\n[2] https://b.ru\n\n")
+    assert "--- ФРАГМЕНТ [1] ---\nТретий" in text
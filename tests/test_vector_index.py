@@ -0,0 +1,31 @@
+import numpy as np
+
+from src.services.vector_index import VectorIndex
+
+
+def _vectors(n, dim=4):
+    return np.eye(dim, dtype=np.float32)[:n].tolist()
+
+
+def test_compact_drops_deleted_rows_and_rows_past_vectors_file(tmp_path):
+    index = VectorIndex(str(tmp_path), max_age_seconds=3600, compact_ratio=0.3)
+    texts = ["выставка один", "выставка два", "выставка три", "выставка четыре"]
+    assert index.add_page("https://a.ru", texts, _vectors(4)) == 4
+    # Чанк в SQLite без вектора в файле, как после прерванной записи
+    conn = index._connect()
+    conn.execute(
+        "INSERT INTO chunks (row, chunk_hash, source, crawled_at, text) VALUES (?, ?, ?, ?, ?)",
+        (10, "orphan", "https://b.ru", 0.0, "выставка сирота"),
+    )
+    conn.commit()
+    # Повторный обход: два чанка страницы исчезли и помечаются удаленными
+    assert index.add_page("https://a.ru", texts[2:], _vectors(4)[2:]) == 0
+
+    index.compact()
+
+    rows = conn.execute("SELECT row, text FROM chunks ORDER BY row").fetchall()
+    assert rows == [(0, "выставка три"), (1, "выставка четыре")]
+    assert index.stats() == {"alive": 2, "rows": 2}
+    assert [d["row"] for d in index.search([0.0, 0.0, 0.0, 1.0], k=1)] == [1]
+    assert {d["text"] for d in index.search_text("выставка", k=10)} == {"выставка три", "выставка четыре"}
+    index.close()